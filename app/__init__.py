@@ -27,6 +27,10 @@ def create_app(config_class=Config):
     from app.middleware.error_handler import register_error_handlers
     register_error_handlers(app)
     
+    # Регистрация CLI-команд обслуживания
+    from app.cli import register_commands
+    register_commands(app)
+    
     # Инициализация базы данных
     with app.app_context():
         # Создать директорию instance если её нет
@@ -38,6 +42,16 @@ def create_app(config_class=Config):
             db.create_all()
         except Exception:
             pass  # Таблицы уже существуют
+        
+        # Индекс полнотекстового поиска задач (FTS5 / tsvector)
+        from app.services.task_search_service import init_task_search
+        init_task_search(app)
+    
+    # Фоновый планировщик периодических задач в потоке процесса
+    # (под gunicorn - в воркерах, см. post_fork в gunicorn.conf.py)
+    if app.config['SCHEDULER_ENABLED'] and not app.config['SCHEDULER_START_AFTER_FORK']:
+        from app.services.scheduler import start_scheduler
+        start_scheduler(app)
     
     return app
 
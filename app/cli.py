@@ -0,0 +1,107 @@
+"""
+CLI-команды обслуживания (flask --app wsgi <команда>)
+"""
+import click
+from flask import current_app
+from app.services.analytics_rollup import backfill_rollup
+from app.services.notification_retention import apply_retention, partition_notifications
+from app.services.scheduler import SCHEDULED_JOBS, run_job, run_pending_jobs, run_scheduler
+from app.services.team_dna_analyzer import rebuild_team_connections
+from app.services.workload_analyzer import reconcile_workloads
+
+
+@click.command('reconcile-workloads')
+@click.option('--dry-run', is_flag=True, help='Только показать расхождения, не исправляя их')
+def reconcile_workloads_command(dry_run):
+    """Сверить current_workload с активными назначениями"""
+    result = reconcile_workloads(fix=not dry_run)
+    for item in result['drift']:
+        click.echo(
+            f"user {item['user_id']}: current_workload={item['current_workload']} "
+            f"expected={item['expected_workload']} drift={item['drift']:+d}"
+        )
+    action = 'найдено' if dry_run else 'исправлено'
+    click.echo(f"Проверено пользователей: {result['checked']}, {action} расхождений: {len(result['drift'])}")
+
+
+@click.command('rebuild-team-connections')
+def rebuild_team_connections_command():
+    """Пересчитать силы связей Team DNA по совместным завершенным задачам"""
+    result = rebuild_team_connections()
+    click.echo(
+        f"Сотрудников: {result['users']}, создано связей: {result['created']}, "
+        f"обновлено: {result['updated']}"
+    )
+
+
+@click.command('backfill-analytics')
+def backfill_analytics_command():
+    """Пересчитать дневной rollup аналитики команды из таблицы tasks"""
+    result = backfill_rollup()
+    click.echo(f"Пересчитано дней: {result['days']}")
+
+
+@click.command('notifications-retention')
+@click.option('--dry-run', is_flag=True, help='Только подсчитать строки, попадающие под политику')
+def notifications_retention_command(dry_run):
+    """Удалить прочитанные и архивировать старые уведомления по политике хранения"""
+    result = apply_retention(dry_run=dry_run)
+    if dry_run:
+        click.echo(
+            f"Под политику попадают: прочитанных к удалению {result['deleted_read']}, "
+            f"к архивированию {result['archived']}, записей архива к удалению {result['archive_pruned']}"
+        )
+    else:
+        click.echo(
+            f"Удалено прочитанных: {result['deleted_read']}, перенесено в архив: {result['archived']}, "
+            f"удалено из архива: {result['archive_pruned']}"
+        )
+    if result['dropped_partitions']:
+        click.echo(f"Удалены секции: {', '.join(result['dropped_partitions'])}")
+    click.echo(
+        f"Пачек: {result['batches']}, осталось уведомлений: {result['remaining']}, "
+        f"время: {result['duration_ms']} мс"
+    )
+
+
+@click.command('partition-notifications')
+@click.option('--months-ahead', type=int, default=None, help='Сколько месяцев вперед создать секции')
+def partition_notifications_command(months_ahead):
+    """Секционировать notifications по месяцам created_at (PostgreSQL)"""
+    try:
+        result = partition_notifications(months_ahead)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if not result['partitions']:
+        click.echo('Таблица notifications уже секционирована')
+        return
+    click.echo(f"Создано секций: {result['partitions']}, перенесено уведомлений: {result['rows']}")
+
+
+@click.command('run-scheduler')
+@click.option('--once', is_flag=True, help='Выполнить задачи, срок которых наступил, и выйти (для cron)')
+@click.option('--job', 'jobs', multiple=True, type=click.Choice(list(SCHEDULED_JOBS)),
+              help='Принудительно выполнить указанную задачу и выйти')
+def run_scheduler_command(once, jobs):
+    """Запустить планировщик периодических задач (уведомления, обслуживание)"""
+    if jobs:
+        runs = [run_job(name, force=True) for name in jobs]
+    elif once:
+        runs = run_pending_jobs({})
+    else:
+        click.echo(f"Планировщик запущен, задачи: {', '.join(SCHEDULED_JOBS)}")
+        run_scheduler(current_app._get_current_object())
+        return
+    for run in runs:
+        if run:
+            click.echo(f"{run['job_name']}: {run['status']} за {run['duration_ms']} мс {run['result']}")
+
+
+def register_commands(app):
+    """Регистрация CLI-команд"""
+    app.cli.add_command(reconcile_workloads_command)
+    app.cli.add_command(rebuild_team_connections_command)
+    app.cli.add_command(backfill_analytics_command)
+    app.cli.add_command(run_scheduler_command)
+    app.cli.add_command(notifications_retention_command)
+    app.cli.add_command(partition_notifications_command)
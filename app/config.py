@@ -17,6 +17,59 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Пагинация списка задач
+    TASKS_PAGE_SIZE = int(os.getenv('TASKS_PAGE_SIZE', 50))
+    TASKS_MAX_PAGE_SIZE = int(os.getenv('TASKS_MAX_PAGE_SIZE', 200))
+    
+    # Полнотекстовый поиск задач
+    TASK_SEARCH_LANGUAGE = os.getenv('TASK_SEARCH_LANGUAGE', 'simple')  # конфигурация tsvector в PostgreSQL
+    TASK_SEARCH_MAX_RESULTS = int(os.getenv('TASK_SEARCH_MAX_RESULTS', 1000))
+    
+    # Словарь навыков для сопоставления задач и компетенций
+    SKILL_MATCHER_TTL = int(os.getenv('SKILL_MATCHER_TTL', 300))  # секунды
+    SKILL_MATCHER_CACHE_SIZE = int(os.getenv('SKILL_MATCHER_CACHE_SIZE', 10000))  # задач в кэше
+    SKILL_INDEX_TTL = int(os.getenv('SKILL_INDEX_TTL', 300))  # секунды, индекс навык -> сотрудники
+    
+    # Кэш снимков тяжелых вычислений: local (память процесса) или database (общий для воркеров)
+    SNAPSHOT_CACHE_BACKEND = os.getenv('SNAPSHOT_CACHE_BACKEND', 'local')
+    RECOMMENDATIONS_CACHE_TTL = int(os.getenv('RECOMMENDATIONS_CACHE_TTL', 60))  # секунды
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 15))  # секунды
+    
+    # Team DNA: ограничение времени поиска dream teams (секунды)
+    DREAM_TEAM_TIME_BUDGET = float(os.getenv('DREAM_TEAM_TIME_BUDGET', 5.0))
+    
+    # Поток уведомлений (SSE): бэкенд событий local (процесс) или database (общий для воркеров)
+    NOTIFICATION_EVENTS_BACKEND = os.getenv('NOTIFICATION_EVENTS_BACKEND', 'local')
+    NOTIFICATION_STREAM_KEEPALIVE = int(os.getenv('NOTIFICATION_STREAM_KEEPALIVE', 15))  # секунды
+    NOTIFICATION_STREAM_MAX_DURATION = int(os.getenv('NOTIFICATION_STREAM_MAX_DURATION', 600))  # секунды, 0 - без ограничения
+    NOTIFICATION_STREAM_POLL_INTERVAL = float(os.getenv('NOTIFICATION_STREAM_POLL_INTERVAL', 1.0))  # секунды, бэкенд database
+    NOTIFICATION_STREAM_LOOKBACK = int(os.getenv('NOTIFICATION_STREAM_LOOKBACK', 30))  # секунды, окно поздних коммитов (database)
+    NOTIFICATION_EVENTS_RETENTION = int(os.getenv('NOTIFICATION_EVENTS_RETENTION', 3600))  # секунды
+    
+    # Хранение уведомлений (дни, 0 - правило выключено)
+    NOTIFICATION_RETENTION_READ_DAYS = int(os.getenv('NOTIFICATION_RETENTION_READ_DAYS', 30))  # удалить прочитанные
+    NOTIFICATION_RETENTION_ARCHIVE_DAYS = int(os.getenv('NOTIFICATION_RETENTION_ARCHIVE_DAYS', 90))  # перенести в архив
+    NOTIFICATION_ARCHIVE_RETENTION_DAYS = int(os.getenv('NOTIFICATION_ARCHIVE_RETENTION_DAYS', 365))  # удалить из архива
+    NOTIFICATION_RETENTION_BATCH_SIZE = int(os.getenv('NOTIFICATION_RETENTION_BATCH_SIZE', 1000))  # строк в пачке
+    NOTIFICATION_PARTITION_MONTHS_AHEAD = int(os.getenv('NOTIFICATION_PARTITION_MONTHS_AHEAD', 2))  # PostgreSQL
+    
+    # Фоновый планировщик: в потоке процесса приложения (SCHEDULER_ENABLED)
+    # или отдельным процессом flask run-scheduler. Интервалы задач в секундах, 0 - выключена
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'false').lower() == 'true'
+    SCHEDULER_TICK = int(os.getenv('SCHEDULER_TICK', 10))  # секунды между проверками
+    # gunicorn (preload_app): планировщик запускается в воркерах из post_fork, а не в мастере
+    SCHEDULER_START_AFTER_FORK = os.getenv('SCHEDULER_START_AFTER_FORK', 'false').lower() == 'true'
+    SCHEDULER_DEADLINE_NOTIFICATIONS_INTERVAL = int(os.getenv('SCHEDULER_DEADLINE_NOTIFICATIONS_INTERVAL', 300))
+    SCHEDULER_OVERDUE_NOTIFICATIONS_INTERVAL = int(os.getenv('SCHEDULER_OVERDUE_NOTIFICATIONS_INTERVAL', 3600))
+    SCHEDULER_ANALYTICS_ROLLUP_INTERVAL = int(os.getenv('SCHEDULER_ANALYTICS_ROLLUP_INTERVAL', 60))
+    # Полный пересчет rollup (выполняется при первом чтении аналитики; 0 - только по требованию)
+    SCHEDULER_ANALYTICS_BACKFILL_INTERVAL = int(os.getenv('SCHEDULER_ANALYTICS_BACKFILL_INTERVAL', 0))
+    SCHEDULER_RECONCILE_WORKLOADS_INTERVAL = int(os.getenv('SCHEDULER_RECONCILE_WORKLOADS_INTERVAL', 3600))
+    SCHEDULER_TEAM_CONNECTIONS_INTERVAL = int(os.getenv('SCHEDULER_TEAM_CONNECTIONS_INTERVAL', 86400))
+    SCHEDULER_UNREAD_COUNTERS_INTERVAL = int(os.getenv('SCHEDULER_UNREAD_COUNTERS_INTERVAL', 3600))
+    SCHEDULER_NOTIFICATION_EVENTS_INTERVAL = int(os.getenv('SCHEDULER_NOTIFICATION_EVENTS_INTERVAL', 600))
+    SCHEDULER_NOTIFICATION_RETENTION_INTERVAL = int(os.getenv('SCHEDULER_NOTIFICATION_RETENTION_INTERVAL', 86400))
+    
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173').split(',')
     
@@ -45,6 +45,12 @@ class User(db.Model):
 class Task(db.Model):
     """Модель задачи"""
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Keyset-пагинация списка задач по (created_at, id)
+        db.Index('ix_tasks_created_at_id', 'created_at', 'id'),
+        # Ближайшие дедлайны (дашборд сотрудника)
+        db.Index('ix_tasks_deadline', 'deadline'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -66,22 +72,39 @@ class Task(db.Model):
     history = db.relationship('TaskHistory', backref='task', lazy=True, cascade='all, delete-orphan', order_by='TaskHistory.created_at.desc()')
     rating = db.Column(db.Integer)  # Оценка выполнения задачи (1-5)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'priority': self.priority,
-            'status': self.status,
-            'deadline': self.deadline.isoformat() if self.deadline else None,
-            'estimated_hours': float(self.estimated_hours) if self.estimated_hours else None,
-            'created_by': self.created_by,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'rating': self.rating,
-            'required_competencies': self.required_competencies or [],
-            'tags': [tag.to_dict() for tag in self.tags],
+    # Поля, доступные для проекции (?fields=) в списке задач
+    SERIALIZABLE_FIELDS = (
+        'id', 'title', 'description', 'priority', 'status', 'deadline', 'estimated_hours',
+        'created_by', 'created_at', 'updated_at', 'rating', 'required_competencies', 'tags',
+    )
+    
+    def to_dict(self, fields=None):
+        """
+        Сериализовать задачу
+        
+        Args:
+            fields: Список полей для проекции (None - все поля).
+                Незапрошенные поля не читаются, поэтому отложенные колонки
+                и теги не подгружаются.
+        """
+        serializers = {
+            'id': lambda: self.id,
+            'title': lambda: self.title,
+            'description': lambda: self.description,
+            'priority': lambda: self.priority,
+            'status': lambda: self.status,
+            'deadline': lambda: self.deadline.isoformat() if self.deadline else None,
+            'estimated_hours': lambda: float(self.estimated_hours) if self.estimated_hours else None,
+            'created_by': lambda: self.created_by,
+            'created_at': lambda: self.created_at.isoformat() if self.created_at else None,
+            'updated_at': lambda: self.updated_at.isoformat() if self.updated_at else None,
+            'rating': lambda: self.rating,
+            'required_competencies': lambda: self.required_competencies or [],
+            'tags': lambda: [tag.to_dict() for tag in self.tags],
         }
+        if fields is None:
+            fields = self.SERIALIZABLE_FIELDS
+        return {field: serializers[field]() for field in fields if field in serializers}
 
 class Assignment(db.Model):
     """Модель назначения задачи"""
@@ -97,6 +120,11 @@ class Assignment(db.Model):
     completed_at = db.Column(db.DateTime)
     suitability_score = db.Column(db.Float)  # Оценка пригодности сотрудника для задачи (0-1)
     
+    __table_args__ = (
+        # Назначения сотрудника по статусу (дашборд, загруженность)
+        db.Index('ix_assignments_assigned_to_status', 'assigned_to', 'status'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -265,6 +293,10 @@ class TaskComment(db.Model):
 class Notification(db.Model):
     """Модель уведомлений"""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Дедупликация при генерации уведомлений о дедлайнах и просрочках
+        db.Index('ix_notifications_dedup', 'user_id', 'type', 'related_task_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
@@ -367,3 +399,116 @@ class TimeTracking(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
 
+class CacheEntry(db.Model):
+    """Модель записи общего кэша снимков (бэкенд database)"""
+    __tablename__ = 'cache_entries'
+    
+    key = db.Column(db.String(255), primary_key=True)
+    value = db.Column(db.Text, nullable=False)  # JSON
+    generated_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class TeamDailyStats(db.Model):
+    """Дневной агрегат аналитики команды (rollup)
+    
+    Счетчики задач относятся к задачам, созданным в этот день, и отражают
+    их текущий статус; workload_percent и avg_efficiency - снимок команды,
+    сделанный в этот день.
+    """
+    __tablename__ = 'team_daily_stats'
+    
+    day = db.Column(db.Date, primary_key=True)
+    tasks_created = db.Column(db.Integer, nullable=False, default=0)
+    tasks_active = db.Column(db.Integer, nullable=False, default=0)
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0)
+    tasks_overdue = db.Column(db.Integer, nullable=False, default=0)
+    workload_percent = db.Column(db.Float)  # Снимок средней загруженности, %
+    avg_efficiency = db.Column(db.Float)  # Снимок средней эффективности, %
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'tasks_created': self.tasks_created,
+            'tasks_active': self.tasks_active,
+            'tasks_completed': self.tasks_completed,
+            'tasks_overdue': self.tasks_overdue,
+            'workload_percent': self.workload_percent,
+            'avg_efficiency': self.avg_efficiency,
+        }
+
+
+class JobRun(db.Model):
+    """Запуск периодической задачи фонового планировщика"""
+    __tablename__ = 'job_runs'
+    __table_args__ = (
+        db.Index('ix_job_runs_job_name_started_at', 'job_name', 'started_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(100), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    duration_ms = db.Column(db.Float)
+    status = db.Column(db.String(20), nullable=False)  # success, error
+    result = db.Column(db.Text)  # JSON результата или текст ошибки
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_name': self.job_name,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'result': self.result,
+        }
+
+
+class NotificationEvent(db.Model):
+    """Событие потока уведомлений (бэкенд database: общая очередь воркеров)"""
+    __tablename__ = 'notification_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    event = db.Column(db.String(30), nullable=False)  # notification, unread_count
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class NotificationCounter(db.Model):
+    """Счетчик непрочитанных уведомлений пользователя"""
+    __tablename__ = 'notification_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class NotificationArchive(db.Model):
+    """Архив старых уведомлений (без внешних ключей, один индекс)"""
+    __tablename__ = 'notifications_archive'
+    __table_args__ = (
+        db.Index('ix_notifications_archive_user_id_created_at', 'user_id', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # id исходного уведомления
+    user_id = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    message = db.Column(db.Text)
+    related_task_id = db.Column(db.Integer)
+    is_read = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'type': self.type,
+            'title': self.title,
+            'message': self.message,
+            'related_task_id': self.related_task_id,
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None,
+        }
@@ -4,7 +4,8 @@ API endpoints для рекомендаций ИИ
 from flask import Blueprint, request, jsonify
 
 from app.models import User
-from app.services.ai_recommendations_service import generate_recommendations, apply_recommendation
+from app.services.ai_recommendations_service import get_recommendations_snapshot, apply_recommendation
+from app.services.snapshot_cache import snapshot_age_seconds
 
 ai_recommendations_bp = Blueprint('ai_recommendations', __name__)
 
@@ -13,11 +14,13 @@ ai_recommendations_bp = Blueprint('ai_recommendations', __name__)
 def get_recommendations():
     """Получить список рекомендаций ИИ"""
     # Без авторизации - просто возвращаем рекомендации
-    recommendations = generate_recommendations()
+    recommendations, generated_at = get_recommendations_snapshot()
     
     return jsonify({
         'success': True,
-        'data': recommendations
+        'data': recommendations,
+        'generated_at': generated_at.isoformat(),
+        'snapshot_age_seconds': snapshot_age_seconds(generated_at)
     }), 200
 
 
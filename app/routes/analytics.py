@@ -4,6 +4,7 @@ API endpoints для аналитики
 from flask import Blueprint, request, jsonify
 
 from app.models import User
+from app.services.analytics_rollup import GRANULARITIES
 from app.services.analytics_service import get_team_analytics, get_employee_metrics, get_model_metrics
 
 analytics_bp = Blueprint('analytics', __name__)
@@ -14,7 +15,15 @@ def get_analytics():
     """Получить аналитику команды"""
     # Без авторизации - просто возвращаем аналитику
     days = int(request.args.get('days', 30))
-    analytics = get_team_analytics(days=days)
+    granularity = request.args.get('granularity')
+    
+    if days < 1 or (granularity and granularity not in GRANULARITIES):
+        return jsonify({
+            'success': False,
+            'message': 'Некорректные параметры периода'
+        }), 400
+    
+    analytics = get_team_analytics(days=days, granularity=granularity)
     
     return jsonify({
         'success': True,
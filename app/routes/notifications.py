@@ -1,15 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 
 from app.database import db
 from app.models import Notification, User
+from app.services.notification_counters import get_unread_count, reset_unread
+from app.services.notification_events import open_notification_stream, publish_notification_changes
 from app.services.notification_service import create_deadline_notifications, create_overdue_notifications
 
 notifications_bp = Blueprint('notifications', __name__)
 
+
+def _current_user_id():
+    """ID текущего пользователя (без авторизации - первый менеджер)"""
+    user = User.query.filter_by(role='manager').first()
+    return user.id if user else 1
+
 @notifications_bp.route('', methods=['GET'])
 def get_notifications():
     """Получить уведомления пользователя"""
-    user = User.query.filter_by(role="manager").first()
+    user_id = _current_user_id()
     
     # Фильтры
     is_read = request.args.get('is_read')
@@ -22,7 +30,7 @@ def get_notifications():
     
     notifications = query.order_by(Notification.created_at.desc()).limit(limit).all()
     
-    unread_count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    unread_count = get_unread_count(user_id)
     
     return jsonify({
         'success': True,
@@ -34,7 +42,7 @@ def get_notifications():
 def mark_notification_read(notification_id):
     """Отметить уведомление как прочитанное"""
     notification = Notification.query.get_or_404(notification_id)
-    user = User.query.filter_by(role="manager").first()
+    user_id = _current_user_id()
     
     # Проверка прав
     if notification.user_id != user_id:
@@ -55,11 +63,11 @@ def mark_notification_read(notification_id):
 @notifications_bp.route('/read-all', methods=['PUT'])
 def mark_all_notifications_read():
     """Отметить все уведомления как прочитанные"""
-    # Без авторизации - берем первого менеджера
-    user = User.query.filter_by(role='manager').first()
-    user_id = user.id if user else 1
+    user_id = _current_user_id()
     
     Notification.query.filter_by(user_id=user_id, is_read=False).update({'is_read': True})
+    reset_unread(db.session, user_id)
+    publish_notification_changes(db.session, user_ids=[user_id])
     db.session.commit()
     
     return jsonify({
@@ -81,20 +89,44 @@ def delete_notification(notification_id):
         'message': 'Уведомление успешно удалено'
     }), 200
 
+@notifications_bp.route('/stream', methods=['GET'])
+def stream_notifications():
+    """
+    Поток уведомлений пользователя (Server-Sent Events)
+    
+    События notification (новое уведомление) и unread_count (число
+    непрочитанных). Первым событием приходит текущий unread_count.
+    """
+    user_id = _current_user_id()
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    
+    return Response(
+        open_notification_stream(user_id, last_event_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # отключить буферизацию nginx
+        }
+    )
+
 @notifications_bp.route('/generate', methods=['POST'])
 def generate_notifications():
     """Создать уведомления о дедлайнах (для менеджеров)"""
     # Без авторизации - просто создаем уведомления
     
-    deadline_count = create_deadline_notifications()
-    overdue_count = create_overdue_notifications()
+    deadline_run = create_deadline_notifications()
+    overdue_run = create_overdue_notifications()
     
     return jsonify({
         'success': True,
         'message': 'Уведомления созданы',
         'data': {
-            'deadline_notifications': deadline_count,
-            'overdue_notifications': overdue_count
+            'deadline_notifications': deadline_run['created'],
+            'overdue_notifications': overdue_run['created'],
+            'runs': {
+                'deadline': deadline_run,
+                'overdue': overdue_run
+            }
         }
     }), 200
 
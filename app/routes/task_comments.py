@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 
 from app.database import db
 from app.models import Task, TaskComment, User, Notification
+from app.services.user_resolver import resolve_users
 
 task_comments_bp = Blueprint('task_comments', __name__)
 
@@ -11,6 +12,8 @@ def get_task_comments(task_id):
     task = Task.query.get_or_404(task_id)
     
     comments = TaskComment.query.filter_by(task_id=task_id).order_by(TaskComment.created_at.desc()).all()
+    # Авторы загружаются одним запросом, comment.user берется из identity map
+    resolve_users(comment.user_id for comment in comments)
     
     return jsonify({
         'success': True,
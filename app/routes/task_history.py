@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 
 from app.database import db
 from app.models import Task, TaskHistory, User
+from app.services.user_resolver import resolve_users
 
 task_history_bp = Blueprint('task_history', __name__)
 
@@ -13,6 +14,8 @@ def get_task_history(task_id):
     limit = request.args.get('limit', type=int, default=100)
     
     history = TaskHistory.query.filter_by(task_id=task_id).order_by(TaskHistory.created_at.desc()).limit(limit).all()
+    # Авторы изменений загружаются одним запросом
+    resolve_users(entry.user_id for entry in history)
     
     return jsonify({
         'success': True,
@@ -1,13 +1,108 @@
-from flask import Blueprint, request, jsonify
+import base64
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from app.database import db
 from app.models import Task, Assignment, User, TaskHistory, Notification
 from app.schemas.task_schema import TaskSchema, CreateTaskSchema
-from app.services.task_distributor import assign_task_automatically
+from app.services.task_distributor import assign_task_automatically, assign_tasks_batch
 from app.services.task_history_service import create_task_history_entry, track_task_update
+from app.services.task_search_service import search_task_ids
+from app.services.team_dna_analyzer import update_connections_for_task
+from app.services.workload_analyzer import release_task_workload, set_assignment_status
 
 tasks_bp = Blueprint('tasks', __name__)
 
+# Поля списка задач, доступные для проекции (?fields=)
+TASK_LIST_FIELDS = Task.SERIALIZABLE_FIELDS + ('assignments',)
+
+def _task_loader_options(fields=None):
+    """
+    Стратегии загрузки связей задачи для списков
+
+    Назначения и теги подгружаются через selectinload (один IN-запрос на связь),
+    пользователи назначений - через joinedload вместе с назначениями.
+    Число запросов не зависит от количества задач.
+
+    Args:
+        fields: Запрошенные поля (None - все). Колонки вне проекции
+            не выбираются, незапрошенные связи не подгружаются.
+    """
+    if fields is None:
+        return (
+            selectinload(Task.assignments).joinedload(Assignment.user),
+            selectinload(Task.tags),
+        )
+    
+    # id и created_at нужны всегда - по ним строится курсор
+    columns = {'id', 'created_at'} | {
+        field for field in fields if field not in ('tags', 'assignments')
+    }
+    options = [load_only(*[getattr(Task, column) for column in columns])]
+    if 'assignments' in fields:
+        options.append(selectinload(Task.assignments).joinedload(Assignment.user))
+    if 'tags' in fields:
+        options.append(selectinload(Task.tags))
+    return tuple(options)
+
+def _serialize_task_with_assignments(task, fields=None):
+    """Сериализовать задачу вместе с назначениями и назначенными пользователями"""
+    task_dict = task.to_dict(fields)
+    if fields is not None and 'assignments' not in fields:
+        return task_dict
+    assignments_data = []
+    for assignment in task.assignments:
+        assignment_dict = assignment.to_dict()
+        if assignment.user:
+            assignment_dict['assigned_to_user'] = assignment.user.to_dict()
+        assignments_data.append(assignment_dict)
+    task_dict['assignments'] = assignments_data
+    return task_dict
+
+def _encode_cursor(task):
+    """Закодировать позицию (created_at, id) последней задачи страницы в непрозрачный курсор"""
+    raw = f'{task.created_at.isoformat()}|{task.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    """
+    Декодировать курсор пагинации
+
+    Returns:
+        tuple: (created_at, id)
+
+    Raises:
+        ValueError: Если курсор поврежден
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, task_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Некорректный курсор') from e
+
+def _encode_rank_cursor(position):
+    """Закодировать позицию в ранжированной выдаче поиска"""
+    return base64.urlsafe_b64encode(f'rank|{position}'.encode()).decode()
+
+def _decode_rank_cursor(cursor):
+    """
+    Декодировать курсор ранжированной выдачи поиска
+
+    Returns:
+        int: Позиция, с которой начинается страница
+
+    Raises:
+        ValueError: Если курсор поврежден
+    """
+    try:
+        kind, position = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        if kind != 'rank':
+            raise ValueError(kind)
+        return max(int(position), 0)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Некорректный курсор') from e
+
 @tasks_bp.route('', methods=['GET'])
 def get_tasks():
     """Получить список задач"""
@@ -18,6 +113,21 @@ def get_tasks():
     search = request.args.get('search')
     priority = request.args.get('priority')
     
+    # Пагинация и проекция полей
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', type=int, default=current_app.config['TASKS_PAGE_SIZE'])
+    limit = min(max(limit, 1), current_app.config['TASKS_MAX_PAGE_SIZE'])
+    
+    fields = None
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown_fields = [field for field in fields if field not in TASK_LIST_FIELDS]
+        if unknown_fields:
+            return jsonify({
+                'success': False,
+                'message': f'Неизвестные поля: {", ".join(unknown_fields)}'
+            }), 400
+    
     # Показываем все задачи
     query = Task.query
     if assigned_to:
@@ -29,41 +139,85 @@ def get_tasks():
     if priority:
         query = query.filter(Task.priority == priority)
     
-    if search:
+    # Полнотекстовый поиск возвращает ID задач в порядке релевантности
+    ranked_ids = search_task_ids(search) if search else None
+    
+    if search and ranked_ids is None:
         search_term = f'%{search}%'
-        # Поиск по названию, описанию задачи и имени пользователя
-        # Используем outerjoin для поиска по имени пользователя, даже если задача не назначена
-        query = query.outerjoin(Assignment).outerjoin(User, Assignment.assigned_to == User.id).filter(
+        # Поиск по названию, описанию задачи и имени пользователя.
+        # Имя исполнителя проверяется подзапросом, а не JOIN + DISTINCT:
+        # PostgreSQL не умеет сравнивать столбцы json в DISTINCT
+        assignee_matches = db.session.query(Assignment.task_id).join(
+            User, Assignment.assigned_to == User.id
+        ).filter(User.name.ilike(search_term))
+        query = query.filter(
             db.or_(
                 Task.title.ilike(search_term),
                 Task.description.ilike(search_term),
-                User.name.ilike(search_term)
+                Task.id.in_(assignee_matches)
             )
-        ).distinct()
-    
-    tasks = query.all()
-    
-    # Формируем данные с assignments и пользователями
-    tasks_data = []
-    for task in tasks:
-        task_dict = task.to_dict()
-        # Добавляем assignments с информацией о пользователях
-        assignments_data = []
-        for assignment in task.assignments:
-            assignment_dict = assignment.to_dict()
-            if assignment.assigned_to:
-                user = User.query.get(assignment.assigned_to)
-                if user:
-                    assignment_dict['assigned_to_user'] = user.to_dict()
-            assignments_data.append(assignment_dict)
-        task_dict['assignments'] = assignments_data
-        # Добавляем теги
-        task_dict['tags'] = [tag.to_dict() for tag in task.tags]
-        tasks_data.append(task_dict)
+        )
+    
+    if ranked_ids is not None:
+        # Keyset-пагинация по позиции в ранжированном списке
+        position = 0
+        if cursor:
+            try:
+                position = _decode_rank_cursor(cursor)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'Некорректный курсор'
+                }), 400
+        # В запрос попадает только окно из limit + 1 ID; если фильтры
+        # отсеяли часть окна, берем следующее
+        tasks = []
+        ranks = {}
+        while len(tasks) <= limit and position < len(ranked_ids):
+            window_ids = ranked_ids[position:position + limit + 1]
+            window_ranks = {task_id: rank for rank, task_id in enumerate(window_ids, start=position)}
+            ranks.update(window_ranks)
+            tasks.extend(query.filter(Task.id.in_(window_ids)).options(
+                *_task_loader_options(fields)
+            ).order_by(db.case(window_ranks, value=Task.id)).limit(limit + 1 - len(tasks)).all())
+            position += len(window_ids)
+    else:
+        # Keyset-пагинация по (created_at, id): от новых задач к старым
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = _decode_cursor(cursor)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'Некорректный курсор'
+                }), 400
+            query = query.filter(
+                db.or_(
+                    Task.created_at < cursor_created_at,
+                    db.and_(Task.created_at == cursor_created_at, Task.id < cursor_id)
+                )
+            )
+        
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        tasks = query.options(*_task_loader_options(fields)).order_by(
+            Task.created_at.desc(), Task.id.desc()
+        ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        if ranked_ids is not None:
+            next_cursor = _encode_rank_cursor(ranks[tasks[-1].id] + 1)
+        else:
+            next_cursor = _encode_cursor(tasks[-1])
+    
+    # Формируем данные с assignments и пользователями (теги уже в to_dict)
+    tasks_data = [_serialize_task_with_assignments(task, fields) for task in tasks]
     
     return jsonify({
         'success': True,
-        'data': tasks_data
+        'data': tasks_data,
+        'next_cursor': next_cursor
     }), 200
 
 @tasks_bp.route('', methods=['POST'])
@@ -147,34 +301,122 @@ def create_task():
         'message': 'Задача успешно создана'
     }), 201
 
+@tasks_bp.route('/assign-batch', methods=['POST'])
+def assign_tasks_batch_endpoint():
+    """Массово назначить задачи (оптимальное распределение по команде)"""
+    user = User.query.filter_by(role='manager').first()
+    user_id = user.id if user else 1
+    
+    data = request.get_json(silent=True) or {}
+    task_ids = data.get('task_ids')
+    if task_ids is None:
+        # По умолчанию назначаем все ожидающие задачи
+        task_ids = [row[0] for row in Task.query.filter_by(status='pending').with_entities(Task.id).all()]
+    elif not isinstance(task_ids, list) or not all(isinstance(t, int) for t in task_ids):
+        return jsonify({
+            'success': False,
+            'message': 'task_ids должен быть списком ID задач'
+        }), 400
+    
+    assignments, unassigned_task_ids, skipped_task_ids = assign_tasks_batch(task_ids, user_id)
+    
+    tasks_by_id = {
+        task.id: task for task in Task.query.filter(
+            Task.id.in_([a.task_id for a in assignments])
+        ).all()
+    } if assignments else {}
+    
+    for assignment in assignments:
+        task = tasks_by_id[assignment.task_id]
+        create_task_history_entry(
+            task_id=task.id,
+            user_id=user_id,
+            action='assigned',
+            field_name='status',
+            old_value='pending',
+            new_value='assigned'
+        )
+        if assignment.assigned_to != user_id:
+            notification = Notification(
+                user_id=assignment.assigned_to,
+                type='task_assigned',
+                title='Вам назначена новая задача',
+                message=f'Задача "{task.title}" назначена вам',
+                related_task_id=task.id,
+                is_read=False
+            )
+            db.session.add(notification)
+    
+    # Сериализуем до коммита, чтобы не перечитывать назначения после expire
+    assignments_data = [a.to_dict() for a in assignments]
+    
+    # Все назначения, загруженность, история и уведомления - одной транзакцией
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'assignments': assignments_data,
+            'unassigned_task_ids': unassigned_task_ids,
+            'skipped_task_ids': skipped_task_ids
+        },
+        'message': f'Назначено задач: {len(assignments)}'
+    }), 200
+
 @tasks_bp.route('/<int:task_id>', methods=['GET'])
 def get_task(task_id):
     """Получить задачу по ID"""
-    task = Task.query.get_or_404(task_id)
+    task = Task.query.options(*_task_loader_options()).filter(Task.id == task_id).first_or_404()
     
-    task_dict = task.to_dict()
-    # Добавляем assignments с информацией о пользователях
-    assignments_data = []
-    for assignment in task.assignments:
-        assignment_dict = assignment.to_dict()
-        if assignment.assigned_to:
-            user = User.query.get(assignment.assigned_to)
-            if user:
-                assignment_dict['assigned_to_user'] = user.to_dict()
-        assignments_data.append(assignment_dict)
-    task_dict['assignments'] = assignments_data
-    # Добавляем теги
-    task_dict['tags'] = [tag.to_dict() for tag in task.tags]
+    task_dict = _serialize_task_with_assignments(task)
     
     return jsonify({
         'success': True,
         'data': task_dict
     }), 200
 
+def _sync_assignment_statuses(task_id, new_status, user):
+    """
+    Перенести новый статус задачи на ее назначения
+
+    Загруженность исполнителей пересчитывается через set_assignment_status,
+    связи Team DNA - только для пар, разделяющих задачу.
+
+    Args:
+        task_id: ID задачи
+        new_status: Новый статус задачи
+        user: Пользователь, меняющий статус (сотрудник - только свое
+            назначение, менеджер - все назначения задачи)
+    """
+    if user.role == 'employee':
+        assignments = Assignment.query.filter_by(task_id=task_id, assigned_to=user.id).all()
+    else:
+        assignments = Assignment.query.filter(
+            Assignment.task_id == task_id,
+            Assignment.status != 'cancelled'
+        ).all()
+    completed_by = []
+    reopened_by = []
+    for assignment in assignments:
+        if assignment.status != new_status:
+            if new_status == 'completed':
+                completed_by.append(assignment.assigned_to)
+            elif assignment.status == 'completed':
+                reopened_by.append(assignment.assigned_to)
+            set_assignment_status(assignment, new_status)
+    
+    if completed_by:
+        update_connections_for_task(task_id, completed_by)
+    if reopened_by:
+        update_connections_for_task(task_id, reopened_by, completed=False)
+
 @tasks_bp.route('/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
     """Обновить задачу"""
     task = Task.query.get_or_404(task_id)
+    user = User.query.filter_by(role='manager').first()
+    user_id = user.id if user else 1
+    user = User.query.get(user_id)
     # Без авторизации - разрешаем все изменения
     
     schema = TaskSchema()
@@ -215,6 +457,10 @@ def update_task(task_id):
             new_data[key] = value
             setattr(task, key, value)
     
+    # Смена статуса переносится на назначения с пересчетом загруженности
+    if 'status' in new_data and old_data['status'] != new_data['status']:
+        _sync_assignment_statuses(task_id, new_data['status'], user)
+    
     # Отслеживаем изменения
     track_task_update(task, user_id, old_data, new_data)
     
@@ -276,6 +522,9 @@ def delete_task(task_id):
         action='deleted'
     )
     
+    # Назначения удаляются каскадно - освобождаем загруженность исполнителей
+    release_task_workload(task_id)
+    
     db.session.delete(task)
     db.session.commit()
     
@@ -379,12 +628,7 @@ def update_task_status(task_id):
     old_status = task.status
     task.status = new_status
     
-    # Обновляем статус assignment
-    assignment = Assignment.query.filter_by(task_id=task_id, assigned_to=user_id).first()
-    if assignment:
-        assignment.status = new_status
-        if new_status == 'completed':
-            assignment.completed_at = datetime.utcnow()
+    _sync_assignment_statuses(task_id, new_status, user)
     
     # Создаем запись в истории
     create_task_history_entry(
@@ -5,7 +5,9 @@ from flask import Blueprint, request, jsonify
 
 from app.database import db
 from app.models import User, UserCompetency, WorkPreference
-from app.services.analytics_service import get_employee_metrics
+from app.services.analytics_service import get_employee_metrics, get_employees_metrics
+from app.services.skill_matcher import invalidate_skill_matcher
+from app.services.skill_index import add_competency_to_index, remove_competency_from_index
 
 team_bp = Blueprint('team', __name__)
 
@@ -17,16 +19,23 @@ def get_team():
     
     employees = User.query.filter_by(role='employee').all()
     
+    # Компетенции и метрики всех сотрудников - по одному запросу на команду
+    skills_by_user = {}
+    for competency in UserCompetency.query.filter(
+        UserCompetency.user_id.in_([e.id for e in employees])
+    ).order_by(UserCompetency.id).all():
+        skills_by_user.setdefault(competency.user_id, []).append(competency.skill_name)
+    team_metrics = get_employees_metrics(employees)
+    
     team_data = []
     for employee in employees:
         employee_dict = employee.to_dict()
         
         # Добавляем компетенции
-        competencies = UserCompetency.query.filter_by(user_id=employee.id).all()
-        employee_dict['skills'] = ', '.join([c.skill_name for c in competencies]) if competencies else ''
+        employee_dict['skills'] = ', '.join(skills_by_user.get(employee.id, []))
         
         # Добавляем метрики
-        metrics = get_employee_metrics(employee.id)
+        metrics = team_metrics.get(employee.id)
         if metrics:
             employee_dict.update({
                 'satisfaction': metrics.get('satisfaction', 0),
@@ -124,6 +133,8 @@ def add_user_competency(user_id):
     
     db.session.add(competency)
     db.session.commit()
+    invalidate_skill_matcher()
+    add_competency_to_index(competency)
     
     return jsonify({
         'success': True,
@@ -142,8 +153,11 @@ def delete_user_competency(user_id, competency_id):
         user_id=user_id
     ).first_or_404()
     
+    skill_name = competency.skill_name
     db.session.delete(competency)
     db.session.commit()
+    invalidate_skill_matcher()
+    remove_competency_from_index(competency_id, skill_name)
     
     return jsonify({
         'success': True,
@@ -6,15 +6,38 @@ from flask import Blueprint, request, jsonify
 from app.database import db
 from app.models import User, TeamConnection
 from app.services.team_dna_analyzer import (
+    HIDDEN_EXPERT_MAX_CONNECTIONS,
+    HIDDEN_EXPERT_MIN_EFFICIENCY,
     calculate_connection_strength,
     get_strong_connections,
+    count_hidden_experts,
     find_hidden_experts,
     calculate_team_synergy,
-    find_dream_teams
+    find_dream_teams,
+    get_connection_graph
 )
+from app.services.user_resolver import resolve_users, user_display_name
 
 team_dna_bp = Blueprint('team_dna', __name__)
 
+HIDDEN_EXPERTS_PAGE_SIZE = 50
+HIDDEN_EXPERTS_MAX_PAGE_SIZE = 200
+GRAPH_FORMATS = ('objects', 'columnar')
+
+
+def _optional_arg(name, cast):
+    """
+    Необязательный query-параметр
+
+    В отличие от request.args.get(..., type=...) некорректное значение
+    не заменяется молча на None, а приводит к ValueError.
+
+    Returns:
+        Значение, приведенное через cast, или None, если параметр не указан
+    """
+    value = request.args.get(name)
+    return None if value is None else cast(value)
+
 
 @team_dna_bp.route('/stats', methods=['GET'])
 def get_team_dna_stats():
@@ -27,7 +50,7 @@ def get_team_dna_stats():
     ).count()
     
     # Скрытые эксперты
-    hidden_experts = find_hidden_experts()
+    hidden_experts_count = count_hidden_experts()
     
     # Синергия команды (средняя по всем парам)
     employees = User.query.filter_by(role='employee').all()
@@ -41,7 +64,7 @@ def get_team_dna_stats():
         'success': True,
         'data': {
             'strong_connections': all_connections,
-            'hidden_experts': len(hidden_experts),
+            'hidden_experts': hidden_experts_count,
             'team_synergy': round(team_synergy, 1),
             'dream_teams': len(dream_teams),
         }
@@ -50,35 +73,77 @@ def get_team_dna_stats():
 
 @team_dna_bp.route('/connections', methods=['GET'])
 def get_connections():
-    """Получить граф связей команды"""
+    """
+    Получить граф связей команды
+    
+    Query параметры:
+        min_strength: Минимальная сила связи (0-1)
+        top_k: Не более top_k сильнейших связей на сотрудника
+        user_id: Центр эго-сети
+        radius: Радиус эго-сети (по умолчанию 1)
+        format: objects (по умолчанию) или columnar - параллельные массивы
+    """
     # Без авторизации - просто возвращаем связи
     
-    # Получить все связи
-    connections = TeamConnection.query.all()
+    try:
+        min_strength = _optional_arg('min_strength', float)
+        top_k = _optional_arg('top_k', int)
+        center_user_id = _optional_arg('user_id', int)
+        radius = int(request.args.get('radius', 1))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Некорректные параметры'
+        }), 400
+    response_format = request.args.get('format', 'objects')
     
-    # Получить всех сотрудников
-    employees = User.query.filter_by(role='employee').all()
+    if (top_k is not None and top_k < 1) or radius < 1 or response_format not in GRAPH_FORMATS:
+        return jsonify({
+            'success': False,
+            'message': 'Некорректные параметры'
+        }), 400
     
-    nodes = []
-    edges = []
+    graph = get_connection_graph(
+        min_strength=min_strength,
+        top_k=top_k,
+        center_user_id=center_user_id,
+        radius=radius
+    )
     
-    # Создаем узлы (сотрудники)
-    for emp in employees:
-        nodes.append({
-            'id': str(emp.id),
-            'name': emp.name,
-            'role': emp.role,
-            'efficiency': emp.efficiency,
-        })
+    if response_format == 'columnar':
+        return jsonify({
+            'success': True,
+            'data': graph
+        }), 200
     
-    # Создаем ребра (связи)
-    for conn in connections:
-        edges.append({
-            'source': str(conn.user1_id),
-            'target': str(conn.user2_id),
-            'strength': float(conn.connection_strength),
-            'type': conn.connection_type,
-        })
+    nodes_columns = graph['nodes']
+    edges_columns = graph['edges']
+    
+    # Узлы (сотрудники)
+    nodes = [
+        {
+            'id': str(user_id),
+            'name': name,
+            'role': role,
+            'efficiency': efficiency,
+        }
+        for user_id, name, role, efficiency in zip(
+            nodes_columns['id'], nodes_columns['name'], nodes_columns['role'], nodes_columns['efficiency']
+        )
+    ]
+    
+    # Ребра (связи)
+    edges = [
+        {
+            'source': str(source),
+            'target': str(target),
+            'strength': strength,
+            'type': connection_type,
+        }
+        for source, target, strength, connection_type in zip(
+            edges_columns['source'], edges_columns['target'], edges_columns['strength'], edges_columns['type']
+        )
+    ]
     
     return jsonify({
         'success': True,
@@ -99,15 +164,18 @@ def get_user_connections(user_id):
         (TeamConnection.connection_strength >= 0.3)
     ).all()
     
+    # Все упомянутые пользователи загружаются одним запросом
+    users = resolve_users(
+        [conn.user1_id for conn in connections] + [conn.user2_id for conn in connections]
+    )
+    
     result = []
     for conn in connections:
-        other_user_id = conn.user2_id if conn.user1_id == user_id else conn.user1_id
-        other_user = User.query.get(other_user_id)
         result.append({
             'user1_id': conn.user1_id,
             'user2_id': conn.user2_id,
-            'user1_name': User.query.get(conn.user1_id).name if User.query.get(conn.user1_id) else f'User {conn.user1_id}',
-            'user2_name': User.query.get(conn.user2_id).name if User.query.get(conn.user2_id) else f'User {conn.user2_id}',
+            'user1_name': user_display_name(users, conn.user1_id),
+            'user2_name': user_display_name(users, conn.user2_id),
             'connection_strength': float(conn.connection_strength),
             'connection_type': conn.connection_type,
             'synergy_score': float(conn.synergy_score) if conn.synergy_score else 0.0,
@@ -124,11 +192,38 @@ def get_hidden_experts():
     """Получить список скрытых экспертов"""
     # Без авторизации - просто возвращаем скрытых экспертов
     
-    hidden_experts = find_hidden_experts()
+    try:
+        min_efficiency = int(request.args.get('min_efficiency', HIDDEN_EXPERT_MIN_EFFICIENCY))
+        max_connections = int(request.args.get('max_connections', HIDDEN_EXPERT_MAX_CONNECTIONS))
+        limit = int(request.args.get('limit', HIDDEN_EXPERTS_PAGE_SIZE))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Некорректные параметры'
+        }), 400
+    
+    if limit < 1 or offset < 0:
+        return jsonify({
+            'success': False,
+            'message': 'Некорректные параметры'
+        }), 400
+    limit = min(limit, HIDDEN_EXPERTS_MAX_PAGE_SIZE)
+    
+    hidden_experts = find_hidden_experts(
+        min_efficiency=min_efficiency,
+        max_connections=max_connections,
+        limit=limit,
+        offset=offset
+    )
+    total = count_hidden_experts(min_efficiency=min_efficiency, max_connections=max_connections)
     
     return jsonify({
         'success': True,
-        'data': hidden_experts
+        'data': hidden_experts,
+        'total': total,
+        'limit': limit,
+        'offset': offset
     }), 200
 
 
@@ -137,8 +232,32 @@ def get_dream_teams():
     """Получить оптимальные команды (dream teams)"""
     # Без авторизации - просто возвращаем dream teams
     
-    min_synergy = float(request.args.get('min_synergy', 8.0))
-    dream_teams = find_dream_teams(min_synergy=min_synergy)
+    try:
+        min_synergy = float(request.args.get('min_synergy', 8.0))
+        min_team_size = int(request.args.get('min_size', 2))
+        max_team_size = int(request.args.get('max_size', 5))
+        limit = int(request.args.get('limit', 5))
+        time_budget = _optional_arg('time_budget', float)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Некорректные параметры поиска'
+        }), 400
+    
+    if (min_team_size < 2 or max_team_size < min_team_size or limit < 1
+            or (time_budget is not None and time_budget <= 0)):
+        return jsonify({
+            'success': False,
+            'message': 'Некорректные параметры поиска'
+        }), 400
+    
+    dream_teams = find_dream_teams(
+        min_team_size=min_team_size,
+        max_team_size=max_team_size,
+        min_synergy=min_synergy,
+        limit=limit,
+        time_budget=time_budget
+    )
     
     return jsonify({
         'success': True,
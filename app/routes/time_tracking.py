@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 from app.database import db
 from app.models import Task, TimeTracking, User
+from app.services.user_resolver import resolve_users
 
 time_tracking_bp = Blueprint('time_tracking', __name__)
 
@@ -12,6 +13,8 @@ def get_task_time_tracking(task_id):
     task = Task.query.get_or_404(task_id)
     
     entries = TimeTracking.query.filter_by(task_id=task_id).order_by(TimeTracking.created_at.desc()).all()
+    # Пользователи записей загружаются одним запросом
+    resolve_users(entry.user_id for entry in entries)
     
     total_minutes = sum(entry.duration_minutes or 0 for entry in entries)
     
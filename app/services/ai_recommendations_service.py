@@ -2,10 +2,19 @@
 Сервис для генерации рекомендаций ИИ
 """
 from datetime import datetime, timedelta
+from flask import current_app
 from app.database import db
-from app.models import User, Task, Assignment
+from app.models import User, Task, Assignment, UserCompetency
 from app.services.analytics_service import get_employee_metrics
-from app.services.competence_analyzer import get_competence_score
+from app.services.competence_analyzer import score_user_skills
+from app.services.skill_matcher import extract_task_skills
+from app.services.snapshot_cache import get_snapshot, register_snapshot_invalidation
+
+
+RECOMMENDATIONS_SNAPSHOT_KEY = 'ai_recommendations'
+
+# Снимок рекомендаций устаревает при записи задач, назначений, компетенций и сотрудников
+register_snapshot_invalidation(RECOMMENDATIONS_SNAPSHOT_KEY, (Task, Assignment, UserCompetency, User))
 
 
 def generate_recommendations():
@@ -47,21 +56,21 @@ def generate_recommendations():
         })
     
     # 2. Анализ просроченных задач
-    overdue_tasks = Task.query.filter(
+    overdue_count = Task.query.filter(
         Task.deadline < datetime.utcnow(),
         Task.status.in_(['assigned', 'in_progress'])
-    ).all()
+    ).count()
     
-    if overdue_tasks:
+    if overdue_count:
         recommendations.append({
             'id': 'extend_deadlines',
             'title': 'Оптимизировать сроки выполнения',
-            'description': f'Обнаружено {len(overdue_tasks)} просроченных задач. Рекомендуется пересмотреть сроки или перераспределить ресурсы',
+            'description': f'Обнаружено {overdue_count} просроченных задач. Рекомендуется пересмотреть сроки или перераспределить ресурсы',
             'priority': 'high',
             'applied': False,
             'type': 'deadline_optimization',
             'action_data': {
-                'overdue_count': len(overdue_tasks)
+                'overdue_count': overdue_count
             }
         })
     
@@ -90,27 +99,23 @@ def generate_recommendations():
     # 4. Рекомендации по компетенциям
     unassigned_tasks = Task.query.filter_by(status='pending').all()
     if unassigned_tasks:
+        # Компетенции всех сотрудников одним запросом
+        skills_by_user = {}
+        for competency in UserCompetency.query.filter(
+            UserCompetency.user_id.in_([e.id for e in employees])
+        ).all():
+            skills_by_user.setdefault(competency.user_id, {})[competency.skill_name.lower()] = competency
+        
         for task in unassigned_tasks[:5]:  # Проверяем первые 5
             best_match = None
             best_score = 0
             
+            # Навыки из общего словаря компетенций команды, найденные в описании задачи
+            required_skills = sorted(extract_task_skills(task)) if task.description else []
+            
             for emp in employees:
                 if emp.current_workload < emp.max_workload:
-                    # Получаем компетенции пользователя
-                    from app.models import UserCompetency
-                    user_competencies = UserCompetency.query.filter_by(user_id=emp.id).all()
-                    user_skills = [c.skill_name for c in user_competencies]
-                    
-                    # Используем описание задачи для анализа компетенций
-                    required_skills = []
-                    if task.description:
-                        # Простая логика: извлекаем навыки из описания
-                        # В реальной системе здесь может быть более сложный анализ
-                        description_lower = task.description.lower()
-                        common_skills = ['python', 'javascript', 'react', 'node', 'sql', 'api', 'design', 'ui', 'ux']
-                        required_skills = [skill for skill in common_skills if skill in description_lower]
-                    
-                    score = get_competence_score(emp.id, required_skills)
+                    score = score_user_skills(skills_by_user.get(emp.id, {}), required_skills)
                     if score > best_score:
                         best_score = score
                         best_match = emp
@@ -131,33 +136,43 @@ def generate_recommendations():
                 })
     
     # 5. Рекомендации по оптимизации времени
-    tasks_with_deadlines = Task.query.filter(
+    # Дедлайн менее чем через 3 дня (включая уже прошедшие)
+    tight_deadlines_count = Task.query.filter(
         Task.deadline.isnot(None),
+        Task.deadline < datetime.utcnow() + timedelta(days=3),
         Task.status.in_(['assigned', 'in_progress'])
-    ).all()
+    ).count()
     
-    if tasks_with_deadlines:
-        tight_deadlines = [
-            t for t in tasks_with_deadlines
-            if t.deadline and (t.deadline - datetime.utcnow()).days < 3
-        ]
-        
-        if tight_deadlines:
-            recommendations.append({
-                'id': 'optimize_tight_deadlines',
-                'title': 'Пересмотреть срочные дедлайны',
-                'description': f'Обнаружено {len(tight_deadlines)} задач с дедлайном менее 3 дней. Рекомендуется пересмотреть приоритеты',
-                'priority': 'medium',
-                'applied': False,
-                'type': 'deadline_review',
-                'action_data': {
-                    'tight_deadlines_count': len(tight_deadlines)
-                }
-            })
+    if tight_deadlines_count:
+        recommendations.append({
+            'id': 'optimize_tight_deadlines',
+            'title': 'Пересмотреть срочные дедлайны',
+            'description': f'Обнаружено {tight_deadlines_count} задач с дедлайном менее 3 дней. Рекомендуется пересмотреть приоритеты',
+            'priority': 'medium',
+            'applied': False,
+            'type': 'deadline_review',
+            'action_data': {
+                'tight_deadlines_count': tight_deadlines_count
+            }
+        })
     
     return recommendations
 
 
+def get_recommendations_snapshot():
+    """
+    Получить рекомендации из кэша снимков (или пересчитать)
+    
+    Returns:
+        tuple: (список рекомендаций, время генерации снимка)
+    """
+    return get_snapshot(
+        RECOMMENDATIONS_SNAPSHOT_KEY,
+        current_app.config['RECOMMENDATIONS_CACHE_TTL'],
+        generate_recommendations
+    )
+
+
 def apply_recommendation(recommendation_id, action_data=None):
     """
     Применить рекомендацию
@@ -169,7 +184,7 @@ def apply_recommendation(recommendation_id, action_data=None):
     Returns:
         bool: Успешно ли применена рекомендация
     """
-    recommendations = generate_recommendations()
+    recommendations, _ = get_recommendations_snapshot()
     recommendation = next((r for r in recommendations if r['id'] == recommendation_id), None)
     
     if not recommendation:
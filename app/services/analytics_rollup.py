@@ -0,0 +1,356 @@
+"""
+Дневной rollup аналитики команды (таблица team_daily_stats)
+
+Строка дня хранит счетчики задач, созданных в этот день, по их текущему
+статусу (created, active, completed, overdue) и снимок загруженности
+и эффективности команды. Счетчики обновляются инкрементально: при
+flush сессии изменения задач (создание, смена статуса или дедлайна,
+удаление) превращаются в атомарные UPSERT с приращениями.
+
+Просрочка зависит от времени, поэтому счетчики overdue и снимок
+команды периодически пересчитывает задача планировщика analytics_rollup
+(refresh_rollup, SCHEDULER_ANALYTICS_ROLLUP_INTERVAL). Если планировщик
+не запущен, просрочки и снимок при чтении считаются по tasks и users
+(get_live_overdue, get_current_snapshot).
+Полный пересчет из tasks - backfill_rollup (flask backfill-analytics,
+задача analytics_backfill; выполняется и при первом чтении аналитики).
+"""
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.database import db
+from app.models import User, Task, TeamDailyStats
+
+
+ACTIVE_TASK_STATUSES = ('assigned', 'in_progress')
+COUNTER_COLUMNS = ('tasks_created', 'tasks_active', 'tasks_completed', 'tasks_overdue')
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def _as_date(value):
+    """Дата из значения func.date (SQLite возвращает строку)"""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def task_counters(status, deadline, now):
+    """
+    Вклад одной задачи в счетчики строки дня ее создания
+
+    Returns:
+        dict: колонка счетчика -> 0/1
+    """
+    is_active = status in ACTIVE_TASK_STATUSES
+    return {
+        'tasks_created': 1,
+        'tasks_active': int(is_active),
+        'tasks_completed': int(status == 'completed'),
+        'tasks_overdue': int(is_active and deadline is not None and deadline < now),
+    }
+
+
+def _upsert_day(connection, day, deltas=None, values=None):
+    """
+    Атомарно обновить строку дня, создав ее при необходимости
+
+    Args:
+        connection: Соединение текущей транзакции
+        day: День строки
+        deltas: Приращения счетчиков (колонка -> число)
+        values: Значения, которые нужно записать как есть (снимки)
+    """
+    deltas = {column: value for column, value in (deltas or {}).items() if value}
+    values = values or {}
+    if not deltas and not values:
+        return
+    table = TeamDailyStats.__table__
+    now = datetime.utcnow()
+    updates = {
+        'updated_at': now,
+        **{column: table.c[column] + delta for column, delta in deltas.items()},
+        **values,
+    }
+
+    dialect = connection.dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        # Прочие диалекты: UPDATE, а при отсутствии строки - INSERT
+        if connection.execute(table.update().where(table.c.day == day).values(**updates)).rowcount:
+            return
+
+    row = {column: max(deltas.get(column, 0), 0) for column in COUNTER_COLUMNS}
+    row.update(day=day, updated_at=now, **values)
+    if dialect == 'postgresql':
+        statement = postgresql.insert(table).values(**row).on_conflict_do_update(
+            index_elements=[table.c.day], set_=updates
+        )
+    elif dialect == 'sqlite':
+        statement = sqlite.insert(table).values(**row).on_conflict_do_update(
+            index_elements=[table.c.day], set_=updates
+        )
+    else:
+        statement = table.insert().values(**row)
+    connection.execute(statement)
+
+
+def _previous_values(session, state):
+    """
+    Статус и дедлайн задачи до изменений в текущем flush
+
+    Если атрибут был изменен без предварительной загрузки (например,
+    после commit объект истек), прежнее значение читается из БД.
+    """
+    previous = []
+    for name in ('status', 'deadline'):
+        history = state.attrs[name].history
+        if history.deleted:
+            previous.append(history.deleted[0])
+        elif history.unchanged:
+            previous.append(history.unchanged[0])
+        elif not history.added:
+            previous.append(state.attrs[name].value)
+        else:
+            row = session.connection().execute(
+                db.select(Task.status, Task.deadline).where(Task.id == state.identity[0])
+            ).one()
+            return row.status, row.deadline
+    return tuple(previous)
+
+
+@event.listens_for(Session, 'before_flush', propagate=True)
+def _track_task_changes(session, flush_context, instances):
+    now = datetime.utcnow()
+    deltas_by_day = {}
+
+    def add(day, counters, sign):
+        deltas = deltas_by_day.setdefault(day, dict.fromkeys(COUNTER_COLUMNS, 0))
+        for column, value in counters.items():
+            deltas[column] += sign * value
+
+    with session.no_autoflush:
+        for instance in session.new:
+            if isinstance(instance, Task):
+                # created_at по умолчанию заполняется при INSERT
+                created_at = instance.created_at or now
+                add(created_at.date(), task_counters(instance.status or 'pending', instance.deadline, now), 1)
+
+        for instance in session.dirty:
+            if not isinstance(instance, Task):
+                continue
+            state = inspect(instance)
+            if not (state.attrs.status.history.has_changes() or state.attrs.deadline.history.has_changes()):
+                continue
+            old_status, old_deadline = _previous_values(session, state)
+            day = (instance.created_at or now).date()
+            add(day, task_counters(old_status, old_deadline, now), -1)
+            add(day, task_counters(instance.status, instance.deadline, now), 1)
+
+        for instance in session.deleted:
+            if isinstance(instance, Task) and instance.created_at is not None:
+                add(instance.created_at.date(), task_counters(instance.status, instance.deadline, now), -1)
+
+    if deltas_by_day:
+        connection = session.connection()
+        for day, deltas in deltas_by_day.items():
+            _upsert_day(connection, day, deltas)
+
+
+def _team_snapshot():
+    """Средняя загруженность и эффективность сотрудников одним запросом"""
+    total_load, total_max, avg_efficiency = db.session.query(
+        db.func.sum(User.current_workload),
+        db.func.sum(User.max_workload),
+        db.func.avg(User.efficiency)
+    ).filter(User.role == 'employee').one()
+    workload_percent = (total_load / total_max * 100) if total_max else 0.0
+    return float(workload_percent or 0.0), float(avg_efficiency or 0.0)
+
+
+def _overdue_by_day(now, start_day=None):
+    """Текущее число просроченных задач по дням создания"""
+    query = db.session.query(
+        db.func.date(Task.created_at), db.func.count(Task.id)
+    ).filter(
+        Task.status.in_(ACTIVE_TASK_STATUSES),
+        Task.deadline < now
+    )
+    if start_day is not None:
+        query = query.filter(Task.created_at >= datetime.combine(start_day, datetime.min.time()))
+    rows = query.group_by(db.func.date(Task.created_at)).all()
+    return {_as_date(day): count for day, count in rows if day is not None}
+
+
+def refresh_rollup(now=None):
+    """
+    Пересчитать зависящие от времени поля rollup
+
+    Записывает фактическое значение tasks_overdue во все строки, где оно
+    изменилось (а не разницу с прочитанным: повторный или параллельный
+    пересчет не удваивает ее), и снимок загруженности/эффективности в
+    строке текущего дня. Коммит выполняет вызывающий код.
+    """
+    now = now or datetime.utcnow()
+    overdue = _overdue_by_day(now)
+
+    connection = db.session.connection()
+    stored = dict(db.session.query(TeamDailyStats.day, TeamDailyStats.tasks_overdue).filter(
+        TeamDailyStats.tasks_overdue != 0
+    ).all())
+    for day in set(stored) | set(overdue):
+        if overdue.get(day, 0) != stored.get(day, 0):
+            _upsert_day(connection, day, values={'tasks_overdue': overdue.get(day, 0)})
+
+    workload_percent, avg_efficiency = _team_snapshot()
+    _upsert_day(connection, now.date(), values={
+        'workload_percent': workload_percent,
+        'avg_efficiency': avg_efficiency,
+    })
+
+
+def backfill_rollup():
+    """
+    Полностью пересчитать счетчики rollup из таблицы tasks
+
+    Снимки загруженности и эффективности прошлых дней восстановить
+    нельзя - они сохраняются, для текущего дня снимок обновляется.
+
+    Returns:
+        dict: Количество дней с задачами
+    """
+    now = datetime.utcnow()
+    is_active = Task.status.in_(ACTIVE_TASK_STATUSES)
+    created_day = db.func.date(Task.created_at)
+    rows = db.session.query(
+        created_day,
+        db.func.count(Task.id),
+        db.func.count(Task.id).filter(is_active),
+        db.func.count(Task.id).filter(Task.status == 'completed'),
+        db.func.count(Task.id).filter(is_active, Task.deadline < now),
+    ).filter(Task.created_at.isnot(None)).group_by(created_day).all()
+
+    table = TeamDailyStats.__table__
+    db.session.execute(table.update().values(**dict.fromkeys(COUNTER_COLUMNS, 0)))
+    existing = {row[0] for row in db.session.query(TeamDailyStats.day).all()}
+    for day, created, active, completed, overdue in rows:
+        counters = {
+            'tasks_created': created,
+            'tasks_active': active,
+            'tasks_completed': completed,
+            'tasks_overdue': overdue,
+        }
+        day = _as_date(day)
+        if day in existing:
+            db.session.execute(table.update().where(table.c.day == day).values(updated_at=now, **counters))
+        else:
+            db.session.execute(table.insert().values(day=day, updated_at=now, **counters))
+
+    refresh_rollup(now)
+    db.session.commit()
+    return {'days': len(rows)}
+
+
+def get_period_totals(start_day):
+    """Сумма счетчиков rollup начиная с start_day (один запрос)"""
+    row = db.session.query(
+        *[db.func.coalesce(db.func.sum(getattr(TeamDailyStats, column)), 0) for column in COUNTER_COLUMNS]
+    ).filter(TeamDailyStats.day >= start_day).one()
+    return dict(zip(COUNTER_COLUMNS, (int(value) for value in row)))
+
+
+def get_current_snapshot(today=None, live=False):
+    """
+    Загруженность и эффективность команды на сегодня
+
+    Берется снимок из строки текущего дня; если его нет (планировщик еще
+    не обновлял rollup сегодня) или запрошены актуальные значения (live),
+    они считаются одним агрегатным запросом по users.
+    """
+    if live:
+        return _team_snapshot()
+    today = today or datetime.utcnow().date()
+    row = db.session.query(TeamDailyStats.workload_percent, TeamDailyStats.avg_efficiency).filter(
+        TeamDailyStats.day == today,
+        TeamDailyStats.workload_percent.isnot(None)
+    ).first()
+    if row is None:
+        return _team_snapshot()
+    return row[0], row[1]
+
+
+def get_live_overdue(start_day, now=None):
+    """Просроченные задачи, созданные с start_day, по дням создания (один запрос)"""
+    return _overdue_by_day(now or datetime.utcnow(), start_day)
+
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def get_time_series(start_day, end_day, granularity='day', overdue_by_day=None):
+    """
+    Временной ряд rollup с группировкой по дням, неделям или месяцам
+
+    Args:
+        start_day: Первый день периода
+        end_day: Последний день периода
+        granularity: day, week или month
+        overdue_by_day: Актуальные просрочки по дням (вместо tasks_overdue
+            из rollup)
+
+    Returns:
+        list: Точки ряда по возрастанию периода (пустые периоды - нули)
+    """
+    rows = TeamDailyStats.query.filter(
+        TeamDailyStats.day >= start_day,
+        TeamDailyStats.day <= end_day
+    ).order_by(TeamDailyStats.day).all()
+    by_day = {row.day: row for row in rows}
+
+    buckets = {}
+    day = start_day
+    while day <= end_day:
+        bucket = buckets.setdefault(_period_start(day, granularity), {
+            'counters': dict.fromkeys(COUNTER_COLUMNS, 0),
+            'workload': [],
+            'efficiency': [],
+        })
+        row = by_day.get(day)
+        if row is not None:
+            for column in COUNTER_COLUMNS:
+                bucket['counters'][column] += getattr(row, column)
+            if row.workload_percent is not None:
+                bucket['workload'].append(row.workload_percent)
+            if row.avg_efficiency is not None:
+                bucket['efficiency'].append(row.avg_efficiency)
+        if overdue_by_day is not None:
+            stored_overdue = row.tasks_overdue if row is not None else 0
+            bucket['counters']['tasks_overdue'] += overdue_by_day.get(day, 0) - stored_overdue
+        day += timedelta(days=1)
+
+    series = []
+    for period_start in sorted(buckets):
+        bucket = buckets[period_start]
+        counters = bucket['counters']
+        series.append({
+            'period_start': period_start.isoformat(),
+            'tasks': {
+                'total': counters['tasks_created'],
+                'active': counters['tasks_active'],
+                'completed': counters['tasks_completed'],
+                'overdue': counters['tasks_overdue'],
+            },
+            'workload': {
+                'average': round(sum(bucket['workload']) / len(bucket['workload']), 1) if bucket['workload'] else None,
+            },
+            'efficiency': {
+                'average': round(sum(bucket['efficiency']) / len(bucket['efficiency']), 1) if bucket['efficiency'] else None,
+            },
+        })
+    return series
@@ -4,56 +4,66 @@
 from datetime import datetime, timedelta
 from app.database import db
 from app.models import User, Task, Assignment, ModelMetrics
+from app.services.analytics_rollup import (
+    get_current_snapshot,
+    get_live_overdue,
+    get_period_totals,
+    get_time_series
+)
+from app.services.scheduler import job_interval, last_run_started_at, run_job
 
 
-def get_team_analytics(days=30):
+def _ensure_rollup():
+    """Построить rollup при первом чтении (если полный пересчет еще не выполнялся)"""
+    if last_run_started_at('analytics_backfill') is None:
+        # Под блокировкой задачи: параллельный запрос не строит rollup повторно
+        run_job('analytics_backfill', force=True)
+
+
+def _rollup_is_fresh(now):
+    """Обновлял ли планировщик просрочки rollup в последние два интервала"""
+    interval = job_interval('analytics_rollup')
+    last_started = last_run_started_at('analytics_rollup')
+    return bool(interval) and last_started is not None and last_started > now - timedelta(seconds=2 * interval)
+
+
+def get_team_analytics(days=30, granularity=None):
     """
     Получить аналитику команды за период
     
+    Счетчики берутся суммой по строкам дневного rollup (team_daily_stats)
+    за последние days дней (включая текущий), загруженность и
+    эффективность - из снимка текущего дня. Просрочки и снимок обновляет
+    планировщик (задача analytics_rollup); если он не запущен, они
+    считаются при запросе. При первом чтении rollup строится из tasks.
+    
     Args:
         days: Количество дней для анализа
+        granularity: day, week или month - добавить временной ряд (series)
     
     Returns:
         dict: Словарь с аналитикой
     """
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    _ensure_rollup()
     
-    # Статистика задач
-    total_tasks = Task.query.filter(Task.created_at >= cutoff_date).count()
-    from sqlalchemy import or_
-    active_tasks = Task.query.filter(
-        or_(Task.status == 'assigned', Task.status == 'in_progress'),
-        Task.created_at >= cutoff_date
-    ).count()
-    completed_tasks = Task.query.filter(
-        Task.status == 'completed',
-        Task.created_at >= cutoff_date
-    ).count()
-    overdue_tasks = Task.query.filter(
-        Task.deadline < datetime.utcnow(),
-        or_(Task.status == 'assigned', Task.status == 'in_progress'),
-        Task.created_at >= cutoff_date
-    ).count()
-    
-    # Средняя загруженность
-    employees = User.query.filter_by(role='employee').all()
-    avg_load = 0.0
-    if employees:
-        total_load = sum(e.current_workload for e in employees)
-        total_max = sum(e.max_workload for e in employees)
-        avg_load = (total_load / total_max * 100) if total_max > 0 else 0.0
-    
-    # Эффективность команды
-    avg_efficiency = 0.0
-    if employees:
-        avg_efficiency = sum(e.efficiency for e in employees) / len(employees)
-    
-    return {
+    now = datetime.utcnow()
+    today = now.date()
+    start_day = today - timedelta(days=days - 1)
+    totals = get_period_totals(start_day)
+    rollup_is_fresh = _rollup_is_fresh(now)
+    avg_load, avg_efficiency = get_current_snapshot(today, live=not rollup_is_fresh)
+    
+    overdue_by_day = None
+    if not rollup_is_fresh:
+        overdue_by_day = get_live_overdue(start_day, now)
+        totals['tasks_overdue'] = sum(overdue_by_day.values())
+    
+    analytics = {
         'tasks': {
-            'total': total_tasks,
-            'active': active_tasks,
-            'completed': completed_tasks,
-            'overdue': overdue_tasks,
+            'total': totals['tasks_created'],
+            'active': totals['tasks_active'],
+            'completed': totals['tasks_completed'],
+            'overdue': totals['tasks_overdue'],
         },
         'workload': {
             'average': round(avg_load, 1),
@@ -63,6 +73,12 @@ def get_team_analytics(days=30):
         },
         'period_days': days,
     }
+    
+    if granularity:
+        analytics['granularity'] = granularity
+        analytics['series'] = get_time_series(start_day, today, granularity, overdue_by_day)
+    
+    return analytics
 
 
 def get_employee_metrics(user_id, days=30):
@@ -80,32 +96,56 @@ def get_employee_metrics(user_id, days=30):
     if not user:
         return None
     
+    return get_employees_metrics([user], days=days)[user.id]
+
+
+def get_employees_metrics(users, days=30):
+    """
+    Получить метрики эффективности для списка сотрудников
+    
+    Счетчики назначений за период считаются одним GROUP BY запросом
+    по assignments для всех сотрудников сразу.
+    
+    Args:
+        users: Список объектов User
+        days: Период анализа в днях
+    
+    Returns:
+        dict: user_id -> метрики сотрудника
+    """
+    user_ids = [user.id for user in users]
     cutoff_date = datetime.utcnow() - timedelta(days=days)
     
-    # Задачи за период
-    assignments = Assignment.query.filter(
-        Assignment.assigned_to == user_id,
-        Assignment.assigned_at >= cutoff_date
-    ).all()
-    
-    completed = [a for a in assignments if a.status == 'completed']
-    in_progress = [a for a in assignments if a.status == 'in_progress']
-    
-    # Количество проектов (упрощенно: уникальные задачи)
-    projects = len(set(a.task_id for a in assignments))
-    
-    return {
-        'user_id': user_id,
-        'name': user.name,
-        'satisfaction': user.satisfaction or 0,
-        'efficiency': user.efficiency or 0,
-        'projects': projects,
-        'avg_hours_per_month': user.avg_hours_per_month or 0,
-        'salary': str(user.salary) if user.salary else '0',
-        'tasks_completed': len(completed),
-        'tasks_in_progress': len(in_progress),
-        'current_load_percent': round((user.current_workload / user.max_workload * 100) if user.max_workload > 0 else 0, 1),
-    }
+    # Задачи за период (проекты - упрощенно: уникальные задачи)
+    counters = {}
+    if user_ids:
+        rows = db.session.query(
+            Assignment.assigned_to,
+            db.func.count(Assignment.id).filter(Assignment.status == 'completed'),
+            db.func.count(Assignment.id).filter(Assignment.status == 'in_progress'),
+            db.func.count(db.distinct(Assignment.task_id))
+        ).filter(
+            Assignment.assigned_to.in_(user_ids),
+            Assignment.assigned_at >= cutoff_date
+        ).group_by(Assignment.assigned_to).all()
+        counters = {row[0]: row[1:] for row in rows}
+    
+    metrics = {}
+    for user in users:
+        completed, in_progress, projects = counters.get(user.id, (0, 0, 0))
+        metrics[user.id] = {
+            'user_id': user.id,
+            'name': user.name,
+            'satisfaction': user.satisfaction or 0,
+            'efficiency': user.efficiency or 0,
+            'projects': projects,
+            'avg_hours_per_month': user.avg_hours_per_month or 0,
+            'salary': str(user.salary) if user.salary else '0',
+            'tasks_completed': completed,
+            'tasks_in_progress': in_progress,
+            'current_load_percent': round((user.current_workload / user.max_workload * 100) if user.max_workload > 0 else 0, 1),
+        }
+    return metrics
 
 
 def get_model_metrics():
@@ -3,6 +3,7 @@
 """
 from app.database import db
 from app.models import User, UserCompetency, Task
+from app.services.skill_matcher import extract_skills, text_has_skill
 
 
 def get_user_competencies(user_id):
@@ -27,6 +28,8 @@ def calculate_competence_match(user_id, task_description):
         return 0.5  # Средняя оценка если нет компетенций
     
     task_lower = task_description.lower() if task_description else ''
+    # Все навыки словаря в тексте задачи - за один проход
+    found_skills = extract_skills(task_lower)
     
     # Простой алгоритм: проверяем совпадение навыков в описании задачи
     matches = 0
@@ -50,7 +53,7 @@ def calculate_competence_match(user_id, task_description):
         experience_multiplier = min(comp.experience_years / 5.0, 1.0)
         weight *= (0.5 + 0.5 * experience_multiplier)
         
-        if skill_lower in task_lower:
+        if text_has_skill(skill_lower, task_lower, found_skills):
             matches += weight
         
         total_weight += weight
@@ -75,6 +78,20 @@ def get_competence_score(user_id, required_skills):
     competencies = UserCompetency.query.filter_by(user_id=user_id).all()
     user_skills = {c.skill_name.lower(): c for c in competencies}
     
+    return score_user_skills(user_skills, required_skills)
+
+
+def score_user_skills(user_skills, required_skills):
+    """
+    Оценка компетенций по уже загруженным навыкам пользователя
+    
+    Args:
+        user_skills: dict навык (нижний регистр) -> UserCompetency
+        required_skills: Список требуемых навыков
+    
+    Returns:
+        float: Оценка (0-1)
+    """
     if not required_skills:
         return 0.5
     
@@ -0,0 +1,169 @@
+"""
+Сервис данных дашбордов
+
+Статистика считается агрегирующими запросами (COUNT ... FILTER),
+готовый ответ дашборда менеджера хранится в кэше снимков с коротким
+TTL и сбрасывается после коммита изменений задач, назначений и
+пользователей. ETag вычисляется один раз при построении снимка.
+"""
+import hashlib
+import json
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.orm import selectinload
+from app.database import db
+from app.models import User, Task, Assignment, TaskTag
+from app.services.ai_recommendations_service import get_recommendations_snapshot
+from app.services.snapshot_cache import get_snapshot, register_snapshot_invalidation
+
+
+MANAGER_DASHBOARD_SNAPSHOT_KEY = 'dashboard_manager'
+
+ACTIVE_TASK_STATUSES = ('assigned', 'in_progress')
+RECENT_TASK_STATUSES = ('assigned', 'in_progress', 'completed')
+RECENT_TASKS_LIMIT = 10
+CLOSED_TASK_STATUSES = ('completed', 'cancelled')
+UPCOMING_DEADLINES_LIMIT = 5
+
+register_snapshot_invalidation(MANAGER_DASHBOARD_SNAPSHOT_KEY, (Task, Assignment, User, TaskTag))
+
+
+def get_task_stats(now=None):
+    """
+    Статистика задач одним агрегирующим запросом
+
+    Returns:
+        dict: total, active, overdue, completed
+    """
+    now = now or datetime.utcnow()
+    is_active = Task.status.in_(ACTIVE_TASK_STATUSES)
+    row = db.session.query(
+        db.func.count(Task.id),
+        db.func.count(Task.id).filter(is_active),
+        db.func.count(Task.id).filter(is_active, Task.deadline < now),
+        db.func.count(Task.id).filter(Task.status == 'completed'),
+    ).one()
+    return {
+        'total': row[0],
+        'active': row[1],
+        'overdue': row[2],
+        'completed': row[3],
+    }
+
+
+def _recent_tasks():
+    """Последние задачи с исполнителями (одна строка на назначение)"""
+    rows = db.session.query(Task, Assignment, User).outerjoin(
+        Assignment, Task.id == Assignment.task_id
+    ).outerjoin(
+        User, Assignment.assigned_to == User.id
+    ).filter(
+        Task.status.in_(RECENT_TASK_STATUSES)
+    ).options(
+        selectinload(Task.tags)
+    ).order_by(Task.created_at.desc()).limit(RECENT_TASKS_LIMIT).all()
+
+    tasks_data = []
+    for task, assignment, user in rows:
+        task_dict = task.to_dict()
+        if assignment and user:
+            task_dict['employee'] = user.name
+            task_dict['employeeEmail'] = user.email
+            task_dict['progress'] = assignment.workload_points or 0
+            task_dict['maxProgress'] = user.max_workload or 0
+        tasks_data.append(task_dict)
+    return tasks_data
+
+
+def _employee_loads():
+    """Загруженность сотрудников (только нужные колонки)"""
+    rows = db.session.query(User.name, User.current_workload, User.max_workload).filter(
+        User.role == 'employee'
+    ).order_by(User.id).all()
+    return [
+        {
+            'name': name,
+            'load': current_workload,
+            'maxLoad': max_workload
+        }
+        for name, current_workload, max_workload in rows
+    ]
+
+
+def build_manager_dashboard():
+    """
+    Собрать данные дашборда менеджера
+
+    Returns:
+        dict: {'payload': данные дашборда, 'etag': хэш данных}
+    """
+    recommendations, _ = get_recommendations_snapshot()
+    applied_recommendations = len([r for r in recommendations if r.get('applied', False)])
+
+    payload = {
+        'stats': get_task_stats(),
+        'tasks': _recent_tasks(),
+        'employeeLoads': _employee_loads(),
+        'aiAnalysis': {
+            'recommendations': len(recommendations),
+            'applied': applied_recommendations
+        }
+    }
+    etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    return {'payload': payload, 'etag': etag}
+
+
+def get_employee_dashboard(user):
+    """
+    Данные дашборда сотрудника
+
+    Статистика - один GROUP BY по статусу задач назначений сотрудника,
+    ближайшие дедлайны - ORDER BY deadline LIMIT. Оба запроса используют
+    индексы (assigned_to, status) и tasks.deadline, поэтому время ответа
+    не зависит от объема истории сотрудника.
+
+    Args:
+        user: Объект User
+
+    Returns:
+        dict: tasks (счетчики по статусам) и upcoming_deadlines
+    """
+    status_counts = dict(db.session.query(Task.status, db.func.count(Assignment.id)).join(
+        Task, Task.id == Assignment.task_id
+    ).filter(
+        Assignment.assigned_to == user.id
+    ).group_by(Task.status).all())
+
+    upcoming = Task.query.join(
+        Assignment, Assignment.task_id == Task.id
+    ).filter(
+        Assignment.assigned_to == user.id,
+        Task.deadline.isnot(None),
+        Task.status.notin_(CLOSED_TASK_STATUSES)
+    ).options(
+        selectinload(Task.tags)
+    ).order_by(Task.deadline, Assignment.id).limit(UPCOMING_DEADLINES_LIMIT).all()
+
+    return {
+        'tasks': {
+            'total': sum(status_counts.values()),
+            'pending': status_counts.get('pending', 0) + status_counts.get('assigned', 0),
+            'in_progress': status_counts.get('in_progress', 0),
+            'completed': status_counts.get('completed', 0)
+        },
+        'upcoming_deadlines': [task.to_dict() for task in upcoming]
+    }
+
+
+def get_manager_dashboard_snapshot():
+    """
+    Получить дашборд менеджера из кэша снимков (или пересчитать)
+
+    Returns:
+        tuple: ({'payload', 'etag'}, время генерации снимка)
+    """
+    return get_snapshot(
+        MANAGER_DASHBOARD_SNAPSHOT_KEY,
+        current_app.config['DASHBOARD_CACHE_TTL'],
+        build_manager_dashboard
+    )
@@ -0,0 +1,126 @@
+"""
+Поиск оптимальных команд (dream teams) методом ветвей и границ
+
+Работает по заранее загруженной матрице сил связей между сотрудниками
+и не обращается к БД. Результат совпадает с полным перебором
+itertools.combinations: команды упорядочены по синергии (по убыванию),
+при равной синергии - по размеру и лексикографическому порядку состава.
+"""
+import heapq
+import time
+import numpy as np
+
+
+# Запас на погрешность float при сравнении верхней оценки с порогом
+BOUND_EPSILON = 1e-9
+
+
+def team_synergy(strengths, members):
+    """
+    Синергия команды (0-10) - средняя сила связи по всем парам × 10
+
+    Пары суммируются в том же порядке, что и в calculate_team_synergy,
+    чтобы округление совпадало с полным перебором.
+    """
+    if len(members) < 2:
+        return 5.0
+    total_strength = 0.0
+    pairs_count = 0
+    for i, first in enumerate(members):
+        for second in members[i + 1:]:
+            total_strength += float(strengths[first, second])
+            pairs_count += 1
+    return round(total_strength / pairs_count * 10.0, 1)
+
+
+def search_dream_teams(strengths, min_team_size=2, max_team_size=5, min_synergy=8.0,
+                       top_k=5, time_budget=None):
+    """
+    Найти top_k команд с максимальной синергией
+
+    Args:
+        strengths: Симметричная матрица сил связей (n × n), значения 0-1
+        min_team_size: Минимальный размер команды
+        max_team_size: Максимальный размер команды
+        min_synergy: Минимальная синергия (0-10)
+        top_k: Количество команд в результате
+        time_budget: Ограничение времени поиска в секундах (None - без ограничения)
+
+    Returns:
+        tuple: (список (синергия, индексы участников), завершен ли поиск полностью)
+    """
+    strengths = np.asarray(strengths, dtype=np.float64)
+    n = strengths.shape[0]
+    if n < min_team_size or top_k <= 0:
+        return [], True
+
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    # max_edge_after[i] - максимальная сила связи среди пар с индексами >= i
+    upper = np.triu(strengths, k=1)
+    row_max_after = np.zeros(n + 1)
+    for i in range(n - 1, -1, -1):
+        row_max = upper[i, i + 1:].max() if i + 1 < n else 0.0
+        row_max_after[i] = max(row_max, row_max_after[i + 1])
+
+    # Куча худших из лучших: (синергия, -порядковый номер, участники)
+    best = []
+    order = 0
+    completed = True
+
+    def threshold():
+        return best[0][0] if len(best) >= top_k else None
+
+    for team_size in range(min_team_size, min(max_team_size, n) + 1):
+        pairs_total = team_size * (team_size - 1) / 2
+        stack = [(0, (), 0.0, np.zeros(n))]
+        # Обход в глубину с сохранением лексикографического порядка
+        while stack:
+            if deadline is not None and time.monotonic() > deadline:
+                completed = False
+                break
+            start, members, current_sum, gains = stack.pop()
+            remaining = team_size - len(members)
+
+            if remaining == 0:
+                synergy = team_synergy(strengths, members)
+                order += 1
+                worst = threshold()
+                if synergy >= min_synergy and (worst is None or synergy > worst):
+                    entry = (synergy, -order, members)
+                    if len(best) >= top_k:
+                        heapq.heapreplace(best, entry)
+                    else:
+                        heapq.heappush(best, entry)
+                continue
+
+            if n - start < remaining:
+                continue
+
+            # Верхняя оценка: лучшие приросты от текущих участников
+            # плюс максимальные связи между еще не выбранными
+            candidate_gains = gains[start:]
+            if remaining < len(candidate_gains):
+                top_gains = np.partition(candidate_gains, -remaining)[-remaining:].sum()
+            else:
+                top_gains = candidate_gains.sum()
+            inner_pairs = remaining * (remaining - 1) / 2
+            bound = (current_sum + top_gains + inner_pairs * row_max_after[start]) / pairs_total
+            bound_synergy = round(bound * 10.0 + BOUND_EPSILON, 1)
+            worst = threshold()
+            if bound_synergy < min_synergy or (worst is not None and bound_synergy <= worst):
+                continue
+
+            # В стек в обратном порядке, чтобы первым обрабатывался меньший индекс
+            for candidate in range(n - remaining, start - 1, -1):
+                stack.append((
+                    candidate + 1,
+                    members + (candidate,),
+                    current_sum + gains[candidate],
+                    gains + strengths[candidate],
+                ))
+        if not completed:
+            break
+
+    result = sorted(best, key=lambda entry: (-entry[0], -entry[1]))
+    return [(synergy, list(members)) for synergy, _, members in result], completed
@@ -0,0 +1,234 @@
+"""
+Счетчики непрочитанных уведомлений (таблица notification_counters)
+
+Число непрочитанных уведомлений пользователя хранится в отдельной строке
+и читается по первичному ключу вместо COUNT по таблице notifications.
+Счетчик меняется в той же транзакции, что и уведомления:
+- при flush сессии - создание, прочтение и удаление уведомлений через ORM;
+- явно в массовых операциях - генерация уведомлений о дедлайнах и
+  просрочках (add_unread), «прочитать все» (reset_unread).
+
+Изменения в обход ORM (каскадное удаление на уровне БД, ручные правки)
+исправляет периодическая сверка reconcile_unread_counters (задача
+планировщика unread_counters). Если строки счетчика еще нет, она
+создается в той же транзакции из COUNT по таблице notifications (при
+изменении - COUNT до изменения плюс приращение).
+"""
+from datetime import datetime
+from sqlalchemy import bindparam, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.database import db
+from app.models import Notification, NotificationCounter, User
+
+
+def _upsert_counters(connection, counts, increment):
+    """
+    Атомарно изменить счетчики пользователей, создав недостающие строки
+
+    При increment недостающая строка создается со значением COUNT
+    непрочитанных в notifications плюс приращение, поэтому вызывать
+    функцию нужно до записи изменений уведомлений в той же транзакции.
+
+    Args:
+        connection: Соединение текущей транзакции
+        counts: user_id -> число
+        increment: True - прибавить число к счетчику, False - записать его
+    """
+    if increment:
+        counts = {user_id: delta for user_id, delta in counts.items() if delta}
+    if not counts:
+        return
+    table = NotificationCounter.__table__
+    now = datetime.utcnow()
+    params = [
+        {'counter_user_id': user_id, 'counter_value': value}
+        for user_id, value in sorted(counts.items())
+    ]
+    new_value = table.c.unread_count + bindparam('counter_value') if increment else bindparam('counter_value')
+    initial_value = bindparam('counter_value')
+    if increment:
+        initial_value = db.select(db.func.count(Notification.id)).where(
+            Notification.user_id == bindparam('counter_user_id'),
+            Notification.is_read.is_(False)
+        ).scalar_subquery() + bindparam('counter_value')
+
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = insert(table).values(
+            user_id=bindparam('counter_user_id'),
+            unread_count=initial_value,
+            updated_at=now
+        ).on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={'unread_count': new_value, 'updated_at': now}
+        )
+        connection.execute(statement, params)
+        return
+
+    # Прочие диалекты: UPDATE, а для отсутствующих строк - INSERT
+    for row in params:
+        updated = connection.execute(
+            table.update().where(table.c.user_id == row['counter_user_id']).values(
+                unread_count=table.c.unread_count + row['counter_value'] if increment else row['counter_value'],
+                updated_at=now
+            )
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(
+                user_id=bindparam('counter_user_id'), unread_count=initial_value, updated_at=now
+            ), row)
+
+
+def add_unread(session, counts):
+    """
+    Прибавить к счетчикам непрочитанных (массовая вставка уведомлений)
+
+    Вызывается до вставки или удаления уведомлений в той же транзакции.
+
+    Args:
+        session: Сессия SQLAlchemy
+        counts: user_id -> число новых непрочитанных уведомлений
+    """
+    _upsert_counters(session.connection(), counts, increment=True)
+
+
+def reset_unread(session, user_id):
+    """
+    Обнулить счетчик непрочитанных пользователя
+
+    Если строки счетчика нет, она не создается: первое чтение вычислит
+    значение COUNT-запросом.
+    """
+    table = NotificationCounter.__table__
+    session.connection().execute(
+        table.update().where(table.c.user_id == user_id).values(unread_count=0, updated_at=datetime.utcnow())
+    )
+
+
+def _was_read(session, state):
+    """Значение is_read до изменений в текущем flush"""
+    history = state.attrs.is_read.history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    # Атрибут изменен без загрузки (объект истек после commit)
+    return session.connection().execute(
+        db.select(Notification.is_read).where(Notification.id == state.identity[0])
+    ).scalar()
+
+
+@event.listens_for(Session, 'before_flush', propagate=True)
+def _track_unread_changes(session, flush_context, instances):
+    deltas = {}
+
+    def add(user_id, delta):
+        deltas[user_id] = deltas.get(user_id, 0) + delta
+
+    with session.no_autoflush:
+        for instance in session.new:
+            if isinstance(instance, Notification) and not instance.is_read:
+                add(instance.user_id, 1)
+
+        for instance in session.dirty:
+            if not isinstance(instance, Notification):
+                continue
+            state = inspect(instance)
+            if not state.attrs.is_read.history.has_changes():
+                continue
+            add(instance.user_id, int(not instance.is_read) - int(not _was_read(session, state)))
+
+        for instance in session.deleted:
+            if isinstance(instance, Notification) and not instance.is_read:
+                add(instance.user_id, -1)
+
+    if any(deltas.values()):
+        _upsert_counters(session.connection(), deltas, increment=True)
+
+
+def _initialize_counters(connection, user_ids):
+    """Создать счетчики по фактическому числу непрочитанных (один COUNT-запрос)"""
+    actual = dict(connection.execute(
+        db.select(Notification.user_id, db.func.count(Notification.id)).where(
+            Notification.user_id.in_(user_ids),
+            Notification.is_read.is_(False)
+        ).group_by(Notification.user_id)
+    ).all())
+    initial = {user_id: actual.get(user_id, 0) for user_id in user_ids}
+    # Строки сохраняются только для существующих пользователей (внешний ключ)
+    existing = set(connection.execute(db.select(User.id).where(User.id.in_(user_ids))).scalars())
+    _upsert_counters(
+        connection, {user_id: count for user_id, count in initial.items() if user_id in existing}, increment=False
+    )
+    return initial
+
+
+def get_unread_counts(user_ids, connection=None):
+    """
+    Число непрочитанных уведомлений пользователей
+
+    Счетчики читаются по первичному ключу; для пользователей без строки
+    счетчика значение вычисляется COUNT-запросом и сохраняется.
+
+    Args:
+        user_ids: ID пользователей
+        connection: Соединение транзакции, в которой записаны изменения
+            (по умолчанию - чтение через сессию, недостающие счетчики
+            создаются в отдельной транзакции)
+
+    Returns:
+        dict: user_id -> число непрочитанных
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {}
+    counts = dict((connection or db.session).execute(
+        db.select(NotificationCounter.user_id, NotificationCounter.unread_count).where(
+            NotificationCounter.user_id.in_(user_ids)
+        )
+    ).all())
+
+    missing = [user_id for user_id in user_ids if user_id not in counts]
+    if missing and connection is not None:
+        counts.update(_initialize_counters(connection, missing))
+    elif missing:
+        with db.engine.begin() as init_connection:
+            counts.update(_initialize_counters(init_connection, missing))
+    return counts
+
+
+def get_unread_count(user_id):
+    """Число непрочитанных уведомлений пользователя"""
+    return get_unread_counts([user_id])[user_id]
+
+
+def reconcile_unread_counters(fix=True):
+    """
+    Сверить счетчики с таблицей notifications
+
+    Фактические значения считаются одним GROUP BY запросом.
+
+    Args:
+        fix: Исправить расхождения
+
+    Returns:
+        dict: checked - проверено счетчиков, fixed - исправлено (или найдено)
+    """
+    actual = dict(db.session.query(
+        Notification.user_id, db.func.count(Notification.id)
+    ).filter(
+        Notification.is_read.is_(False)
+    ).group_by(Notification.user_id).all())
+    stored = dict(db.session.query(NotificationCounter.user_id, NotificationCounter.unread_count).all())
+
+    drift = {
+        user_id: actual.get(user_id, 0)
+        for user_id in set(actual) | set(stored)
+        if actual.get(user_id, 0) != stored.get(user_id)
+    }
+    if fix:
+        _upsert_counters(db.session.connection(), drift, increment=False)
+        db.session.commit()
+    return {'checked': len(set(actual) | set(stored)), 'fixed': len(drift)}
@@ -0,0 +1,368 @@
+"""
+Доставка уведомлений в реальном времени (Server-Sent Events)
+
+События:
+- notification - создано новое уведомление пользователя;
+- unread_count - изменилось число непрочитанных уведомлений.
+
+События формируются при flush сессии, в которой создаются, читаются или
+удаляются уведомления (маршруты tasks, task_comments, notifications), и
+явно из массовых операций (notification_service, read-all). Подписчики
+(SSE-соединения) получают их через очереди в памяти процесса
+(NotificationBroker).
+
+Бэкенды доставки (NOTIFICATION_EVENTS_BACKEND):
+- local - события раздаются подписчикам текущего процесса после коммита
+  (по умолчанию). Подходит для одного процесса приложения.
+- database - события пишутся в таблицу notification_events в той же
+  транзакции; поток-опросчик каждого процесса читает новые строки раз в
+  NOTIFICATION_STREAM_POLL_INTERVAL секунд (только пока есть подписчики)
+  и раздает их своим подписчикам. События доходят до всех воркеров, в том
+  числе из отдельного процесса планировщика.
+
+  Порядок id не совпадает с порядком коммитов: транзакция с меньшим id
+  может зафиксироваться позже. Поэтому опросчик перечитывает окно
+  последних NOTIFICATION_STREAM_LOOKBACK секунд и пропускает уже
+  доставленные события.
+"""
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import Session
+from app.database import db
+from app.models import Notification, NotificationEvent
+from app.services.notification_counters import get_unread_count, get_unread_counts
+
+
+SUBSCRIBER_QUEUE_SIZE = 100
+POLL_BATCH_SIZE = 1000
+REPLAY_LIMIT = 100
+RECONNECT_DELAY_MS = 3000
+
+
+class NotificationBroker:
+    """Раздача событий подписчикам текущего процесса"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def has_subscribers(self, user_ids=None):
+        with self._lock:
+            if user_ids is None:
+                return bool(self._subscribers)
+            return any(user_id in self._subscribers for user_id in user_ids)
+
+    def publish(self, events):
+        for item in events:
+            with self._lock:
+                subscribers = list(self._subscribers.get(item['user_id'], ()))
+            for subscriber in subscribers:
+                try:
+                    subscriber.put_nowait(item)
+                except queue.Full:
+                    # Клиент не успевает читать: событие пропускается,
+                    # актуальный счетчик придет со следующим событием
+                    pass
+
+
+broker = NotificationBroker()
+
+
+class LocalEventBackend:
+    """События раздаются подписчикам текущего процесса после коммита"""
+
+    def needs_events(self, user_ids):
+        return broker.has_subscribers(user_ids)
+
+    def stage(self, session, events):
+        session.info.setdefault('notification_events', []).extend(events)
+
+    def start(self, app):
+        pass
+
+    def replay(self, user_id, last_event_id):
+        return []
+
+
+class DatabaseEventBackend:
+    """События в таблице notification_events (общие для всех процессов)"""
+
+    def __init__(self):
+        self._poller = None
+        self._lock = threading.Lock()
+
+    def needs_events(self, user_ids):
+        return True
+
+    def stage(self, session, events):
+        now = datetime.utcnow()
+        session.connection().execute(db.insert(NotificationEvent), [
+            {
+                'user_id': item['user_id'],
+                'event': item['event'],
+                'payload': json.dumps(item['data'], ensure_ascii=False),
+                'created_at': now,
+            }
+            for item in events
+        ])
+
+    def start(self, app):
+        with self._lock:
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(
+                    target=self._poll, args=(app,), name='notification-events-poller', daemon=True
+                )
+                self._poller.start()
+
+    def replay(self, user_id, last_event_id):
+        rows = NotificationEvent.query.filter(
+            NotificationEvent.user_id == user_id,
+            NotificationEvent.id > last_event_id
+        ).order_by(NotificationEvent.id).limit(REPLAY_LIMIT).all()
+        return [_row_event(row) for row in rows]
+
+    def _read_events(self, last_id, delivered, lookback):
+        """
+        Прочитать недоставленные события
+
+        Сначала выбираются только id и время событий после last_id или из
+        окна lookback секунд (поздно зафиксированные транзакции), затем
+        целиком - строки, которых нет среди доставленных.
+
+        Args:
+            last_id: Наибольший доставленный id
+            delivered: id -> created_at доставленных событий окна
+                (обновляется на месте)
+            lookback: Окно перечитывания в секундах
+
+        Returns:
+            tuple: (новый last_id, события для раздачи)
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=lookback)
+        recent = db.session.query(NotificationEvent.id, NotificationEvent.created_at).filter(
+            or_(NotificationEvent.id > last_id, NotificationEvent.created_at >= cutoff)
+        ).all()
+        for event_id in [event_id for event_id, created_at in delivered.items() if created_at < cutoff]:
+            del delivered[event_id]
+
+        missing = sorted(event_id for event_id, created_at in recent if event_id not in delivered)[:POLL_BATCH_SIZE]
+        if not missing:
+            return last_id, []
+        rows = NotificationEvent.query.filter(
+            NotificationEvent.id.in_(missing)
+        ).order_by(NotificationEvent.id).all()
+        for row in rows:
+            delivered[row.id] = row.created_at
+        return max(last_id, rows[-1].id), [_row_event(row) for row in rows]
+
+    def _poll(self, app):
+        last_id = None
+        delivered = {}
+        lookback = app.config['NOTIFICATION_STREAM_LOOKBACK']
+        while True:
+            if not broker.has_subscribers():
+                # Без подписчиков БД не опрашивается; после паузы чтение
+                # начинается с последнего события
+                last_id = None
+                delivered.clear()
+            else:
+                with app.app_context():
+                    try:
+                        if last_id is None:
+                            # События, записанные до подписки, считаются доставленными
+                            cutoff = datetime.utcnow() - timedelta(seconds=lookback)
+                            last_id = db.session.query(db.func.max(NotificationEvent.id)).scalar() or 0
+                            delivered.update(db.session.query(
+                                NotificationEvent.id, NotificationEvent.created_at
+                            ).filter(NotificationEvent.created_at >= cutoff).all())
+                        else:
+                            last_id, events = self._read_events(last_id, delivered, lookback)
+                            if events:
+                                broker.publish(events)
+                    except Exception:
+                        app.logger.exception('Notification events poll failed')
+                    finally:
+                        db.session.remove()
+            time.sleep(app.config['NOTIFICATION_STREAM_POLL_INTERVAL'])
+
+
+NOTIFICATION_EVENT_BACKENDS = {
+    'local': LocalEventBackend,
+    'database': DatabaseEventBackend,
+}
+
+
+def _row_event(row):
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'event': row.event,
+        'data': json.loads(row.payload),
+    }
+
+
+def get_event_backend(app=None):
+    """Получить бэкенд событий уведомлений текущего приложения"""
+    app = app or current_app._get_current_object()
+    backend = app.extensions.get('notification_events')
+    if backend is None:
+        backend_name = app.config['NOTIFICATION_EVENTS_BACKEND']
+        if backend_name not in NOTIFICATION_EVENT_BACKENDS:
+            raise ValueError(f'Неизвестный бэкенд событий уведомлений: {backend_name}')
+        backend = NOTIFICATION_EVENT_BACKENDS[backend_name]()
+        app.extensions['notification_events'] = backend
+    return backend
+
+
+def publish_notification_changes(session, notifications=(), user_ids=()):
+    """
+    Опубликовать новые уведомления и счетчики непрочитанных
+
+    Вызывается внутри транзакции, в которой записаны изменения:
+    события доставляются подписчикам только после ее коммита.
+
+    Args:
+        session: Сессия SQLAlchemy
+        notifications: Созданные уведомления (с назначенными id)
+        user_ids: Пользователи, у которых изменились уведомления
+    """
+    user_ids = set(user_ids) | {notification.user_id for notification in notifications}
+    if not user_ids:
+        return
+    backend = get_event_backend()
+    if not backend.needs_events(user_ids):
+        return
+
+    events = [
+        {'user_id': notification.user_id, 'event': 'notification', 'data': notification.to_dict()}
+        for notification in notifications
+    ]
+    for user_id, unread_count in get_unread_counts(user_ids, session.connection()).items():
+        events.append({'user_id': user_id, 'event': 'unread_count', 'data': {'unread_count': unread_count}})
+    backend.stage(session, events)
+
+
+def events_required(user_ids=None):
+    """Нужно ли формировать события (есть ли кому их доставить)"""
+    return get_event_backend().needs_events(user_ids)
+
+
+@event.listens_for(Session, 'after_flush', propagate=True)
+def _collect_notification_changes(session, flush_context):
+    if not has_app_context():
+        return
+    created = []
+    user_ids = set()
+    for instance in session.new:
+        if isinstance(instance, Notification):
+            created.append(instance)
+    for instance in session.dirty:
+        if isinstance(instance, Notification) and inspect(instance).attrs.is_read.history.has_changes():
+            user_ids.add(instance.user_id)
+    for instance in session.deleted:
+        if isinstance(instance, Notification):
+            user_ids.add(instance.user_id)
+    if created or user_ids:
+        publish_notification_changes(session, sorted(created, key=lambda n: n.id), user_ids)
+
+
+@event.listens_for(Session, 'after_commit', propagate=True)
+def _deliver_after_commit(session):
+    events = session.info.pop('notification_events', None)
+    if events:
+        broker.publish(events)
+
+
+@event.listens_for(Session, 'after_rollback', propagate=True)
+def _forget_events_after_rollback(session):
+    session.info.pop('notification_events', None)
+
+
+def format_sse(event_name, data, event_id=None):
+    """Сообщение в формате text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_name}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def open_notification_stream(user_id, last_event_id=None):
+    """
+    Открыть поток событий пользователя
+
+    Подписка оформляется до чтения текущего счетчика, поэтому изменения,
+    записанные во время открытия потока, не теряются. Генератор не
+    обращается к БД и не удерживает соединение пула.
+
+    Args:
+        user_id: ID пользователя
+        last_event_id: Заголовок Last-Event-ID при переподключении
+
+    Returns:
+        generator: Строки text/event-stream
+    """
+    app = current_app._get_current_object()
+    backend = get_event_backend(app)
+    backend.start(app)
+    subscriber = broker.subscribe(user_id)
+
+    missed = backend.replay(user_id, last_event_id) if last_event_id is not None else []
+    unread_count = get_unread_count(user_id)
+    keepalive = app.config['NOTIFICATION_STREAM_KEEPALIVE']
+    max_duration = app.config['NOTIFICATION_STREAM_MAX_DURATION']
+
+    def generate():
+        try:
+            yield f'retry: {RECONNECT_DELAY_MS}\n\n'
+            for item in missed:
+                yield format_sse(item['event'], item['data'], item.get('id'))
+            yield format_sse('unread_count', {'unread_count': unread_count})
+
+            deadline = time.monotonic() + max_duration if max_duration else None
+            while deadline is None or time.monotonic() < deadline:
+                try:
+                    item = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(item['event'], item['data'], item.get('id'))
+        finally:
+            broker.unsubscribe(user_id, subscriber)
+
+    return generate()
+
+
+def prune_notification_events():
+    """
+    Удалить события старше NOTIFICATION_EVENTS_RETENTION секунд
+
+    Returns:
+        dict: deleted - удалено событий
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['NOTIFICATION_EVENTS_RETENTION'])
+    deleted = db.session.execute(
+        db.delete(NotificationEvent).where(NotificationEvent.created_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return {'deleted': deleted}
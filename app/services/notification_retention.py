@@ -0,0 +1,380 @@
+"""
+Хранение уведомлений: удаление прочитанных, архивирование старых,
+секционирование таблицы notifications в PostgreSQL
+
+Политика (Config, 0 - правило выключено):
+- NOTIFICATION_RETENTION_READ_DAYS - прочитанные уведомления старше
+  N дней удаляются;
+- NOTIFICATION_RETENTION_ARCHIVE_DAYS - остальные уведомления старше
+  N дней переносятся в компактную таблицу notifications_archive;
+- NOTIFICATION_ARCHIVE_RETENTION_DAYS - записи архива старше N дней
+  удаляются.
+
+Строки удаляются пачками по NOTIFICATION_RETENTION_BATCH_SIZE с коммитом
+после каждой пачки, поэтому блокировки остаются короткими. Счетчики
+непрочитанных уменьшаются в той же транзакции, что и архивирование.
+
+В PostgreSQL notifications можно преобразовать в таблицу, секционированную
+по месяцам created_at (partition_notifications, flask
+partition-notifications). Тогда месячные секции целиком старше срока
+архивирования переносятся в архив и удаляются (DETACH + DROP) без
+построчного DELETE, а секции на следующие месяцы создаются заранее.
+"""
+import re
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.schema import AddConstraint
+from app.database import db
+from app.models import Notification, NotificationArchive
+from app.services.notification_counters import add_unread
+from app.services.notification_events import publish_notification_changes
+
+
+ARCHIVED_COLUMNS = ('id', 'user_id', 'type', 'title', 'message', 'related_task_id', 'is_read', 'created_at')
+PARTITION_NAME_PATTERN = re.compile(r'^notifications_p(\d{4})_(\d{2})$')
+DEFAULT_PARTITION = 'notifications_default'
+
+
+def _retention_cutoffs(now):
+    """Границы правил политики (None - правило выключено)"""
+    config = current_app.config
+
+    def cutoff(key):
+        days = config[key]
+        return now - timedelta(days=days) if days else None
+
+    return {
+        'read': cutoff('NOTIFICATION_RETENTION_READ_DAYS'),
+        'archive': cutoff('NOTIFICATION_RETENTION_ARCHIVE_DAYS'),
+        'archive_prune': cutoff('NOTIFICATION_ARCHIVE_RETENTION_DAYS'),
+    }
+
+
+def _next_batch(model, condition, batch_size):
+    """ID следующей пачки строк по возрастанию id"""
+    return db.session.scalars(
+        db.select(model.id).where(condition).order_by(model.id).limit(batch_size)
+    ).all()
+
+
+def _delete_batches(model, condition, batch_size):
+    """
+    Удалить строки пачками (коммит после каждой пачки)
+
+    Returns:
+        tuple: (удалено строк, число пачек)
+    """
+    deleted = batches = 0
+    while True:
+        ids = _next_batch(model, condition, batch_size)
+        if not ids:
+            return deleted, batches
+        db.session.execute(
+            db.delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        deleted += len(ids)
+        batches += 1
+
+
+def _unread_by_user(condition):
+    """Число непрочитанных уведомлений по пользователям для условия"""
+    return dict(db.session.query(Notification.user_id, db.func.count(Notification.id)).filter(
+        condition, Notification.is_read.is_(False)
+    ).group_by(Notification.user_id).all())
+
+
+def _archive_rows(source_condition, now, source=None):
+    """Скопировать уведомления в архив одним INSERT ... SELECT"""
+    source = source if source is not None else Notification.__table__
+    columns = [source.c[name] for name in ARCHIVED_COLUMNS]
+    db.session.execute(
+        db.insert(NotificationArchive).from_select(
+            list(ARCHIVED_COLUMNS) + ['archived_at'],
+            db.select(*columns, db.literal(now, db.DateTime)).where(source_condition)
+        )
+    )
+
+
+def _release_unread(unread):
+    """
+    Уменьшить счетчики непрочитанных и оповестить подписчиков
+
+    Вызывается до удаления строк: отсутствующий счетчик создается из
+    COUNT по еще не удаленным уведомлениям.
+    """
+    if unread:
+        add_unread(db.session, {user_id: -count for user_id, count in unread.items()})
+        publish_notification_changes(db.session, user_ids=unread.keys())
+
+
+def _archive_batches(cutoff, batch_size, now):
+    """
+    Перенести уведомления старше cutoff в архив пачками
+
+    Returns:
+        tuple: (перенесено строк, число пачек)
+    """
+    archived = batches = 0
+    condition = Notification.created_at < cutoff
+    while True:
+        ids = _next_batch(Notification, condition, batch_size)
+        if not ids:
+            return archived, batches
+        in_batch = Notification.id.in_(ids)
+        _release_unread(_unread_by_user(in_batch))
+        _archive_rows(in_batch, now)
+        db.session.execute(db.delete(Notification).where(in_batch).execution_options(synchronize_session=False))
+        db.session.commit()
+        archived += len(ids)
+        batches += 1
+
+
+def _count(model, condition):
+    return db.session.query(db.func.count(model.id)).filter(condition).scalar()
+
+
+def apply_retention(now=None, dry_run=False):
+    """
+    Применить политику хранения уведомлений
+
+    Args:
+        now: Текущее время (для расчета границ)
+        dry_run: Только подсчитать строки, попадающие под правила
+
+    Returns:
+        dict: deleted_read, archived, archive_pruned, dropped_partitions,
+        batches, remaining (строк в notifications), duration_ms
+    """
+    started = time.perf_counter()
+    now = now or datetime.utcnow()
+    cutoffs = _retention_cutoffs(now)
+    batch_size = current_app.config['NOTIFICATION_RETENTION_BATCH_SIZE']
+    result = {'deleted_read': 0, 'archived': 0, 'archive_pruned': 0, 'dropped_partitions': [], 'batches': 0}
+
+    read_condition = db.and_(Notification.is_read.is_(True), Notification.created_at < cutoffs['read']) \
+        if cutoffs['read'] else None
+    archive_condition = Notification.created_at < cutoffs['archive'] if cutoffs['archive'] else None
+    prune_condition = NotificationArchive.archived_at < cutoffs['archive_prune'] if cutoffs['archive_prune'] else None
+
+    if dry_run:
+        if read_condition is not None:
+            result['deleted_read'] = _count(Notification, read_condition)
+        if archive_condition is not None:
+            if read_condition is not None:
+                archive_condition = db.and_(archive_condition, db.not_(read_condition))
+            result['archived'] = _count(Notification, archive_condition)
+        if prune_condition is not None:
+            result['archive_pruned'] = _count(NotificationArchive, prune_condition)
+    else:
+        if read_condition is not None:
+            deleted, batches = _delete_batches(Notification, read_condition, batch_size)
+            result['deleted_read'] += deleted
+            result['batches'] += batches
+        if archive_condition is not None:
+            if is_notifications_partitioned():
+                for name, rows in _archive_expired_partitions(cutoffs['archive'], now):
+                    result['dropped_partitions'].append(name)
+                    result['archived'] += rows
+            archived, batches = _archive_batches(cutoffs['archive'], batch_size, now)
+            result['archived'] += archived
+            result['batches'] += batches
+        if prune_condition is not None:
+            pruned, batches = _delete_batches(NotificationArchive, prune_condition, batch_size)
+            result['archive_pruned'] += pruned
+            result['batches'] += batches
+        if is_notifications_partitioned():
+            ensure_notification_partitions()
+
+    result['remaining'] = db.session.query(db.func.count(Notification.id)).scalar()
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f'notifications_p{month:%Y_%m}'
+
+
+def is_notifications_partitioned(connection=None):
+    """Является ли notifications секционированной таблицей (только PostgreSQL)"""
+    connection = connection or db.session.connection()
+    if connection.dialect.name != 'postgresql':
+        return False
+    return bool(connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('notifications'))"
+    )).scalar())
+
+
+def _partitions(connection):
+    """Месячные секции notifications: имя -> начало месяца"""
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('notifications')"
+    )).scalars().all()
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_PATTERN.match(name)
+        if match:
+            partitions[name] = datetime(int(match.group(1)), int(match.group(2)), 1)
+    return partitions
+
+
+def _create_partition(connection, month):
+    """
+    Создать месячную секцию notifications
+
+    PostgreSQL не создает секцию, если строки ее диапазона уже лежат в
+    секции DEFAULT. Тогда в той же транзакции DEFAULT отсоединяется,
+    строки месяца переносятся в новую секцию и DEFAULT присоединяется
+    обратно.
+
+    Returns:
+        int: Перенесено строк из секции DEFAULT
+    """
+    name = _partition_name(month)
+    bounds = {'month_from': month, 'month_to': _add_months(month, 1)}
+    in_month = 'created_at >= :month_from AND created_at < :month_to'
+    create = text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF notifications "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+    )
+
+    has_default = connection.execute(text(f"SELECT to_regclass('{DEFAULT_PARTITION}') IS NOT NULL")).scalar()
+    if not has_default or not connection.execute(
+        text(f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month})'), bounds
+    ).scalar():
+        connection.execute(create)
+        return 0
+
+    connection.execute(text(f'ALTER TABLE notifications DETACH PARTITION {DEFAULT_PARTITION}'))
+    connection.execute(create)
+    moved = connection.execute(
+        text(f'INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_month}'), bounds
+    ).rowcount
+    connection.execute(text(f'DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}'), bounds)
+    connection.execute(text(f'ALTER TABLE notifications ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT'))
+    return moved
+
+
+def ensure_notification_partitions(months_ahead=None):
+    """
+    Создать секции notifications от текущего месяца на months_ahead вперед
+
+    Строки этих месяцев, попавшие в секцию DEFAULT (например, после
+    пропущенных запусков), переносятся в созданные секции.
+
+    Returns:
+        list: Имена созданных секций
+    """
+    connection = db.session.connection()
+    if months_ahead is None:
+        months_ahead = current_app.config['NOTIFICATION_PARTITION_MONTHS_AHEAD']
+    existing = _partitions(connection)
+    current = _month_start(datetime.utcnow())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = _add_months(current, offset)
+        if _partition_name(month) not in existing:
+            _create_partition(connection, month)
+            created.append(_partition_name(month))
+    if created:
+        db.session.commit()
+    return created
+
+
+def _archive_expired_partitions(cutoff, now):
+    """
+    Перенести в архив и удалить секции, целиком старше cutoff
+
+    Yields:
+        tuple: (имя секции, перенесено строк)
+    """
+    connection = db.session.connection()
+    for name, month in sorted(_partitions(connection).items(), key=lambda item: item[1]):
+        if _add_months(month, 1) > cutoff:
+            continue
+        partition = db.table(name, *[db.column(column) for column in ARCHIVED_COLUMNS])
+        unread = dict(db.session.execute(
+            db.select(partition.c.user_id, db.func.count()).where(
+                partition.c.is_read.is_(False)
+            ).group_by(partition.c.user_id)
+        ).all())
+        rows = db.session.execute(db.select(db.func.count()).select_from(partition)).scalar()
+        _release_unread(unread)
+        _archive_rows(db.true(), now, source=partition)
+        db.session.execute(text(f'ALTER TABLE notifications DETACH PARTITION {name}'))
+        db.session.execute(text(f'DROP TABLE {name}'))
+        db.session.commit()
+        yield name, rows
+
+
+def partition_notifications(months_ahead=None):
+    """
+    Преобразовать notifications в секционированную по месяцам created_at
+    таблицу (PostgreSQL)
+
+    Выполняется в одной транзакции под эксклюзивной блокировкой таблицы:
+    данные копируются в новую таблицу с секциями от месяца самого старого
+    уведомления до months_ahead месяцев вперед (и секцией DEFAULT),
+    затем создаются первичный ключ (id, created_at), индексы модели и
+    внешние ключи. Последовательность id сохраняется.
+
+    Returns:
+        dict: partitions - создано секций, rows - перенесено строк
+    """
+    if months_ahead is None:
+        months_ahead = current_app.config['NOTIFICATION_PARTITION_MONTHS_AHEAD']
+    table = Notification.__table__
+    with db.engine.begin() as connection:
+        if connection.dialect.name != 'postgresql':
+            raise ValueError('Секционирование notifications доступно только в PostgreSQL')
+        if is_notifications_partitioned(connection):
+            return {'partitions': 0, 'rows': 0}
+
+        connection.execute(text('LOCK TABLE notifications IN ACCESS EXCLUSIVE MODE'))
+        connection.execute(text(
+            "UPDATE notifications SET created_at = (now() AT TIME ZONE 'utc') WHERE created_at IS NULL"
+        ))
+        sequence = connection.execute(text("SELECT pg_get_serial_sequence('notifications', 'id')")).scalar()
+        oldest = connection.execute(text('SELECT min(created_at) FROM notifications')).scalar() or datetime.utcnow()
+
+        connection.execute(text('ALTER TABLE notifications RENAME TO notifications_legacy'))
+        connection.execute(text(
+            'CREATE TABLE notifications (LIKE notifications_legacy INCLUDING DEFAULTS) '
+            'PARTITION BY RANGE (created_at)'
+        ))
+        connection.execute(text('ALTER TABLE notifications ALTER COLUMN created_at SET NOT NULL'))
+
+        month = _month_start(oldest)
+        last_month = _add_months(_month_start(datetime.utcnow()), months_ahead)
+        partitions = 0
+        while month <= last_month:
+            _create_partition(connection, month)
+            partitions += 1
+            month = _add_months(month, 1)
+        connection.execute(text(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF notifications DEFAULT'))
+
+        rows = connection.execute(text('INSERT INTO notifications SELECT * FROM notifications_legacy')).rowcount
+        if sequence:
+            connection.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY notifications.id'))
+        connection.execute(text('DROP TABLE notifications_legacy'))
+
+        # Ключ секционированной таблицы должен включать created_at
+        connection.execute(text('ALTER TABLE notifications ADD PRIMARY KEY (id, created_at)'))
+        for index in table.indexes:
+            index.create(connection)
+        for constraint in table.foreign_key_constraints:
+            connection.execute(AddConstraint(constraint))
+
+    return {'partitions': partitions + 1, 'rows': rows}
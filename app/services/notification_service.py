@@ -1,91 +1,138 @@
+import time
 from datetime import datetime, timedelta
 from app.database import db
 from app.models import Notification, Task, Assignment
+from app.services.notification_counters import add_unread
+from app.services.notification_events import events_required, publish_notification_changes
 
-def create_deadline_notifications():
-    """Создать уведомления о приближающихся дедлайнах"""
-    # Задачи с дедлайном в ближайшие 24 часа
-    tomorrow = datetime.utcnow() + timedelta(days=1)
-    today = datetime.utcnow()
-    
-    upcoming_tasks = Task.query.filter(
-        Task.deadline.between(today, tomorrow),
-        Task.status.in_(['assigned', 'in_progress'])
-    ).all()
-    
-    notifications_created = 0
-    
-    for task in upcoming_tasks:
-        if not task.deadline:
-            continue
-        
-        # Проверяем, не создано ли уже уведомление за последние 6 часов
-        hours_until_deadline = (task.deadline - datetime.utcnow()).total_seconds() / 3600
-        
-        # Создаем уведомления для назначенных сотрудников
-        for assignment in task.assignments:
-            if assignment.assigned_to and assignment.status in ['assigned', 'in_progress']:
-                # Проверяем, нет ли уже такого уведомления
-                existing_notification = Notification.query.filter_by(
-                    user_id=assignment.assigned_to,
-                    type='deadline_approaching',
-                    related_task_id=task.id,
-                    is_read=False
-                ).first()
-                
-                if not existing_notification:
-                    message = f'Дедлайн задачи "{task.title}" через {int(hours_until_deadline)} часов'
-                    if hours_until_deadline < 1:
-                        message = f'Дедлайн задачи "{task.title}" менее чем через час!'
-                    
-                    notification = Notification(
-                        user_id=assignment.assigned_to,
-                        type='deadline_approaching',
-                        title='Приближается дедлайн',
-                        message=message,
-                        related_task_id=task.id,
-                        is_read=False
-                    )
-                    db.session.add(notification)
-                    notifications_created += 1
-    
+ACTIVE_STATUSES = ('assigned', 'in_progress')
+
+# Окно дедупликации уведомлений о просрочке
+OVERDUE_DEDUP_WINDOW = timedelta(days=1)
+
+
+def _notification_candidates(task_filter, notification_type, dedup_filter):
+    """
+    Пары (сотрудник, задача), которым нужно уведомление, одним запросом
+
+    Активные назначения активных задач, для которых нет подходящего
+    уведомления (anti-join NOT EXISTS по индексу
+    (user_id, type, related_task_id, created_at)).
+
+    Returns:
+        list: Строки (user_id, task_id, title, deadline)
+    """
+    existing = db.select(Notification.id).where(
+        Notification.user_id == Assignment.assigned_to,
+        Notification.type == notification_type,
+        Notification.related_task_id == Task.id,
+        dedup_filter
+    )
+    return db.session.query(
+        Assignment.assigned_to, Task.id, Task.title, Task.deadline
+    ).join(
+        Task, Task.id == Assignment.task_id
+    ).filter(
+        task_filter,
+        Task.status.in_(ACTIVE_STATUSES),
+        Assignment.status.in_(ACTIVE_STATUSES),
+        Assignment.assigned_to.isnot(None),
+        ~existing.exists()
+    ).distinct().order_by(Task.id, Assignment.assigned_to).all()
+
+
+def _insert_notifications(rows):
+    """
+    Массовая вставка уведомлений одним INSERT
+
+    Счетчики непрочитанных увеличиваются в той же транзакции. Если у
+    получателей есть подписчики потока уведомлений, вставка возвращает
+    созданные строки (RETURNING) для публикации событий.
+    """
+    if rows:
+        unread = {}
+        for row in rows:
+            unread[row['user_id']] = unread.get(row['user_id'], 0) + 1
+        add_unread(db.session, unread)
+    if rows and events_required({row['user_id'] for row in rows}):
+        notifications = db.session.scalars(db.insert(Notification).returning(Notification), rows).all()
+        publish_notification_changes(db.session, notifications)
+    elif rows:
+        db.session.execute(db.insert(Notification), rows)
     db.session.commit()
-    return notifications_created
+
+
+def create_deadline_notifications():
+    """
+    Создать уведомления о приближающихся дедлайнах (в ближайшие 24 часа)
+
+    Returns:
+        dict: created - создано уведомлений, duration_ms - время выполнения
+    """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    # Не дублируем непрочитанное уведомление о дедлайне
+    candidates = _notification_candidates(
+        Task.deadline.between(now, now + timedelta(days=1)),
+        'deadline_approaching',
+        Notification.is_read.is_(False)
+    )
+
+    rows = []
+    for user_id, task_id, title, deadline in candidates:
+        hours_until_deadline = (deadline - now).total_seconds() / 3600
+        message = f'Дедлайн задачи "{title}" через {int(hours_until_deadline)} часов'
+        if hours_until_deadline < 1:
+            message = f'Дедлайн задачи "{title}" менее чем через час!'
+        rows.append({
+            'user_id': user_id,
+            'type': 'deadline_approaching',
+            'title': 'Приближается дедлайн',
+            'message': message,
+            'related_task_id': task_id,
+            'is_read': False,
+            'created_at': now,
+        })
+
+    _insert_notifications(rows)
+    return {
+        'created': len(rows),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
 
 def create_overdue_notifications():
-    """Создать уведомления о просроченных задачах"""
-    overdue_tasks = Task.query.filter(
-        Task.deadline < datetime.utcnow(),
-        Task.status.in_(['assigned', 'in_progress'])
-    ).all()
-    
-    notifications_created = 0
-    
-    for task in overdue_tasks:
-        for assignment in task.assignments:
-            if assignment.assigned_to and assignment.status in ['assigned', 'in_progress']:
-                # Проверяем, нет ли уже такого уведомления за последние 24 часа
-                yesterday = datetime.utcnow() - timedelta(days=1)
-                existing_notification = Notification.query.filter(
-                    Notification.user_id == assignment.assigned_to,
-                    Notification.type == 'task_overdue',
-                    Notification.related_task_id == task.id,
-                    Notification.created_at > yesterday
-                ).first()
-                
-                if not existing_notification:
-                    days_overdue = (datetime.utcnow() - task.deadline).days
-                    notification = Notification(
-                        user_id=assignment.assigned_to,
-                        type='task_overdue',
-                        title='Просроченная задача',
-                        message=f'Задача "{task.title}" просрочена на {days_overdue} дней',
-                        related_task_id=task.id,
-                        is_read=False
-                    )
-                    db.session.add(notification)
-                    notifications_created += 1
-    
-    db.session.commit()
-    return notifications_created
+    """
+    Создать уведомления о просроченных задачах (не чаще раза в сутки на задачу)
+
+    Returns:
+        dict: created - создано уведомлений, duration_ms - время выполнения
+    """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    candidates = _notification_candidates(
+        Task.deadline < now,
+        'task_overdue',
+        Notification.created_at > now - OVERDUE_DEDUP_WINDOW
+    )
+
+    rows = []
+    for user_id, task_id, title, deadline in candidates:
+        days_overdue = (now - deadline).days
+        rows.append({
+            'user_id': user_id,
+            'type': 'task_overdue',
+            'title': 'Просроченная задача',
+            'message': f'Задача "{title}" просрочена на {days_overdue} дней',
+            'related_task_id': task_id,
+            'is_read': False,
+            'created_at': now,
+        })
 
+    _insert_notifications(rows)
+    return {
+        'created': len(rows),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -0,0 +1,249 @@
+"""
+Фоновый планировщик периодических задач
+
+Задачи (уведомления о дедлайнах и просрочках, обслуживание агрегатов,
+сверка счетчиков непрочитанных, очистка событий потока, хранение
+уведомлений) выполняются вне обработчиков запросов: в фоновом потоке
+процесса (SCHEDULER_ENABLED) или в отдельном процессе (flask run-scheduler).
+
+Каждый запуск выполняется под блокировкой задачи: advisory lock в
+PostgreSQL, файловая блокировка в instance/ для SQLite и прочих БД.
+Под блокировкой проверяется время последнего запуска в job_runs, поэтому
+при нескольких воркерах задача выполняется не чаще заданного интервала.
+Длительность и результат каждого запуска записываются в job_runs.
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+from app.database import db
+from app.models import JobRun
+from app.services.analytics_rollup import backfill_rollup, refresh_rollup
+from app.services.notification_counters import reconcile_unread_counters
+from app.services.notification_events import prune_notification_events
+from app.services.notification_retention import apply_retention
+from app.services.notification_service import create_deadline_notifications, create_overdue_notifications
+from app.services.team_dna_analyzer import rebuild_team_connections
+from app.services.workload_analyzer import reconcile_workloads
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _refresh_analytics_rollup():
+    refresh_rollup()
+    db.session.commit()
+    return {}
+
+
+def _reconcile_workloads():
+    result = reconcile_workloads(fix=True)
+    return {'checked': result['checked'], 'fixed': len(result['drift'])}
+
+
+# Имя задачи -> функция и ключ конфигурации с интервалом (секунды, 0 - выключена)
+SCHEDULED_JOBS = {
+    'deadline_notifications': {
+        'func': create_deadline_notifications,
+        'interval': 'SCHEDULER_DEADLINE_NOTIFICATIONS_INTERVAL',
+    },
+    'overdue_notifications': {
+        'func': create_overdue_notifications,
+        'interval': 'SCHEDULER_OVERDUE_NOTIFICATIONS_INTERVAL',
+    },
+    'analytics_rollup': {
+        'func': _refresh_analytics_rollup,
+        'interval': 'SCHEDULER_ANALYTICS_ROLLUP_INTERVAL',
+    },
+    'analytics_backfill': {
+        'func': backfill_rollup,
+        'interval': 'SCHEDULER_ANALYTICS_BACKFILL_INTERVAL',
+    },
+    'reconcile_workloads': {
+        'func': _reconcile_workloads,
+        'interval': 'SCHEDULER_RECONCILE_WORKLOADS_INTERVAL',
+    },
+    'team_connections': {
+        'func': rebuild_team_connections,
+        'interval': 'SCHEDULER_TEAM_CONNECTIONS_INTERVAL',
+    },
+    'unread_counters': {
+        'func': reconcile_unread_counters,
+        'interval': 'SCHEDULER_UNREAD_COUNTERS_INTERVAL',
+    },
+    'notification_events': {
+        'func': prune_notification_events,
+        'interval': 'SCHEDULER_NOTIFICATION_EVENTS_INTERVAL',
+    },
+    'notification_retention': {
+        'func': apply_retention,
+        'interval': 'SCHEDULER_NOTIFICATION_RETENTION_INTERVAL',
+    },
+}
+
+
+def job_interval(name):
+    """Интервал задачи в секундах (0 - задача выключена)"""
+    return current_app.config[SCHEDULED_JOBS[name]['interval']]
+
+
+def _try_file_lock(handle):
+    try:
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def job_lock(name):
+    """
+    Неблокирующая межпроцессная блокировка задачи
+
+    Yields:
+        bool: True, если блокировка получена
+    """
+    if db.engine.dialect.name == 'postgresql':
+        key = zlib.crc32(f'scheduler:{name}'.encode('utf-8'))
+        with db.engine.connect() as connection:
+            acquired = connection.execute(text('SELECT pg_try_advisory_lock(:key)'), {'key': key}).scalar()
+            try:
+                yield bool(acquired)
+            finally:
+                if acquired:
+                    connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': key})
+        return
+
+    path = os.path.join(current_app.instance_path, f'scheduler-{name}.lock')
+    with open(path, 'a+') as handle:
+        acquired = _try_file_lock(handle)
+        try:
+            yield acquired
+        finally:
+            if acquired and not fcntl:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            # flock снимается при закрытии файла
+
+
+def last_run_started_at(name):
+    """Время начала последнего запуска задачи (любым процессом)"""
+    return db.session.query(db.func.max(JobRun.started_at)).filter(JobRun.job_name == name).scalar()
+
+
+def run_job(name, force=False):
+    """
+    Выполнить задачу под блокировкой и записать результат в job_runs
+
+    Args:
+        name: Имя задачи из SCHEDULED_JOBS
+        force: Выполнить, даже если интервал с прошлого запуска не истек
+
+    Returns:
+        dict | None: Запись о запуске или None, если задачу выполняет
+        другой процесс или она уже выполнялась в текущем интервале
+    """
+    job = SCHEDULED_JOBS[name]
+    with job_lock(name) as acquired:
+        if not acquired:
+            return None
+
+        now = datetime.utcnow()
+        last_started = last_run_started_at(name)
+        if not force and last_started and last_started > now - timedelta(seconds=job_interval(name)):
+            db.session.rollback()
+            return None
+
+        started = time.perf_counter()
+        try:
+            result = json.dumps(job['func'](), ensure_ascii=False, default=str)
+            status = 'success'
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('Scheduler job %s failed', name)
+            result = f'{type(e).__name__}: {e}'
+            status = 'error'
+
+        run = JobRun(
+            job_name=name,
+            started_at=now,
+            duration_ms=round((time.perf_counter() - started) * 1000, 1),
+            status=status,
+            result=result
+        )
+        db.session.add(run)
+        db.session.commit()
+        current_app.logger.info('Scheduler job %s: %s in %.1f ms', name, status, run.duration_ms)
+        return run.to_dict()
+
+
+def run_pending_jobs(next_runs):
+    """
+    Выполнить задачи, срок которых наступил
+
+    Args:
+        next_runs: Словарь имя задачи -> время следующей проверки
+            (обновляется на месте)
+
+    Returns:
+        list: Записи о выполненных запусках
+    """
+    runs = []
+    for name in SCHEDULED_JOBS:
+        interval = job_interval(name)
+        now = datetime.utcnow()
+        if not interval or now < next_runs.get(name, now):
+            continue
+        run = run_job(name)
+        if run:
+            runs.append(run)
+        last_started = last_run_started_at(name) or now
+        next_runs[name] = max(last_started + timedelta(seconds=interval), now)
+    db.session.remove()
+    return runs
+
+
+def run_scheduler(app, stop_event=None):
+    """
+    Цикл планировщика (до установки stop_event)
+
+    Args:
+        app: Приложение Flask
+        stop_event: threading.Event для остановки цикла
+    """
+    stop_event = stop_event or threading.Event()
+    next_runs = {}
+    while not stop_event.is_set():
+        with app.app_context():
+            try:
+                run_pending_jobs(next_runs)
+            except Exception:
+                app.logger.exception('Scheduler iteration failed')
+                db.session.remove()
+        stop_event.wait(app.config['SCHEDULER_TICK'])
+
+
+def start_scheduler(app):
+    """
+    Запустить планировщик в фоновом потоке процесса
+
+    Returns:
+        threading.Event: Событие остановки планировщика
+    """
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_scheduler, args=(app, stop_event), name='workflowgenius-scheduler', daemon=True
+    )
+    thread.start()
+    return stop_event
@@ -0,0 +1,185 @@
+"""
+Векторизованный движок оценки пригодности сотрудников
+
+Загружает компетенции, загруженность и предпочтения всех кандидатов
+одним набором запросов и считает оценки пригодности для всех пар
+задача × сотрудник за один проход на NumPy.
+
+Эталонная (поштучная) реализация - task_distributor.calculate_suitability_score;
+результаты движка совпадают с ней с точностью до погрешности float.
+"""
+from datetime import datetime
+import numpy as np
+from app.models import UserCompetency, WorkPreference
+from app.services.skill_matcher import extract_task_skills, text_has_skill
+
+
+LEVEL_WEIGHTS = {
+    'expert': 1.0,
+    'advanced': 0.8,
+    'intermediate': 0.6,
+}
+DEFAULT_LEVEL_WEIGHT = 0.4
+
+
+def load_candidate_features(users):
+    """
+    Загрузить признаки кандидатов одним набором запросов
+
+    Args:
+        users: Список объектов User
+
+    Returns:
+        dict: Массивы признаков, выровненные по порядку users
+    """
+    user_ids = [u.id for u in users]
+    position = {user_id: i for i, user_id in enumerate(user_ids)}
+
+    competencies = UserCompetency.query.filter(
+        UserCompetency.user_id.in_(user_ids)
+    ).all() if user_ids else []
+    preference_user_ids = {
+        row[0] for row in WorkPreference.query.filter(
+            WorkPreference.user_id.in_(user_ids)
+        ).with_entities(WorkPreference.user_id).all()
+    } if user_ids else set()
+
+    # Компетенции: индекс навыка, индекс сотрудника и вес (уровень × опыт)
+    skills = []
+    skill_index = {}
+    comp_skill = []
+    comp_user = []
+    comp_weight = []
+    for comp in competencies:
+        skill_lower = comp.skill_name.lower()
+        if skill_lower not in skill_index:
+            skill_index[skill_lower] = len(skills)
+            skills.append(skill_lower)
+        weight = LEVEL_WEIGHTS.get(comp.level, DEFAULT_LEVEL_WEIGHT)
+        experience_multiplier = min(comp.experience_years / 5.0, 1.0)
+        weight *= (0.5 + 0.5 * experience_multiplier)
+        comp_skill.append(skill_index[skill_lower])
+        comp_user.append(position[comp.user_id])
+        comp_weight.append(weight)
+
+    comp_user = np.array(comp_user, dtype=np.int64)
+    comp_weight = np.array(comp_weight, dtype=np.float64)
+
+    current = np.array([u.current_workload or 0 for u in users], dtype=np.float64)
+    maximum = np.array([u.max_workload or 0 for u in users], dtype=np.float64)
+
+    return {
+        'users': list(users),
+        'skills': skills,
+        'comp_skill': np.array(comp_skill, dtype=np.int64),
+        'comp_user': comp_user,
+        'comp_weight': comp_weight,
+        'comp_count': np.bincount(comp_user, minlength=len(users)),
+        'comp_total_weight': np.bincount(comp_user, weights=comp_weight, minlength=len(users)),
+        'current_workload': current,
+        'max_workload': maximum,
+        'has_preference': np.array([u.id in preference_user_ids for u in users], dtype=bool),
+    }
+
+
+def _competence_matrix(features, tasks):
+    """Матрица соответствия компетенций (задачи × сотрудники)"""
+    n_users = len(features['users'])
+    result = np.full((len(tasks), n_users), 0.5)
+    if not features['skills']:
+        return result
+
+    # Какие навыки встречаются в тексте каждой задачи (автомат по словарю навыков)
+    skill_hits = np.zeros((len(tasks), len(features['skills'])), dtype=bool)
+    for row, task in enumerate(tasks):
+        text = (task.description or task.title or '').lower()
+        found_skills = extract_task_skills(task)
+        skill_hits[row] = [text_has_skill(skill, text, found_skills) for skill in features['skills']]
+
+    comp_hit = skill_hits[:, features['comp_skill']]
+    matches = np.zeros((len(tasks), n_users))
+    for row in range(len(tasks)):
+        matches[row] = np.bincount(
+            features['comp_user'],
+            weights=features['comp_weight'] * comp_hit[row],
+            minlength=n_users
+        )
+
+    total = features['comp_total_weight']
+    has_weight = (features['comp_count'] > 0) & (total > 0)
+    result[:, has_weight] = np.minimum(matches[:, has_weight] / total[has_weight], 1.0)
+    return result
+
+
+def _load_scores(features):
+    """Оценка загруженности: 1 - текущая/максимальная"""
+    current = features['current_workload']
+    maximum = features['max_workload']
+    load = np.divide(current, maximum, out=np.zeros_like(current), where=maximum != 0)
+    return np.maximum(0.0, 1.0 - load)
+
+
+def score_matrix(features, tasks, ai_settings, now=None):
+    """
+    Рассчитать оценки пригодности для всех пар задача × сотрудник
+
+    Args:
+        features: Результат load_candidate_features
+        tasks: Список объектов Task
+        ai_settings: Объект AISettings
+        now: Текущее время (для оценки дедлайнов)
+
+    Returns:
+        np.ndarray: Матрица оценок (len(tasks) × len(users)), значения 0-1
+    """
+    now = now or datetime.utcnow()
+    n_users = len(features['users'])
+    if not tasks or not n_users:
+        return np.zeros((len(tasks), n_users))
+
+    competence = _competence_matrix(features, tasks)
+    load = np.broadcast_to(_load_scores(features), competence.shape)
+
+    # Оценка предпочтений времени: 0.5 без предпочтений или без дедлайна
+    deadline_score = np.array([
+        0.5 if not task.deadline else (0.7 if task.deadline > now else 0.3)
+        for task in tasks
+    ])
+    time_score = np.where(features['has_preference'], deadline_score[:, None], 0.5)
+
+    # Оценка по приоритету задачи
+    priority_score = np.empty_like(competence)
+    for row, task in enumerate(tasks):
+        if task.priority == 'urgent':
+            priority_score[row] = load[row]
+        elif task.priority == 'high':
+            priority_score[row] = 0.7 + 0.3 * load[row]
+        else:
+            priority_score[row] = 0.5 + 0.5 * load[row]
+
+    weights = np.array([
+        ai_settings.competence_weight,
+        ai_settings.load_weight,
+        ai_settings.time_preference_weight,
+        ai_settings.priority_weight,
+    ]) / 100.0
+    total_weight = weights.sum()
+    if total_weight == 0:
+        return np.full(competence.shape, 0.5)
+
+    weighted_sum = (
+        competence * weights[0] + load * weights[1] +
+        time_score * weights[2] + priority_score * weights[3]
+    )
+    return np.clip(weighted_sum / total_weight, 0.0, 1.0)
+
+
+def score_candidates(users, task, ai_settings):
+    """
+    Рассчитать оценки пригодности всех кандидатов для одной задачи
+
+    Returns:
+        np.ndarray: Оценки (0-1) в порядке users
+    """
+    features = load_candidate_features(users)
+    return score_matrix(features, [task], ai_settings)[0]
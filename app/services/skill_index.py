@@ -0,0 +1,89 @@
+"""
+Инвертированный индекс навык → сотрудники
+
+Используется для предварительного отбора кандидатов при автоматическом
+назначении: полная оценка пригодности считается только для сотрудников,
+у которых есть хотя бы один навык из задачи.
+
+Индекс строится лениво из UserCompetency и обновляется инкрементально
+при добавлении и удалении компетенций (blueprint team). Индекс живет
+в процессе, поэтому на случай изменений в других воркерах он
+перестраивается по истечении SKILL_INDEX_TTL секунд.
+"""
+import time
+from flask import current_app
+from app.models import UserCompetency
+
+
+# skill_name (нижний регистр) -> {competency_id: {'user_id', 'level', 'experience_years'}}
+_index = None
+_index_built_at = 0.0
+
+
+def _entry(competency):
+    return {
+        'user_id': competency.user_id,
+        'level': competency.level,
+        'experience_years': float(competency.experience_years or 0),
+    }
+
+
+def get_skill_index():
+    """Получить индекс навык → сотрудники (строится лениво)"""
+    global _index, _index_built_at
+    ttl = current_app.config['SKILL_INDEX_TTL']
+    if _index is None or time.monotonic() - _index_built_at > ttl:
+        index = {}
+        for competency in UserCompetency.query.all():
+            index.setdefault(competency.skill_name.lower(), {})[competency.id] = _entry(competency)
+        _index = index
+        _index_built_at = time.monotonic()
+    return _index
+
+
+def add_competency_to_index(competency):
+    """Добавить компетенцию в индекс (если он уже построен)"""
+    if _index is None:
+        return
+    _index.setdefault(competency.skill_name.lower(), {})[competency.id] = _entry(competency)
+
+
+def remove_competency_from_index(competency_id, skill_name):
+    """Удалить компетенцию из индекса (если он уже построен)"""
+    if _index is None:
+        return
+    skill_lower = skill_name.lower()
+    entries = _index.get(skill_lower)
+    if entries is None:
+        return
+    entries.pop(competency_id, None)
+    if not entries:
+        del _index[skill_lower]
+
+
+def reset_skill_index():
+    """Сбросить индекс (будет перестроен при следующем обращении)"""
+    global _index
+    _index = None
+
+
+def find_skill_experts(skills):
+    """
+    Найти сотрудников, у которых есть хотя бы один из навыков
+
+    Args:
+        skills: Навыки (в нижнем регистре)
+
+    Returns:
+        dict: user_id -> список совпавших навыков с уровнем и опытом
+    """
+    index = get_skill_index()
+    experts = {}
+    for skill in skills:
+        for entry in index.get(skill, {}).values():
+            experts.setdefault(entry['user_id'], []).append({
+                'skill_name': skill,
+                'level': entry['level'],
+                'experience_years': entry['experience_years'],
+            })
+    return experts
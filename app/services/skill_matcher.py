@@ -0,0 +1,147 @@
+"""
+Общий словарь навыков и многошаблонный поиск навыков в тексте задач
+
+Словарь строится из всех различных UserCompetency.skill_name и
+компилируется в автомат Ахо-Корасик: все навыки из словаря находятся
+в тексте задачи за один проход. Результат кэшируется по задаче,
+пока не изменится её текст.
+
+Кэш живет в процессе; он сбрасывается при добавлении и удалении
+компетенций (blueprint team) и, на случай изменений в других
+воркерах, по истечении SKILL_MATCHER_TTL секунд.
+"""
+import time
+from collections import OrderedDict, deque
+from flask import current_app
+from app.database import db
+from app.models import UserCompetency
+
+
+class SkillMatcher:
+    """Автомат Ахо-Корасик для поиска навыков (подстрок) в тексте"""
+
+    def __init__(self, skills):
+        self.skills = frozenset(s for s in skills if s)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [frozenset()]
+
+        outputs = [set()]
+        for skill in self.skills:
+            node = 0
+            for char in skill:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            outputs[node].add(skill)
+
+        # Суффиксные ссылки строятся обходом в ширину
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                outputs[child] |= outputs[self._fail[child]]
+
+        self._output = [frozenset(o) for o in outputs]
+
+    def find(self, text):
+        """
+        Найти все навыки словаря, встречающиеся в тексте
+
+        Args:
+            text: Текст в нижнем регистре
+
+        Returns:
+            frozenset: Найденные навыки
+        """
+        found = set()
+        node = 0
+        goto = self._goto
+        fail = self._fail
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if self._output[node]:
+                found |= self._output[node]
+        return frozenset(found)
+
+
+_matcher = None
+_matcher_built_at = 0.0
+_task_skills_cache = OrderedDict()
+
+
+def get_skill_matcher():
+    """Получить скомпилированный словарь навыков (строится лениво)"""
+    global _matcher, _matcher_built_at
+    ttl = current_app.config['SKILL_MATCHER_TTL']
+    if _matcher is None or time.monotonic() - _matcher_built_at > ttl:
+        skills = [
+            row[0].lower() for row in
+            db.session.query(UserCompetency.skill_name).distinct().all()
+            if row[0]
+        ]
+        _matcher = SkillMatcher(skills)
+        _matcher_built_at = time.monotonic()
+        _task_skills_cache.clear()
+    return _matcher
+
+
+def invalidate_skill_matcher():
+    """Сбросить словарь навыков и кэш навыков задач"""
+    global _matcher
+    _matcher = None
+    _task_skills_cache.clear()
+
+
+def extract_skills(text):
+    """Найти навыки словаря в произвольном тексте"""
+    return get_skill_matcher().find(text.lower() if text else '')
+
+
+def extract_task_skills(task):
+    """
+    Найти навыки словаря в тексте задачи (описание, либо название)
+
+    Результат кэшируется по ID задачи, пока не изменится её текст.
+
+    Returns:
+        frozenset: Навыки в нижнем регистре
+    """
+    text = (task.description or task.title or '').lower()
+    matcher = get_skill_matcher()
+    if task.id is None:
+        return matcher.find(text)
+
+    cached = _task_skills_cache.get(task.id)
+    if cached is not None and cached[0] == text:
+        _task_skills_cache.move_to_end(task.id)
+        return cached[1]
+
+    skills = matcher.find(text)
+    _task_skills_cache[task.id] = (text, skills)
+    _task_skills_cache.move_to_end(task.id)
+    while len(_task_skills_cache) > current_app.config['SKILL_MATCHER_CACHE_SIZE']:
+        _task_skills_cache.popitem(last=False)
+    return skills
+
+
+def text_has_skill(skill_lower, text_lower, found_skills):
+    """
+    Проверить, встречается ли навык в тексте
+
+    Навыки из словаря проверяются по результату автомата; навыки,
+    появившиеся после построения словаря, - прямым поиском подстроки.
+    """
+    if skill_lower in get_skill_matcher().skills:
+        return skill_lower in found_skills
+    return skill_lower in text_lower
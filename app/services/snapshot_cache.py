@@ -0,0 +1,167 @@
+"""
+Кэш снимков (snapshot) тяжелых вычислений с TTL и инвалидацией по записи
+
+Бэкенды (SNAPSHOT_CACHE_BACKEND):
+- local - словарь в памяти процесса (по умолчанию). Каждый воркер gunicorn
+  хранит свой снимок; изменения в других воркерах видны по истечении TTL.
+- database - таблица cache_entries в основной БД, общая для всех воркеров.
+
+Инвалидация: сервисы регистрируют ключ и набор моделей; после коммита
+сессии, в которой менялись экземпляры этих моделей, ключ удаляется.
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.database import db
+from app.models import CacheEntry
+
+
+class LocalSnapshotBackend:
+    """Хранилище снимков в памяти процесса"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry['expires_at'] <= datetime.utcnow():
+            return None
+        return entry['value'], entry['generated_at']
+
+    def set(self, key, value, generated_at, ttl):
+        with self._lock:
+            self._entries[key] = {
+                'value': value,
+                'generated_at': generated_at,
+                'expires_at': generated_at + timedelta(seconds=ttl),
+            }
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class DatabaseSnapshotBackend:
+    """Хранилище снимков в таблице cache_entries (общее для всех воркеров)"""
+
+    def get(self, key):
+        with db.engine.connect() as connection:
+            row = connection.execute(
+                db.select(CacheEntry.value, CacheEntry.generated_at).where(
+                    CacheEntry.key == key,
+                    CacheEntry.expires_at > datetime.utcnow()
+                )
+            ).first()
+        if row is None:
+            return None
+        return json.loads(row.value), row.generated_at
+
+    def set(self, key, value, generated_at, ttl):
+        # Отдельное соединение: запись снимка не должна зависеть от транзакции запроса
+        with db.engine.begin() as connection:
+            connection.execute(db.delete(CacheEntry).where(CacheEntry.key == key))
+            connection.execute(db.insert(CacheEntry).values(
+                key=key,
+                value=json.dumps(value),
+                generated_at=generated_at,
+                expires_at=generated_at + timedelta(seconds=ttl),
+            ))
+
+    def delete(self, keys):
+        with db.engine.begin() as connection:
+            connection.execute(db.delete(CacheEntry).where(CacheEntry.key.in_(list(keys))))
+
+
+SNAPSHOT_BACKENDS = {
+    'local': LocalSnapshotBackend,
+    'database': DatabaseSnapshotBackend,
+}
+
+# ключ снимка -> модели, запись которых делает снимок устаревшим
+_invalidation_rules = {}
+
+
+def get_snapshot_backend(app=None):
+    """Получить бэкенд кэша снимков текущего приложения"""
+    app = app or current_app._get_current_object()
+    backend = app.extensions.get('snapshot_cache')
+    if backend is None:
+        backend_name = app.config['SNAPSHOT_CACHE_BACKEND']
+        if backend_name not in SNAPSHOT_BACKENDS:
+            raise ValueError(f'Неизвестный бэкенд кэша снимков: {backend_name}')
+        backend = SNAPSHOT_BACKENDS[backend_name]()
+        app.extensions['snapshot_cache'] = backend
+    return backend
+
+
+def get_snapshot(key, ttl, compute):
+    """
+    Получить снимок из кэша или вычислить и сохранить его
+
+    Args:
+        key: Ключ снимка
+        ttl: Время жизни в секундах
+        compute: Функция без аргументов, возвращающая JSON-сериализуемое значение
+
+    Returns:
+        tuple: (значение, время генерации снимка)
+    """
+    backend = get_snapshot_backend()
+    cached = backend.get(key)
+    if cached is not None:
+        return cached
+
+    value = compute()
+    generated_at = datetime.utcnow()
+    backend.set(key, value, generated_at, ttl)
+    return value, generated_at
+
+
+def snapshot_age_seconds(generated_at):
+    """Возраст снимка в секундах"""
+    return round((datetime.utcnow() - generated_at).total_seconds(), 1)
+
+
+def invalidate_snapshots(*keys):
+    """Явно сбросить снимки"""
+    if keys:
+        get_snapshot_backend().delete(keys)
+
+
+def register_snapshot_invalidation(key, models):
+    """
+    Сбрасывать снимок key после коммита изменений моделей
+
+    Args:
+        key: Ключ снимка
+        models: Классы моделей, запись которых инвалидирует снимок
+    """
+    _invalidation_rules.setdefault(key, set()).update(models)
+
+
+@event.listens_for(Session, 'before_flush', propagate=True)
+def _collect_changed_models(session, flush_context, instances):
+    changed = session.info.setdefault('snapshot_changed_models', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        changed.add(type(instance))
+
+
+@event.listens_for(Session, 'after_commit', propagate=True)
+def _invalidate_after_commit(session):
+    changed = session.info.pop('snapshot_changed_models', None)
+    if not changed:
+        return
+    keys = [key for key, models in _invalidation_rules.items() if models & changed]
+    if keys and has_app_context():
+        get_snapshot_backend().delete(keys)
+
+
+@event.listens_for(Session, 'after_rollback', propagate=True)
+def _forget_changes_after_rollback(session):
+    session.info.pop('snapshot_changed_models', None)
@@ -1,8 +1,17 @@
+import numpy as np
+from sqlalchemy import or_
 from app.database import db
 from app.models import User, Task, Assignment, AISettings
 from app.services.competence_analyzer import calculate_competence_match, get_competence_score
-from app.services.workload_analyzer import calculate_load_score, get_available_capacity
+from app.services.workload_analyzer import calculate_load_score, reserve_workload
 from app.services.time_preference_analyzer import calculate_time_preference_score
+from app.services.scoring_engine import score_candidates, load_candidate_features, score_matrix
+from app.services.skill_index import find_skill_experts
+from app.services.skill_matcher import extract_task_skills
+
+
+# Стоимость недопустимого назначения в задаче о назначениях
+FORBIDDEN_COST = 1e9
 
 
 def get_ai_settings():
@@ -19,6 +28,9 @@ def calculate_suitability_score(user, task, ai_settings):
     """
     Рассчитать общую оценку пригодности пользователя для задачи
     
+    Эталонная поштучная реализация. Для массовой оценки используется
+    векторизованный движок scoring_engine, результаты которого совпадают с этой функцией.
+    
     Args:
         user: Объект User
         task: Объект Task
@@ -69,24 +81,34 @@ def calculate_suitability_score(user, task, ai_settings):
     return min(max(final_score, 0.0), 1.0)
 
 
+def get_workload_points(task):
+    """Рассчитать workload_points задачи на основе приоритета"""
+    if task.priority == 'urgent':
+        return 20
+    if task.priority == 'high':
+        return 15
+    if task.priority == 'low':
+        return 5
+    return 10
+
+
 def assign_task_automatically(task_id, assigned_by):
     """
     Автоматически назначить задачу сотруднику с учетом ИИ-анализа
     
     Улучшенный алгоритм:
     1. Получить настройки ИИ
-    2. Найти всех доступных сотрудников
-    3. Для каждого рассчитать оценку пригодности (suitability score)
-    4. Выбрать сотрудника с максимальной оценкой
+    2. Найти доступных сотрудников с навыками задачи (или всех доступных)
+    3. Рассчитать оценки пригодности (suitability score) для всех сразу
+    4. Выбрать сотрудника с максимальной оценкой и атомарно
+       зарезервировать его емкость (при конфликте - следующий кандидат)
     5. Создать назначение с сохранением оценки
-    6. Обновить загруженность сотрудника
     """
     task = Task.query.get(task_id)
     if not task:
         return None
     
     # Проверка: задача уже назначена?
-    from sqlalchemy import or_
     existing_assignment = Assignment.query.filter(
         Assignment.task_id == task_id,
         or_(Assignment.status == 'assigned', Assignment.status == 'in_progress')
@@ -98,47 +120,47 @@ def assign_task_automatically(task_id, assigned_by):
     ai_settings = get_ai_settings()
     
     # Получить доступных сотрудников
-    available_users = User.query.filter(
+    available_query = User.query.filter(
         User.role == 'employee',
         User.current_workload < User.max_workload
-    ).all()
+    )
     
+    # Предварительный отбор: только сотрудники хотя бы с одним навыком задачи
+    available_users = []
+    expert_ids = find_skill_experts(extract_task_skills(task))
+    if expert_ids:
+        available_users = available_query.filter(User.id.in_(list(expert_ids))).all()
     if not available_users:
-        return None
-    
-    # Рассчитать оценки пригодности для каждого сотрудника
-    user_scores = []
-    for user in available_users:
-        suitability_score = calculate_suitability_score(user, task, ai_settings)
-        user_scores.append({
-            'user': user,
-            'score': suitability_score
-        })
+        # Совпадений нет - оцениваем всех доступных
+        available_users = available_query.all()
     
-    # Сортировка по оценке (от большего к меньшему)
-    user_scores.sort(key=lambda x: x['score'], reverse=True)
+    if not available_users:
+        return None
     
-    # Выбрать лучшего сотрудника
-    selected_data = user_scores[0]
-    selected_user = selected_data['user']
-    suitability_score = selected_data['score']
+    # Рассчитать оценки пригодности для кандидатов за один проход
+    scores = score_candidates(available_users, task, ai_settings)
     
     # Рассчитать workload_points на основе приоритета
-    workload_points = 10
-    if task.priority == 'urgent':
-        workload_points = 20
-    elif task.priority == 'high':
-        workload_points = 15
-    elif task.priority == 'low':
-        workload_points = 5
+    task_points = get_workload_points(task)
     
-    # Проверка доступной емкости
-    available_capacity = get_available_capacity(selected_user.id)
-    if available_capacity < workload_points:
+    # Кандидаты по убыванию оценки (при равенстве - в порядке списка).
+    # Емкость резервируется атомарно; если кандидата параллельно заняли,
+    # пробуем следующего.
+    selected_user = None
+    for index in sorted(range(len(available_users)), key=lambda i: scores[i], reverse=True):
+        candidate = available_users[index]
+        
         # Если недостаточно места, уменьшаем workload_points
-        workload_points = available_capacity
+        workload_points = min(task_points, (candidate.max_workload or 0) - (candidate.current_workload or 0))
+        if workload_points <= 0:
+            continue
+        
+        if reserve_workload(candidate.id, workload_points):
+            selected_user = candidate
+            suitability_score = float(scores[index])
+            break
     
-    if workload_points <= 0:
+    if selected_user is None:
         return None
     
     # Создать назначение
@@ -151,14 +173,208 @@ def assign_task_automatically(task_id, assigned_by):
         suitability_score=suitability_score
     )
     
-    # Обновить загруженность сотрудника
-    selected_user.current_workload = min(
-        selected_user.current_workload + workload_points,
-        selected_user.max_workload
-    )
-    
     db.session.add(assignment)
     db.session.commit()
     
     return assignment
 
+
+def _hungarian(cost):
+    """
+    Венгерский алгоритм (кратчайшие увеличивающие пути) для прямоугольной матрицы
+
+    Args:
+        cost: Матрица стоимостей n × m, n <= m
+
+    Returns:
+        np.ndarray: Для каждой строки - индекс назначенного столбца
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)  # p[j] - строка (с 1), назначенная столбцу j
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            free[0] = False
+            current = np.full(m + 1, np.inf)
+            current[1:] = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free & (current < minv)
+            minv[improve] = current[improve]
+            way[improve] = j0
+            candidates = np.where(free, minv, np.inf)
+            j1 = int(candidates.argmin())
+            delta = candidates[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    result = np.full(n, -1, dtype=np.int64)
+    for j in range(1, m + 1):
+        if p[j]:
+            result[p[j] - 1] = j - 1
+    return result
+
+
+def solve_capacitated_assignment(scores, points, capacities):
+    """
+    Распределить задачи между сотрудниками с ограничением по емкости
+
+    Максимизирует суммарную оценку пригодности. Каждый сотрудник
+    разворачивается в набор "слотов", и задача о назначениях решается
+    венгерским алгоритмом. Если задачи имеют разный вес (workload_points),
+    назначения, превышающие емкость сотрудника, снимаются (начиная с
+    наименее подходящих), и оставшиеся задачи распределяются повторно
+    по остаточной емкости.
+
+    Args:
+        scores: Матрица оценок (задачи × сотрудники)
+        points: workload_points каждой задачи
+        capacities: Доступная емкость каждого сотрудника
+
+    Returns:
+        dict: Индекс задачи -> индекс сотрудника (неназначенные задачи отсутствуют)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    points = np.asarray(points, dtype=np.int64)
+    remaining = np.asarray(capacities, dtype=np.int64).copy()
+    pending = list(range(scores.shape[0]))
+    result = {}
+
+    while pending:
+        pending_points = points[pending]
+        min_points = int(pending_points.min())
+        if min_points <= 0:
+            raise ValueError('workload_points должны быть положительными')
+        slots = np.minimum(np.maximum(remaining, 0) // min_points, len(pending))
+        if slots.sum() == 0:
+            break
+
+        # Столбцы: слоты сотрудников + фиктивные столбцы "не назначено"
+        slot_owner = np.repeat(np.arange(len(remaining)), slots)
+        cost = np.zeros((len(pending), len(slot_owner) + len(pending)))
+        cost[:, :len(slot_owner)] = -scores[np.ix_(pending, slot_owner)]
+        # Задача, не помещающаяся в емкость сотрудника целиком, туда не назначается
+        too_big = pending_points[:, None] > remaining[slot_owner][None, :]
+        cost[:, :len(slot_owner)][too_big] = FORBIDDEN_COST
+        columns = _hungarian(cost)
+
+        chosen = {}
+        for row, column in enumerate(columns):
+            if column < len(slot_owner) and cost[row, column] < FORBIDDEN_COST:
+                chosen.setdefault(int(slot_owner[column]), []).append(pending[row])
+
+        assigned_now = []
+        for user_index, task_indices in chosen.items():
+            # Снимаем наименее подходящие задачи, пока не уложимся в емкость
+            task_indices.sort(key=lambda t: scores[t, user_index], reverse=True)
+            for task_index in task_indices:
+                if points[task_index] <= remaining[user_index]:
+                    remaining[user_index] -= points[task_index]
+                    result[task_index] = user_index
+                    assigned_now.append(task_index)
+
+        if not assigned_now:
+            break
+        assigned_set = set(assigned_now)
+        pending = [t for t in pending if t not in assigned_set]
+
+    return result
+
+
+def assign_tasks_batch(task_ids, assigned_by):
+    """
+    Массово назначить задачи с оптимальным распределением по команде
+
+    Матрица пригодности задачи × сотрудники строится один раз,
+    после чего решается задача о назначениях с ограничением емкости
+    (max_workload - current_workload). Загруженность резервируется
+    атомарно; назначения добавляются в сессию без коммита, чтобы вызывающий
+    код зафиксировал все изменения одной транзакцией.
+
+    Args:
+        task_ids: ID задач для назначения
+        assigned_by: ID пользователя, выполняющего назначение
+
+    Назначаются только ожидающие задачи (status == 'pending') без активного
+    назначения; остальные переданные ID возвращаются как пропущенные.
+
+    Returns:
+        tuple: (список созданных Assignment, список ID неназначенных задач,
+            список ID пропущенных задач - не найдены, не pending или уже назначены)
+    """
+    if not task_ids:
+        return [], [], []
+
+    tasks = Task.query.filter(Task.id.in_(task_ids), Task.status == 'pending').order_by(Task.id).all()
+
+    # Пропускаем задачи, у которых уже есть активное назначение
+    already_assigned = {
+        row[0] for row in Assignment.query.filter(
+            Assignment.task_id.in_([t.id for t in tasks]),
+            or_(Assignment.status == 'assigned', Assignment.status == 'in_progress')
+        ).with_entities(Assignment.task_id).all()
+    }
+    tasks = [t for t in tasks if t.id not in already_assigned]
+    eligible = {t.id for t in tasks}
+    skipped = sorted({task_id for task_id in task_ids if task_id not in eligible})
+    if not tasks:
+        return [], [], skipped
+
+    available_users = User.query.filter(
+        User.role == 'employee',
+        User.current_workload < User.max_workload
+    ).order_by(User.id).all()
+    if not available_users:
+        return [], [t.id for t in tasks], skipped
+
+    ai_settings = get_ai_settings()
+    features = load_candidate_features(available_users)
+    scores = score_matrix(features, tasks, ai_settings)
+    points = [get_workload_points(t) for t in tasks]
+    capacities = [max(0, (u.max_workload or 0) - (u.current_workload or 0)) for u in available_users]
+
+    solution = solve_capacitated_assignment(scores, points, capacities)
+
+    assignments = []
+    unassigned = []
+    for task_index, task in enumerate(tasks):
+        if task_index not in solution:
+            unassigned.append(task.id)
+            continue
+        user_index = solution[task_index]
+        user = available_users[user_index]
+        if not reserve_workload(user.id, points[task_index]):
+            # Емкость параллельно заняли другие назначения
+            unassigned.append(task.id)
+            continue
+        assignment = Assignment(
+            task_id=task.id,
+            assigned_to=user.id,
+            assigned_by=assigned_by,
+            workload_points=points[task_index],
+            status='assigned',
+            suitability_score=float(scores[task_index, user_index])
+        )
+        task.status = 'assigned'
+        assignments.append(assignment)
+
+    db.session.add_all(assignments)
+    db.session.flush()
+
+    return assignments, unassigned, skipped
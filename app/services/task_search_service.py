@@ -0,0 +1,160 @@
+"""
+Сервис полнотекстового поиска задач
+
+PostgreSQL: генерируемая колонка tasks.search_vector (tsvector) с GIN-индексом.
+SQLite: теневая таблица FTS5 tasks_fts, синхронизируемая триггерами
+на вставку, обновление и удаление задач.
+Если ни один из вариантов недоступен, поиск возвращается к ILIKE.
+"""
+import re
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from app.database import db
+from app.models import User, Assignment
+
+
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, content='tasks', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+SQLITE_FTS_TRIGGERS = ('tasks_fts_ai', 'tasks_fts_ad', 'tasks_fts_au')
+
+POSTGRES_FTS_DDL = [
+    """
+    ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{language}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{language}', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+]
+
+
+def init_task_search(app):
+    """
+    Создать структуры полнотекстового поиска для текущей БД
+
+    Вызывается из create_app после db.create_all(). Операции идемпотентны.
+    Выбранный бэкенд сохраняется в app.extensions['task_search'].
+    """
+    backend = None
+    dialect = db.engine.dialect.name
+    try:
+        if dialect == 'sqlite':
+            existing = set(db.session.execute(
+                text("SELECT name FROM sqlite_master WHERE name = 'tasks_fts' OR type = 'trigger'")
+            ).scalars())
+            for statement in SQLITE_FTS_DDL:
+                db.session.execute(text(statement))
+            if not existing.issuperset(('tasks_fts',) + SQLITE_FTS_TRIGGERS):
+                # FTS-таблицы или триггеров не было (например, после drop_all
+                # таблицы tasks): задачи, записанные без триггеров, не
+                # проиндексированы - перестраиваем индекс целиком
+                db.session.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+            backend = 'fts5'
+        elif dialect == 'postgresql':
+            language = app.config['TASK_SEARCH_LANGUAGE']
+            for statement in POSTGRES_FTS_DDL:
+                db.session.execute(text(statement.format(language=language)))
+            backend = 'postgresql'
+        db.session.commit()
+    except DBAPIError:
+        # FTS5 не скомпилирован в SQLite или нет прав на DDL - остаемся на ILIKE
+        db.session.rollback()
+        backend = None
+
+    app.extensions['task_search'] = backend
+    return backend
+
+
+def _tokenize(search):
+    """Разбить поисковую строку на слова"""
+    return re.findall(r'\w+', search.lower())
+
+
+def search_task_ids(search):
+    """
+    Найти задачи по названию, описанию и имени назначенного сотрудника
+
+    Args:
+        search: Поисковая строка
+
+    Returns:
+        list | None: ID задач, упорядоченные по релевантности,
+            или None, если полнотекстовый индекс недоступен
+    """
+    backend = current_app.extensions.get('task_search')
+    tokens = _tokenize(search)
+    if backend is None or not tokens:
+        return None
+
+    max_results = current_app.config['TASK_SEARCH_MAX_RESULTS']
+
+    if backend == 'fts5':
+        # Каждое слово - префиксный запрос, слова объединяются по AND
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        rows = db.session.execute(
+            text(
+                "SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH :match "
+                "ORDER BY bm25(tasks_fts, 10.0, 1.0) LIMIT :limit"
+            ),
+            {'match': match, 'limit': max_results}
+        ).all()
+    else:
+        ts_query = ' & '.join(f'{token}:*' for token in tokens)
+        rows = db.session.execute(
+            text(
+                "SELECT id FROM tasks, to_tsquery(CAST(:language AS regconfig), :query) AS query "
+                "WHERE search_vector @@ query "
+                "ORDER BY ts_rank_cd(search_vector, query) DESC, id DESC LIMIT :limit"
+            ),
+            {
+                'language': current_app.config['TASK_SEARCH_LANGUAGE'],
+                'query': ts_query,
+                'limit': max_results,
+            }
+        ).all()
+
+    task_ids = [row[0] for row in rows]
+
+    # Совпадения по имени исполнителя ранжируются после текстовых.
+    # Таблица пользователей небольшая, поэтому ILIKE здесь допустим.
+    if len(task_ids) < max_results:
+        found = set(task_ids)
+        name_matches = db.session.query(Assignment.task_id).join(
+            User, Assignment.assigned_to == User.id
+        ).filter(
+            User.name.ilike(f'%{search}%')
+        ).distinct().order_by(Assignment.task_id.desc()).limit(max_results).all()
+        for (task_id,) in name_matches:
+            if task_id not in found and len(task_ids) < max_results:
+                task_ids.append(task_id)
+                found.add(task_id)
+
+    return task_ids
@@ -2,64 +2,240 @@
 Сервис анализа командного ДНК (Team DNA)
 Анализ связей между сотрудниками и формирование оптимальных команд
 """
+from datetime import datetime
+import numpy as np
+from flask import current_app
 from app.database import db
 from app.models import User, TeamConnection, Assignment, Task
+from app.services.dream_team_engine import search_dream_teams, team_synergy
+
+
+# Пороги силы связи для connection_type
+STRONG_CONNECTION_THRESHOLD = 0.7
+NORMAL_CONNECTION_THRESHOLD = 0.3
+
+# Количество задач (столбцов матрицы инцидентности) в одном блоке умножения
+INCIDENCE_CHUNK_SIZE = 4096
+
+
+def connection_type_for_strength(strength):
+    """Тип связи по ее силе: strong, normal или weak"""
+    if strength >= STRONG_CONNECTION_THRESHOLD:
+        return 'strong'
+    if strength >= NORMAL_CONNECTION_THRESHOLD:
+        return 'normal'
+    return 'weak'
+
+
+def build_coassignment_matrix():
+    """
+    Построить матрицу совместных завершенных задач для всех сотрудников
+
+    Один запрос к завершенным назначениям; матрица инцидентности
+    сотрудник × задача умножается на свою транспонированную блоками
+    по INCIDENCE_CHUNK_SIZE задач, так что память ограничена n × блок.
+
+    Returns:
+        tuple: (список ID сотрудников, матрица совместных задач n × n,
+                на диагонали - число завершенных задач сотрудника)
+    """
+    rows = db.session.query(Assignment.assigned_to, Assignment.task_id).filter(
+        Assignment.status == 'completed'
+    ).distinct().all()
+
+    user_ids = sorted({user_id for user_id, _ in rows})
+    user_position = {user_id: i for i, user_id in enumerate(user_ids)}
+    task_position = {task_id: i for i, task_id in enumerate(sorted({task_id for _, task_id in rows}))}
+
+    n = len(user_ids)
+    coassignments = np.zeros((n, n))
+    if not rows:
+        return user_ids, coassignments
+
+    user_index = np.array([user_position[user_id] for user_id, _ in rows], dtype=np.int64)
+    task_index = np.array([task_position[task_id] for _, task_id in rows], dtype=np.int64)
+
+    for chunk_start in range(0, len(task_position), INCIDENCE_CHUNK_SIZE):
+        in_chunk = (task_index >= chunk_start) & (task_index < chunk_start + INCIDENCE_CHUNK_SIZE)
+        incidence = np.zeros((n, INCIDENCE_CHUNK_SIZE))
+        incidence[user_index[in_chunk], task_index[in_chunk] - chunk_start] = 1.0
+        coassignments += incidence @ incidence.T
+
+    return user_ids, np.rint(coassignments)
+
+
+def jaccard_strengths(coassignments):
+    """
+    Сила связи для всех пар: доля совместных задач среди задач обоих
+
+    Args:
+        coassignments: Матрица совместных задач (диагональ - задачи сотрудника)
+
+    Returns:
+        np.ndarray: Матрица сил связей 0-1 (диагональ нулевая)
+    """
+    tasks_count = np.diag(coassignments)
+    union = tasks_count[:, None] + tasks_count[None, :] - coassignments
+    strengths = np.divide(coassignments, union, out=np.zeros_like(coassignments), where=union > 0)
+    np.fill_diagonal(strengths, 0.0)
+    return np.minimum(strengths, 1.0)
+
+
+def rebuild_team_connections():
+    """
+    Пересчитать силы связей всех пар и массово обновить team_connections
+
+    Для пар с совместными задачами связи создаются или обновляются;
+    у существующих связей без совместных задач сила обнуляется.
+
+    Returns:
+        dict: Статистика пересчета (users, created, updated)
+    """
+    user_ids, coassignments = build_coassignment_matrix()
+    strengths = jaccard_strengths(coassignments)
+    position = {user_id: i for i, user_id in enumerate(user_ids)}
+
+    def pair_values(user1_id, user2_id):
+        i, j = position.get(user1_id), position.get(user2_id)
+        if i is None or j is None:
+            return 0.0, 0
+        return float(strengths[i, j]), int(coassignments[i, j])
+
+    # Существующие связи (в любой ориентации) обновляются на месте
+    now = datetime.utcnow()
+    existing_pairs = set()
+    updates = []
+    existing = db.session.query(
+        TeamConnection.id, TeamConnection.user1_id, TeamConnection.user2_id
+    ).all()
+    for connection_id, user1_id, user2_id in existing:
+        existing_pairs.add((min(user1_id, user2_id), max(user1_id, user2_id)))
+        strength, tasks_together = pair_values(user1_id, user2_id)
+        updates.append({
+            'id': connection_id,
+            'connection_strength': strength,
+            'connection_type': connection_type_for_strength(strength),
+            'tasks_together': tasks_together,
+            'updated_at': now,
+        })
+
+    inserts = []
+    rows, cols = np.nonzero(np.triu(coassignments, k=1))
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        if (user_ids[i], user_ids[j]) in existing_pairs:
+            continue
+        strength = float(strengths[i, j])
+        inserts.append({
+            'user1_id': user_ids[i],
+            'user2_id': user_ids[j],
+            'connection_strength': strength,
+            'connection_type': connection_type_for_strength(strength),
+            'tasks_together': int(coassignments[i, j]),
+            'created_at': now,
+            'updated_at': now,
+        })
+
+    if updates:
+        db.session.execute(db.update(TeamConnection), updates)
+    if inserts:
+        db.session.execute(db.insert(TeamConnection), inserts)
+    db.session.commit()
+
+    return {
+        'users': len(user_ids),
+        'created': len(inserts),
+        'updated': len(updates),
+    }
+
+
+def update_connections_for_task(task_id, user_ids, completed=True):
+    """
+    Инкрементально обновить связи при завершении задачи исполнителями
+
+    Вызывается, когда назначения user_ids по задаче перешли в completed
+    (или вышли из completed при completed=False). tasks_together меняется
+    только у пар, разделяющих задачу (O(исполнителей²)); сила связи
+    пересчитывается у всех связей этих исполнителей, так как у них
+    изменилось общее число завершенных задач. Изменения остаются
+    в текущей сессии, коммит делает вызывающий код.
+
+    Args:
+        task_id: ID задачи
+        user_ids: ID исполнителей, у которых изменился статус назначения
+        completed: True - задача завершена, False - завершение отменено
+    """
+    changed_users = set(user_ids)
+    if not changed_users:
+        return
+    delta = 1 if completed else -1
+
+    # Остальные исполнители, завершившие задачу
+    partners = {
+        row[0] for row in db.session.query(Assignment.assigned_to).filter(
+            Assignment.task_id == task_id,
+            Assignment.status == 'completed'
+        ).distinct().all()
+    } - changed_users
+
+    connections = TeamConnection.query.filter(
+        TeamConnection.user1_id.in_(changed_users) | TeamConnection.user2_id.in_(changed_users)
+    ).all()
+    by_pair = {}
+    for connection in connections:
+        pair = (min(connection.user1_id, connection.user2_id), max(connection.user1_id, connection.user2_id))
+        by_pair.setdefault(pair, []).append(connection)
+
+    changed_list = sorted(changed_users)
+    shared_pairs = {
+        (min(user_id, partner_id), max(user_id, partner_id))
+        for user_id in changed_list for partner_id in partners
+    }
+    shared_pairs.update(
+        (user_id, other_id) for i, user_id in enumerate(changed_list) for other_id in changed_list[i + 1:]
+    )
+    for pair in shared_pairs:
+        if pair in by_pair:
+            for connection in by_pair[pair]:
+                connection.tasks_together = max((connection.tasks_together or 0) + delta, 0)
+        elif delta > 0:
+            connection = TeamConnection(user1_id=pair[0], user2_id=pair[1], tasks_together=1)
+            db.session.add(connection)
+            by_pair[pair] = [connection]
+
+    # Число завершенных задач участников затронутых связей
+    involved_users = {user_id for pair in by_pair for user_id in pair}
+    tasks_count = dict(db.session.query(
+        Assignment.assigned_to, db.func.count(db.distinct(Assignment.task_id))
+    ).filter(
+        Assignment.status == 'completed',
+        Assignment.assigned_to.in_(involved_users)
+    ).group_by(Assignment.assigned_to).all())
+
+    for (user1_id, user2_id), pair_connections in by_pair.items():
+        for connection in pair_connections:
+            common_tasks = connection.tasks_together or 0
+            union = tasks_count.get(user1_id, 0) + tasks_count.get(user2_id, 0) - common_tasks
+            strength = min(common_tasks / union, 1.0) if union > 0 and common_tasks > 0 else 0.0
+            connection.connection_strength = strength
+            connection.connection_type = connection_type_for_strength(strength)
 
 
 def calculate_connection_strength(user1_id, user2_id):
     """
     Рассчитать силу связи между двумя сотрудниками
-    
+
+    Только чтение team_connections (поддерживается rebuild_team_connections);
+    пара без сохраненной связи не имеет совместных задач.
+
     Args:
         user1_id: ID первого сотрудника
         user2_id: ID второго сотрудника
-    
+
     Returns:
         float: Сила связи (0-1)
     """
-    # Проверяем существующую связь
-    connection = TeamConnection.query.filter(
-        ((TeamConnection.user1_id == user1_id) & (TeamConnection.user2_id == user2_id)) |
-        ((TeamConnection.user1_id == user2_id) & (TeamConnection.user2_id == user1_id))
-    ).first()
-    
-    if connection:
-        return float(connection.connection_strength)
-    
-    # Рассчитываем на основе совместных задач
-    user1_task_ids = [
-        row[0] for row in Assignment.query.filter_by(assigned_to=user1_id, status='completed')
-        .with_entities(Assignment.task_id).all()
-    ]
-    user2_task_ids = [
-        row[0] for row in Assignment.query.filter_by(assigned_to=user2_id, status='completed')
-        .with_entities(Assignment.task_id).all()
-    ]
-    
-    user1_tasks_set = set(user1_task_ids)
-    user2_tasks_set = set(user2_task_ids)
-    
-    common_tasks = len(user1_tasks_set & user2_tasks_set)
-    total_tasks = len(user1_tasks_set | user2_tasks_set)
-    
-    if total_tasks == 0:
-        return 0.0
-    
-    # Базовая сила связи на основе совместных задач
-    base_strength = min(common_tasks / max(total_tasks, 1), 1.0)
-    
-    # Сохраняем связь
-    if connection is None:
-        connection = TeamConnection(
-            user1_id=min(user1_id, user2_id),
-            user2_id=max(user1_id, user2_id),
-            connection_strength=base_strength,
-            tasks_together=common_tasks
-        )
-        db.session.add(connection)
-        db.session.commit()
-    
-    return base_strength
+    strengths = load_strength_matrix([user1_id, user2_id])
+    return float(strengths[0, 1])
 
 
 def get_strong_connections(user_id, threshold=0.7):
@@ -91,34 +267,178 @@ def get_strong_connections(user_id, threshold=0.7):
     return result
 
 
-def find_hidden_experts():
+def _top_k_edge_mask(sources, targets, strengths, top_k):
+    """Маска ребер, входящих в top_k сильнейших хотя бы у одного из концов"""
+    edge_count = len(strengths)
+    endpoints = np.concatenate([sources, targets])
+    edge_index = np.concatenate([np.arange(edge_count), np.arange(edge_count)])
+    endpoint_strengths = np.concatenate([strengths, strengths])
+
+    # Группировка по узлу, внутри - по убыванию силы (при равенстве - по порядку ребер)
+    order = np.lexsort((edge_index, -endpoint_strengths, endpoints))
+    sorted_nodes = endpoints[order]
+    group_start = np.r_[0, np.flatnonzero(sorted_nodes[1:] != sorted_nodes[:-1]) + 1]
+    group_sizes = np.diff(np.r_[group_start, len(sorted_nodes)])
+    rank = np.arange(len(sorted_nodes)) - np.repeat(group_start, group_sizes)
+
+    mask = np.zeros(edge_count, dtype=bool)
+    mask[edge_index[order][rank < top_k]] = True
+    return mask
+
+
+def _ego_nodes(sources, targets, center_user_id, radius):
+    """Узлы на расстоянии не более radius от center_user_id (поиск в ширину)"""
+    adjacency = {}
+    for source, target in zip(sources.tolist(), targets.tolist()):
+        adjacency.setdefault(source, set()).add(target)
+        adjacency.setdefault(target, set()).add(source)
+
+    visited = {center_user_id}
+    frontier = [center_user_id]
+    for _ in range(radius):
+        next_frontier = []
+        for node in frontier:
+            for neighbour in adjacency.get(node, ()):
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    next_frontier.append(neighbour)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return visited
+
+
+def get_connection_graph(min_strength=None, top_k=None, center_user_id=None, radius=1):
+    """
+    Получить граф связей команды с фильтрацией на стороне сервера
+
+    Args:
+        min_strength: Минимальная сила связи (фильтр в SQL)
+        top_k: Оставить у каждого узла не более top_k сильнейших связей
+               (ребро сохраняется, если входит в top_k хотя бы одного конца)
+        center_user_id: Центр эго-сети (None - весь граф)
+        radius: Радиус эго-сети в ребрах
+
+    Returns:
+        dict: Колоночное представление {'nodes': {...}, 'edges': {...}},
+              каждая колонка - список одинаковой длины
+    """
+    edge_query = db.session.query(
+        TeamConnection.user1_id,
+        TeamConnection.user2_id,
+        TeamConnection.connection_strength,
+        TeamConnection.connection_type
+    )
+    if min_strength is not None:
+        edge_query = edge_query.filter(TeamConnection.connection_strength >= min_strength)
+    edge_rows = edge_query.order_by(TeamConnection.id).all()
+
+    sources = np.array([row[0] for row in edge_rows], dtype=np.int64)
+    targets = np.array([row[1] for row in edge_rows], dtype=np.int64)
+    strengths = np.array([float(row[2] or 0.0) for row in edge_rows], dtype=np.float64)
+    types = [row[3] for row in edge_rows]
+
+    mask = np.ones(len(edge_rows), dtype=bool)
+    if top_k is not None and len(edge_rows):
+        mask &= _top_k_edge_mask(sources, targets, strengths, top_k)
+
+    node_query = db.session.query(User.id, User.name, User.role, User.efficiency).filter(
+        User.role == 'employee'
+    )
+    if center_user_id is not None:
+        ego = _ego_nodes(sources[mask], targets[mask], center_user_id, radius)
+        mask &= np.isin(sources, list(ego)) & np.isin(targets, list(ego))
+        node_query = node_query.filter(User.id.in_(ego))
+    node_rows = node_query.order_by(User.id).all()
+
+    kept = np.flatnonzero(mask)
+    return {
+        'nodes': {
+            'id': [row[0] for row in node_rows],
+            'name': [row[1] for row in node_rows],
+            'role': [row[2] for row in node_rows],
+            'efficiency': [row[3] for row in node_rows],
+        },
+        'edges': {
+            'source': sources[kept].tolist(),
+            'target': targets[kept].tolist(),
+            'strength': strengths[kept].tolist(),
+            'type': [types[i] for i in kept.tolist()],
+        },
+    }
+
+
+# Пороги скрытого эксперта по умолчанию
+HIDDEN_EXPERT_MIN_EFFICIENCY = 150  # эффективность выше, %
+HIDDEN_EXPERT_MAX_CONNECTIONS = 3  # связей меньше
+
+
+def _hidden_experts_query(min_efficiency, max_connections):
+    """Запрос сотрудников с высокой эффективностью и малым числом связей"""
+    # Степень узла: связи считаются по обоим концам одним GROUP BY
+    endpoints = db.union_all(
+        db.select(TeamConnection.user1_id.label('user_id')),
+        db.select(TeamConnection.user2_id.label('user_id')).where(
+            TeamConnection.user1_id != TeamConnection.user2_id
+        )
+    ).subquery()
+    degrees = db.select(
+        endpoints.c.user_id,
+        db.func.count().label('connections_count')
+    ).group_by(endpoints.c.user_id).subquery()
+
+    connections_count = db.func.coalesce(degrees.c.connections_count, 0)
+    return db.session.query(
+        User.id, User.name, User.efficiency, connections_count.label('connections_count')
+    ).outerjoin(
+        degrees, degrees.c.user_id == User.id
+    ).filter(
+        User.role == 'employee',
+        User.efficiency > min_efficiency,
+        connections_count < max_connections
+    )
+
+
+def find_hidden_experts(min_efficiency=HIDDEN_EXPERT_MIN_EFFICIENCY,
+                        max_connections=HIDDEN_EXPERT_MAX_CONNECTIONS, limit=None, offset=0):
     """
     Найти скрытых экспертов (сотрудников с высокой эффективностью,
     но низкой видимостью в команде)
-    
+
+    Args:
+        min_efficiency: Эффективность должна быть выше порога (%)
+        max_connections: Количество связей должно быть меньше порога
+        limit: Размер страницы (None - без ограничения)
+        offset: Смещение страницы
+
     Returns:
-        list: Список скрытых экспертов
+        list: Список скрытых экспертов (по убыванию эффективности, затем по числу связей)
     """
-    users = User.query.filter_by(role='employee').all()
-    hidden_experts = []
-    
-    for user in users:
-        # Высокая эффективность (>150%)
-        if user.efficiency > 150:
-            # Низкое количество связей
-            connections_count = TeamConnection.query.filter(
-                ((TeamConnection.user1_id == user.id) | (TeamConnection.user2_id == user.id))
-            ).count()
-            
-            if connections_count < 3:  # Мало связей
-                hidden_experts.append({
-                    'user_id': user.id,
-                    'name': user.name,
-                    'efficiency': user.efficiency,
-                    'connections_count': connections_count,
-                })
-    
-    return hidden_experts
+    query = _hidden_experts_query(min_efficiency, max_connections).order_by(
+        User.efficiency.desc(),
+        db.literal_column('connections_count'),
+        User.id
+    )
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return [
+        {
+            'user_id': user_id,
+            'name': name,
+            'efficiency': efficiency,
+            'connections_count': connections_count,
+        }
+        for user_id, name, efficiency, connections_count in query.all()
+    ]
+
+
+def count_hidden_experts(min_efficiency=HIDDEN_EXPERT_MIN_EFFICIENCY,
+                         max_connections=HIDDEN_EXPERT_MAX_CONNECTIONS):
+    """Количество скрытых экспертов"""
+    return _hidden_experts_query(min_efficiency, max_connections).order_by(None).count()
 
 
 def calculate_team_synergy(team_user_ids):
@@ -134,64 +454,92 @@ def calculate_team_synergy(team_user_ids):
     if len(team_user_ids) < 2:
         return 5.0
     
-    total_strength = 0.0
-    pairs_count = 0
-    
-    # Рассчитываем среднюю силу связей между всеми парами
-    for i, user1_id in enumerate(team_user_ids):
-        for user2_id in team_user_ids[i+1:]:
-            strength = calculate_connection_strength(user1_id, user2_id)
-            total_strength += strength
-            pairs_count += 1
-    
-    if pairs_count == 0:
-        return 5.0
-    
-    avg_strength = total_strength / pairs_count
-    
-    # Преобразуем в шкалу 0-10
-    synergy_score = avg_strength * 10.0
-    
-    return round(synergy_score, 1)
+    # Средняя сила связей между всеми парами, матрица читается одним запросом
+    strengths = load_strength_matrix(list(team_user_ids))
+    return team_synergy(strengths, list(range(len(team_user_ids))))
+
+
+def load_strength_matrix(user_ids):
+    """
+    Загрузить матрицу сил связей для набора сотрудников одним запросом
+
+    Args:
+        user_ids: Список ID сотрудников
+
+    Returns:
+        np.ndarray: Симметричная матрица (len(user_ids) × len(user_ids))
+    """
+    n = len(user_ids)
+    strengths = np.zeros((n, n))
+    if n < 2:
+        return strengths
+    position = {user_id: i for i, user_id in enumerate(user_ids)}
+
+    # При дублях связи в обеих ориентациях берется первая по id
+    known_pairs = set()
+    connections = db.session.query(
+        TeamConnection.user1_id, TeamConnection.user2_id, TeamConnection.connection_strength
+    ).filter(
+        TeamConnection.user1_id.in_(user_ids),
+        TeamConnection.user2_id.in_(user_ids)
+    ).order_by(TeamConnection.id).all()
+    for user1_id, user2_id, strength in connections:
+        pair = (min(user1_id, user2_id), max(user1_id, user2_id))
+        if pair in known_pairs or user1_id == user2_id:
+            continue
+        known_pairs.add(pair)
+        i, j = position[user1_id], position[user2_id]
+        strengths[i, j] = strengths[j, i] = float(strength or 0.0)
 
+    return strengths
 
-def find_dream_teams(min_team_size=2, max_team_size=5, min_synergy=8.0):
+
+def find_dream_teams(min_team_size=2, max_team_size=5, min_synergy=8.0, limit=5, time_budget=None):
     """
     Найти оптимальные команды (dream teams)
-    
+
+    Матрица сил связей загружается один раз, поиск идет методом ветвей
+    и границ (dream_team_engine) вместо перебора всех комбинаций.
+
     Args:
         min_team_size: Минимальный размер команды
         max_team_size: Максимальный размер команды
         min_synergy: Минимальная синергия
-    
+        limit: Количество команд в результате
+        time_budget: Ограничение времени поиска в секундах
+                     (по умолчанию DREAM_TEAM_TIME_BUDGET)
+
     Returns:
         list: Список оптимальных команд
     """
-    users = User.query.filter_by(role='employee').all()
+    users = User.query.filter_by(role='employee').order_by(User.id).all()
     user_ids = [u.id for u in users]
-    
+
     if len(user_ids) < min_team_size:
         return []
-    
-    dream_teams = []
-    
-    # Простой алгоритм: проверяем комбинации пользователей
-    from itertools import combinations
-    
-    for team_size in range(min_team_size, min(max_team_size + 1, len(user_ids) + 1)):
-        for team in combinations(user_ids, team_size):
-            synergy = calculate_team_synergy(list(team))
-            
-            if synergy >= min_synergy:
-                team_users = [User.query.get(uid) for uid in team]
-                dream_teams.append({
-                    'team': [{'id': u.id, 'name': u.name} for u in team_users],
-                    'synergy': synergy,
-                    'size': len(team),
-                })
-    
-    # Сортируем по синергии
-    dream_teams.sort(key=lambda x: x['synergy'], reverse=True)
-    
-    return dream_teams[:5]  # Возвращаем топ-5 команд
 
+    if time_budget is None:
+        time_budget = current_app.config['DREAM_TEAM_TIME_BUDGET']
+
+    strengths = load_strength_matrix(user_ids)
+    teams, completed = search_dream_teams(
+        strengths,
+        min_team_size=min_team_size,
+        max_team_size=max_team_size,
+        min_synergy=min_synergy,
+        top_k=limit,
+        time_budget=time_budget
+    )
+    if not completed:
+        current_app.logger.warning(
+            f'Поиск dream teams прерван по времени ({time_budget} с), результат может быть неполным'
+        )
+
+    return [
+        {
+            'team': [{'id': users[i].id, 'name': users[i].name} for i in members],
+            'synergy': synergy,
+            'size': len(members),
+        }
+        for synergy, members in teams
+    ]
@@ -0,0 +1,41 @@
+"""
+Пакетное получение пользователей по ID
+
+Все недостающие пользователи загружаются одним запросом IN, повторные
+обращения в рамках запроса обслуживаются из кэша в flask.g. Загруженные
+объекты попадают в identity map сессии, поэтому ленивые связи
+вида entry.user после resolve_users не выполняют отдельных запросов.
+"""
+from flask import g
+from app.models import User
+
+
+def resolve_users(user_ids):
+    """
+    Получить пользователей по списку ID
+
+    Args:
+        user_ids: Итерируемый набор ID (повторы и None допускаются)
+
+    Returns:
+        dict: user_id -> User (None для несуществующих пользователей)
+    """
+    if 'resolved_users' not in g:
+        g.resolved_users = {}
+    cache = g.resolved_users
+
+    requested = {user_id for user_id in user_ids if user_id is not None}
+    missing = requested - cache.keys()
+    if missing:
+        for user in User.query.filter(User.id.in_(missing)).all():
+            cache[user.id] = user
+        for user_id in missing - cache.keys():
+            cache[user_id] = None
+
+    return {user_id: cache[user_id] for user_id in requested}
+
+
+def user_display_name(users, user_id):
+    """Имя пользователя из результата resolve_users или заглушка 'User <id>'"""
+    user = users.get(user_id)
+    return user.name if user else f'User {user_id}'
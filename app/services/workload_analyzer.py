@@ -6,6 +6,10 @@ from app.database import db
 from app.models import User, Assignment, Task
 
 
+# Статусы назначений, учитываемые в current_workload
+ACTIVE_ASSIGNMENT_STATUSES = ('assigned', 'in_progress')
+
+
 def calculate_current_load(user_id):
     """
     Рассчитать текущую загруженность пользователя
@@ -34,6 +38,137 @@ def get_available_capacity(user_id):
     return max(0, user.max_workload - user.current_workload)
 
 
+def reserve_workload(user_id, workload_points):
+    """
+    Атомарно увеличить загруженность пользователя
+    
+    Выполняет условный UPDATE ... SET current_workload = current_workload + :p
+    WHERE current_workload + :p <= max_workload, поэтому параллельные
+    назначения не теряют обновления и не превышают max_workload.
+    
+    Returns:
+        bool: True, если емкость зарезервирована
+    """
+    if workload_points <= 0:
+        return False
+    
+    updated = User.query.filter(
+        User.id == user_id,
+        User.current_workload + workload_points <= User.max_workload
+    ).update(
+        {User.current_workload: User.current_workload + workload_points},
+        synchronize_session=False
+    )
+    
+    # Значение в сессии устарело - перечитаем при следующем обращении
+    user = db.session.get(User, user_id)
+    if user is not None:
+        db.session.expire(user, ['current_workload'])
+    
+    return updated == 1
+
+
+def adjust_workload(user_id, delta):
+    """
+    Атомарно изменить загруженность пользователя на delta (не ниже нуля)
+    
+    В отличие от reserve_workload не проверяет max_workload: используется
+    для поддержания current_workload равным сумме workload_points
+    активных назначений.
+    """
+    if not delta:
+        return
+    
+    new_value = User.current_workload + delta
+    User.query.filter(User.id == user_id).update(
+        {User.current_workload: db.case((new_value < 0, 0), else_=new_value)},
+        synchronize_session=False
+    )
+    
+    user = db.session.get(User, user_id)
+    if user is not None:
+        db.session.expire(user, ['current_workload'])
+
+
+def set_assignment_status(assignment, new_status):
+    """
+    Изменить статус назначения с учетом загруженности исполнителя
+    
+    Переход из активного статуса в завершенный/отмененный освобождает
+    workload_points, обратный переход - снова их учитывает.
+    """
+    was_active = assignment.status in ACTIVE_ASSIGNMENT_STATUSES
+    is_active = new_status in ACTIVE_ASSIGNMENT_STATUSES
+    
+    assignment.status = new_status
+    if new_status == 'completed':
+        assignment.completed_at = datetime.utcnow()
+    
+    if was_active and not is_active:
+        adjust_workload(assignment.assigned_to, -assignment.workload_points)
+    elif is_active and not was_active:
+        adjust_workload(assignment.assigned_to, assignment.workload_points)
+
+
+def release_task_workload(task_id):
+    """Освободить загруженность по активным назначениям задачи (перед удалением)"""
+    released = db.session.query(
+        Assignment.assigned_to, db.func.sum(Assignment.workload_points)
+    ).filter(
+        Assignment.task_id == task_id,
+        Assignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES)
+    ).group_by(Assignment.assigned_to).all()
+    
+    for user_id, points in released:
+        adjust_workload(user_id, -(points or 0))
+
+
+def reconcile_workloads(fix=True):
+    """
+    Сверить current_workload с суммой workload_points активных назначений
+    
+    Агрегат пересчитывается одним GROUP BY запросом.
+    
+    Args:
+        fix: Исправить расхождения
+    
+    Returns:
+        dict: Количество проверенных пользователей и список расхождений
+    """
+    expected = dict(
+        db.session.query(
+            Assignment.assigned_to, db.func.sum(Assignment.workload_points)
+        ).filter(
+            Assignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES)
+        ).group_by(Assignment.assigned_to).all()
+    )
+    
+    users = db.session.query(User.id, User.current_workload).all()
+    drift = []
+    for user_id, current in users:
+        actual = int(expected.get(user_id) or 0)
+        if (current or 0) != actual:
+            drift.append({
+                'user_id': user_id,
+                'current_workload': current or 0,
+                'expected_workload': actual,
+                'drift': (current or 0) - actual,
+            })
+    
+    if fix and drift:
+        for item in drift:
+            User.query.filter(User.id == item['user_id']).update(
+                {User.current_workload: item['expected_workload']},
+                synchronize_session=False
+            )
+        db.session.commit()
+    
+    return {
+        'checked': len(users),
+        'drift': drift,
+    }
+
+
 def calculate_load_score(user_id):
     """
     Рассчитать оценку загруженности для распределения задач
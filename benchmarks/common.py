@@ -0,0 +1,82 @@
+"""
+Общие утилиты бенчмарков
+
+Бенчмарк запускается из корня проекта: python -m benchmarks.<имя>.
+По умолчанию данные пишутся во временную файловую базу SQLite; чтобы
+измерить PostgreSQL, укажите пустую базу в BENCH_DATABASE_URL.
+"""
+import os
+import sys
+import tempfile
+import time
+from statistics import median
+from sqlalchemy import event
+from app import create_app
+from app.config import Config
+from app.database import db
+from app.models import User
+
+
+def make_app():
+    """
+    Создать приложение на пустой базе для бенчмарка
+
+    Returns:
+        Flask: Приложение (контекст не активирован)
+    """
+    url = os.getenv('BENCH_DATABASE_URL')
+    if not url:
+        path = os.path.join(tempfile.mkdtemp(prefix='wfg-bench-'), 'bench.db')
+        url = f'sqlite:///{path}'
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = url
+        SCHEDULER_ENABLED = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        name = db.engine.url.render_as_string(hide_password=True)
+        if User.query.first() is not None:
+            sys.exit(f'База {name} не пуста - нужна пустая база')
+        print(f'База: {name}')
+    return app
+
+
+def measure(func, repeat=5):
+    """
+    Медианное время вызова func в миллисекундах
+
+    Первый вызов не учитывается (прогрев кэшей и соединения).
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return median(timings)
+
+
+class QueryCounter:
+    """Счетчик SQL-запросов движка: with QueryCounter(db.engine) as counter"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _record(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+
+def print_table(headers, rows):
+    """Вывести результаты выровненной таблицей"""
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for row in [headers] + rows:
+        print('  '.join(str(value).rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,114 @@
+"""
+Бенчмарк дашборда сотрудника по мере роста его истории задач
+
+Текущая реализация (get_employee_dashboard: GROUP BY по статусу и
+ORDER BY deadline LIMIT 5) сравнивается с прежней, которая загружала все
+назначения сотрудника, лениво подгружала задачу каждого из них и
+считала статистику в Python. Перед каждым замером сессия сбрасывается,
+как в начале нового запроса.
+
+Запуск: python -m benchmarks.employee_dashboard [--sizes 10 100 1000 5000]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from app.database import db
+from app.models import User, Task, Assignment
+from app.services.dashboard_service import get_employee_dashboard
+from benchmarks.common import QueryCounter, make_app, measure, print_table
+
+
+STATUSES = ['pending', 'assigned', 'in_progress', 'completed', 'cancelled']
+
+
+def legacy_employee_dashboard(user):
+    """Прежний расчет дашборда: все назначения и задачи в память процесса"""
+    my_assignments = Assignment.query.filter_by(assigned_to=user.id).all()
+    my_tasks = [assignment.task for assignment in my_assignments]
+
+    pending = len([t for t in my_tasks if t.status == 'pending' or t.status == 'assigned'])
+    in_progress = len([t for t in my_tasks if t.status == 'in_progress'])
+    completed = len([t for t in my_tasks if t.status == 'completed'])
+
+    upcoming_deadlines = []
+    for t in my_tasks:
+        if t.deadline and t.status not in ['completed', 'cancelled']:
+            upcoming_deadlines.append(t.to_dict())
+    upcoming_deadlines.sort(key=lambda x: x['deadline'] if x['deadline'] else '9999-12-31T23:59:59')
+
+    return {
+        'tasks': {
+            'total': len(my_tasks),
+            'pending': pending,
+            'in_progress': in_progress,
+            'completed': completed
+        },
+        'upcoming_deadlines': upcoming_deadlines[:5]
+    }
+
+
+def grow_history(user_id, manager_id, count, rnd):
+    """Добавить сотруднику count задач со случайными статусами и дедлайнами"""
+    now = datetime.utcnow()
+    first_id = (db.session.query(db.func.max(Task.id)).scalar() or 0) + 1
+    db.session.execute(db.insert(Task), [
+        dict(
+            title=f'History {i}', status=rnd.choice(STATUSES), priority='medium', created_by=manager_id,
+            deadline=now + timedelta(minutes=rnd.randint(-100000, 100000)) if rnd.random() < 0.8 else None,
+            created_at=now
+        )
+        for i in range(count)
+    ])
+    task_ids = db.session.query(Task.id).filter(Task.id >= first_id).order_by(Task.id).all()
+    db.session.execute(db.insert(Assignment), [
+        dict(task_id=task_id, assigned_to=user_id, assigned_by=manager_id, status='assigned', workload_points=1)
+        for task_id, in task_ids
+    ])
+    db.session.commit()
+
+
+def run(func, user_id):
+    """Выполнить расчет в новой сессии, как в отдельном запросе"""
+    db.session.remove()
+    return func(db.session.get(User, user_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    rnd = random.Random(0)
+    results = []
+    with app.app_context():
+        manager = User(email='bench-manager@example.com', name='Manager', password_hash='x', role='manager')
+        employee = User(email='bench-employee@example.com', name='Employee', password_hash='x', role='employee')
+        db.session.add_all([manager, employee])
+        db.session.commit()
+        manager_id, user_id = manager.id, employee.id
+
+        history = 0
+        for size in sorted(args.sizes):
+            grow_history(user_id, manager_id, size - history, rnd)
+            history = size
+
+            row = [size]
+            outputs = []
+            for func in (get_employee_dashboard, legacy_employee_dashboard):
+                with QueryCounter(db.engine) as counter:
+                    outputs.append(run(func, user_id))
+                row += [f'{measure(lambda: run(func, user_id), args.repeat):.1f}', counter.count]
+
+            current, legacy = outputs
+            assert current['tasks'] == legacy['tasks'], 'счетчики расходятся'
+            assert [t['id'] for t in current['upcoming_deadlines']] == \
+                [t['id'] for t in legacy['upcoming_deadlines']], 'дедлайны расходятся'
+            results.append(row)
+
+    print_table(['назначений', 'SQL, мс', 'запросов', 'прежний, мс', 'запросов'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Бенчмарк поиска задач: полнотекстовый индекс против ILIKE
+
+GET /api/tasks?search= замеряется дважды на одной и той же базе: с
+индексом (FTS5 в SQLite, tsvector + GIN в PostgreSQL) и с прежним
+запросом ILIKE по названию, описанию и имени исполнителя с DISTINCT
+(app.extensions['task_search'] = None).
+
+Запуск: python -m benchmarks.task_search [--sizes 10000 100000]
+"""
+import argparse
+import random
+from datetime import datetime
+from app.database import db
+from app.models import User, Task, Assignment
+from benchmarks.common import make_app, measure, print_table
+
+
+WORDS = [
+    'alpha', 'beta', 'gamma', 'delta', 'python', 'report', 'deploy', 'api',
+    'frontend', 'backend', 'review', 'docs', 'migration', 'release', 'bugfix',
+]
+QUERIES = {
+    'редкое слово': 'uniq4242',
+    'частое слово': 'python',
+}
+BATCH = 5000
+
+
+def add_tasks(start, stop, manager_id, employee_ids, rnd):
+    """Добавить задачи с номерами [start, stop) пачками через bulk insert"""
+    now = datetime.utcnow()
+    for offset in range(start, stop, BATCH):
+        rows = [
+            dict(
+                title=' '.join(rnd.choices(WORDS, k=3)),
+                description=' '.join(rnd.choices(WORDS, k=40)) + f' uniq{i}',
+                priority='medium', status='pending', created_by=manager_id, created_at=now
+            )
+            for i in range(offset, min(offset + BATCH, stop))
+        ]
+        db.session.execute(db.insert(Task), rows)
+        db.session.commit()
+
+    # Каждая десятая новая задача назначена: ILIKE ищет и по имени исполнителя
+    task_ids = db.session.query(Task.id).order_by(Task.id).offset(start).limit(stop - start).all()
+    assignments = [
+        dict(task_id=task_id, assigned_to=rnd.choice(employee_ids), assigned_by=manager_id,
+             status='assigned', workload_points=10)
+        for task_id, in task_ids[::10]
+    ]
+    if assignments:
+        db.session.execute(db.insert(Assignment), assignments)
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    client = app.test_client()
+    backend = app.extensions['task_search']
+    if backend is None:
+        print('Полнотекстовый индекс недоступен - сравнивать не с чем')
+        return
+
+    rnd = random.Random(0)
+    results = []
+    with app.app_context():
+        manager = User(email='bench-manager@example.com', name='Manager', password_hash='x', role='manager')
+        employees = [
+            User(email=f'bench{i}@example.com', name=f'Employee {i}', password_hash='x', role='employee')
+            for i in range(20)
+        ]
+        db.session.add_all([manager] + employees)
+        db.session.commit()
+        manager_id, employee_ids = manager.id, [user.id for user in employees]
+
+        created = 0
+        for size in sorted(args.sizes):
+            add_tasks(created, size, manager_id, employee_ids, rnd)
+            created = size
+
+            for label, term in QUERIES.items():
+                url = f'/api/tasks?search={term}&limit=50'
+                timings, found = {}, {}
+                for mode in (backend, None):
+                    app.extensions['task_search'] = mode
+                    timings[mode] = measure(lambda: client.get(url), args.repeat)
+                    found[mode] = {task['id'] for task in client.get(url).json['data']}
+                app.extensions['task_search'] = backend
+
+                if label == 'редкое слово':
+                    assert found[backend] == found[None], 'результаты индекса и ILIKE расходятся'
+                results.append([
+                    size, label, f'{timings[backend]:.1f}', f'{timings[None]:.1f}',
+                    f'{timings[None] / timings[backend]:.1f}x'
+                ])
+
+    print_table(['задач', 'запрос', f'{backend}, мс', 'ILIKE, мс', 'ускорение'], results)
+
+
+if __name__ == '__main__':
+    main()
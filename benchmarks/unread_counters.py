@@ -0,0 +1,75 @@
+"""
+Бенчмарк счетчиков непрочитанных уведомлений
+
+Таблица notifications заполняется миллионом строк (bulk insert в обход
+ORM), счетчики строятся сверкой reconcile_unread_counters. Затем время
+чтения счетчика (get_unread_count, поиск по первичному ключу)
+сравнивается с прежним COUNT по notifications, и проверяется, что
+значения совпадают для всех пользователей.
+
+Запуск: python -m benchmarks.unread_counters [--rows 1000000] [--users 200]
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+from app.database import db
+from app.models import User, Notification
+from app.services.notification_counters import get_unread_count, reconcile_unread_counters
+from benchmarks.common import make_app, measure, print_table
+
+
+BATCH = 10000
+
+
+def legacy_unread_count(user_id):
+    """Прежний подсчет непрочитанных: COUNT по таблице notifications"""
+    return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    rnd = random.Random(0)
+    with app.app_context():
+        users = [
+            User(email=f'bench{i}@example.com', name=f'User {i}', password_hash='x', role='employee')
+            for i in range(args.users)
+        ]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        for offset in range(0, args.rows, BATCH):
+            db.session.execute(db.insert(Notification), [
+                dict(user_id=rnd.choice(user_ids), type='task_assigned', title='Новая задача',
+                     is_read=rnd.random() < 0.7, created_at=now)
+                for _ in range(min(BATCH, args.rows - offset))
+            ])
+            db.session.commit()
+        print(f'Вставлено {args.rows} уведомлений за {time.perf_counter() - started:.1f} с')
+
+        started = time.perf_counter()
+        reconciled = reconcile_unread_counters()
+        print(f"Сверка: {reconciled['fixed']} счетчиков за {time.perf_counter() - started:.2f} с")
+
+        mismatched = [user_id for user_id in user_ids if get_unread_count(user_id) != legacy_unread_count(user_id)]
+        assert not mismatched, f'счетчики расходятся с COUNT: {mismatched[:10]}'
+
+        results = []
+        for label, func in (('счетчик', get_unread_count), ('COUNT', legacy_unread_count)):
+            elapsed = measure(lambda: [func(user_id) for user_id in user_ids], args.repeat)
+            results.append([label, f'{elapsed / len(user_ids):.3f}'])
+
+    print_table(['способ', 'мс на вызов'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,8 +12,23 @@ backlog = 2048
 # Worker processes
 # Formula: (2 x CPU cores) + 1 for optimal performance
 workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
-worker_class = "sync"
+# sync by default; gevent is opt-in (GUNICORN_WORKER_CLASS=gevent) so that idle
+# SSE connections (/api/notifications/stream) do not pin a worker
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
 worker_connections = 1000
+
+if worker_class == 'gevent':
+    # preload_app imports the application in the master process,
+    # so the standard library has to be patched before that
+    from gevent import monkey
+    monkey.patch_all()
+    # psycopg2 is a C extension: without a gevent wait callback every query
+    # blocks the whole worker, including all of its open streams
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass  # psycopg2 is not installed (SQLite)
 timeout = 120
 keepalive = 5
 max_requests = 1000
@@ -42,6 +57,24 @@ graceful_timeout = 30
 # Preload application for better performance
 preload_app = True
 
+# With preload_app the application is created in the master before fork:
+# the in-process scheduler (SCHEDULER_ENABLED) is started in each worker
+# from post_fork instead, job locks keep one run per interval
+os.environ['SCHEDULER_START_AFTER_FORK'] = 'true'
+
+
+def post_fork(server, worker):
+    """Called in the worker process right after fork."""
+    from app.database import db
+    from app.services.scheduler import start_scheduler
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        # Connections opened by the master must not be shared with workers
+        db.engine.dispose(close=False)
+    if app.config['SCHEDULER_ENABLED']:
+        start_scheduler(app)
+
 def when_ready(server):
     """Called just after the server is started."""
     server.log.info("WorkFlowGenius backend is ready. Spawning workers")
@@ -4,6 +4,7 @@
 """
 from app import create_app
 from app.database import db
+from app.services.task_search_service import init_task_search
 from app.models import (
     User, Task, Assignment, UserCompetency, WorkPreference,
     TeamConnection, AISettings, ModelMetrics, TaskTag, TaskComment, TimeTracking
@@ -21,6 +22,8 @@ def seed_database():
         print("Очистка базы данных...")
         db.drop_all()
         db.create_all()
+        # drop_all удаляет и триггеры поиска на tasks - создаем их заново
+        init_task_search(app)
         
         # Создание менеджеров
         print("Создание менеджеров...")
@@ -0,0 +1,137 @@
+"""
+Общие фикстуры тестов
+
+Каждый тест получает собственное приложение с пустой базой SQLite в
+памяти; кэши процесса (словарь навыков, индекс навык → сотрудники)
+сбрасываются, чтобы не переносить данные между тестами.
+"""
+import random
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import create_app
+from app.config import Config
+from app.database import db
+from app.models import User, UserCompetency, WorkPreference, Task, Assignment, TaskTag
+from app.services.skill_index import reset_skill_index
+from app.services.skill_matcher import invalidate_skill_matcher
+
+
+SKILLS = ['Python', 'SQL', 'React', 'Java', 'Go', 'Docker', 'Flask', 'CSS']
+LEVELS = ['beginner', 'intermediate', 'advanced', 'expert']
+PRIORITIES = ['low', 'medium', 'high', 'urgent']
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SCHEDULER_ENABLED = False
+
+
+@pytest.fixture
+def app_config():
+    """Класс конфигурации приложения (переопределяется в модулях тестов)"""
+    return TestConfig
+
+
+@pytest.fixture
+def app(app_config):
+    invalidate_skill_matcher()
+    reset_skill_index()
+    app = create_app(app_config)
+    with app.app_context():
+        yield app
+        db.session.remove()
+    invalidate_skill_matcher()
+    reset_skill_index()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class QueryCounter:
+    """Счетчик SQL-запросов движка (событие before_cursor_execute)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+
+@pytest.fixture
+def count_queries(app):
+    """Контекстный менеджер подсчета запросов: with count_queries() as counter"""
+    return lambda: QueryCounter(db.engine)
+
+
+@pytest.fixture
+def seed_team(app):
+    """
+    Заполнить базу менеджером, сотрудниками с компетенциями и задачами
+
+    Returns:
+        callable: seed_team(employees, tasks, seed=1) -> (manager, employees, tasks)
+    """
+    def seed(employees=5, tasks=10, seed=1):
+        rnd = random.Random(seed)
+        now = datetime.utcnow()
+        manager = User(email='manager@example.com', name='Manager', password_hash='x', role='manager')
+        db.session.add(manager)
+        db.session.flush()
+
+        team = []
+        for i in range(employees):
+            user = User(
+                email=f'employee{i}@example.com', name=f'Employee {i}', password_hash='x', role='employee',
+                current_workload=rnd.randint(0, 60), max_workload=rnd.choice([80, 100, 120]),
+                efficiency=rnd.choice([90, 100, 160])
+            )
+            db.session.add(user)
+            team.append(user)
+        db.session.flush()
+        for user in team:
+            for skill in rnd.sample(SKILLS, rnd.randint(0, 4)):
+                db.session.add(UserCompetency(
+                    user_id=user.id, skill_name=rnd.choice([skill, skill.lower(), skill.upper()]),
+                    level=rnd.choice(LEVELS), experience_years=rnd.randint(0, 8)
+                ))
+            if rnd.random() < 0.5:
+                db.session.add(WorkPreference(user_id=user.id, preferred_days='monday,friday'))
+
+        created = []
+        for i in range(tasks):
+            skills = ' and '.join(rnd.sample(SKILLS, rnd.randint(0, 3)))
+            task = Task(
+                title=f'Task {i}', description=f'Need {skills} work' if skills or rnd.random() < 0.5 else None,
+                priority=rnd.choice(PRIORITIES), status='pending', created_by=manager.id,
+                deadline=rnd.choice([None, now + timedelta(hours=rnd.randint(-100, 100))]),
+                created_at=now - timedelta(minutes=tasks - i)
+            )
+            db.session.add(task)
+            created.append(task)
+        db.session.flush()
+        for task in created:
+            for user in rnd.sample(team, min(2, len(team))):
+                db.session.add(Assignment(
+                    task_id=task.id, assigned_to=user.id, assigned_by=manager.id, status='assigned', workload_points=10
+                ))
+            db.session.add(TaskTag(task_id=task.id, tag_name='backend', color='red'))
+        db.session.commit()
+        return manager, team, created
+
+    return seed
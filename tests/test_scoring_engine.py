@@ -0,0 +1,48 @@
+"""
+Векторизованный движок оценки пригодности совпадает с эталонной
+поштучной реализацией calculate_suitability_score
+"""
+import pytest
+from app.database import db
+from app.services.scoring_engine import load_candidate_features, score_candidates, score_matrix
+from app.services.task_distributor import calculate_suitability_score, get_ai_settings
+
+
+WEIGHT_PRESETS = [
+    None,  # настройки по умолчанию
+    {'competence_weight': 100, 'load_weight': 0, 'time_preference_weight': 0, 'priority_weight': 0},
+    {'competence_weight': 10, 'load_weight': 60, 'time_preference_weight': 20, 'priority_weight': 10},
+]
+
+
+def _settings(weights):
+    settings = get_ai_settings()
+    for name, value in (weights or {}).items():
+        setattr(settings, name, value)
+    db.session.commit()
+    return settings
+
+
+@pytest.mark.parametrize('weights', WEIGHT_PRESETS)
+def test_score_matrix_matches_reference(seed_team, weights):
+    _, employees, tasks = seed_team(employees=8, tasks=25, seed=4)
+    settings = _settings(weights)
+
+    matrix = score_matrix(load_candidate_features(employees), tasks, settings)
+
+    assert matrix.shape == (len(tasks), len(employees))
+    assert len({round(float(score), 6) for score in matrix.ravel()}) > 1
+    for i, task in enumerate(tasks):
+        for j, employee in enumerate(employees):
+            expected = calculate_suitability_score(employee, task, settings)
+            assert matrix[i][j] == pytest.approx(expected, abs=1e-9), (task.id, employee.id)
+
+
+def test_score_candidates_matches_reference(seed_team):
+    _, employees, tasks = seed_team(employees=6, tasks=10, seed=7)
+    settings = _settings(None)
+
+    for task in tasks:
+        scores = score_candidates(employees, task, settings)
+        expected = [calculate_suitability_score(employee, task, settings) for employee in employees]
+        assert list(scores) == pytest.approx(expected, abs=1e-9)
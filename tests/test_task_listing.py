@@ -0,0 +1,77 @@
+"""
+Список задач GET /api/tasks загружается фиксированным числом запросов
+(назначения, исполнители и теги - пакетно, без N+1)
+"""
+import pytest
+
+
+PAGE_SIZES = (5, 25, 100)
+
+
+@pytest.mark.parametrize('params', [
+    '',
+    '&fields=id,title,status,assignments,tags',
+    '&status=pending',
+    '&search=Python',
+])
+def test_task_list_query_count_does_not_grow_with_page_size(client, seed_team, count_queries, params):
+    seed_team(employees=8, tasks=150, seed=3)
+
+    counts = {}
+    for limit in PAGE_SIZES:
+        with count_queries() as counter:
+            response = client.get(f'/api/tasks?limit={limit}{params}')
+        assert response.status_code == 200
+        assert response.json['data']
+        counts[limit] = counter.count
+
+    assert len(set(counts.values())) == 1, counts
+
+
+def test_task_list_returns_assignees_and_tags(client, seed_team):
+    seed_team(employees=4, tasks=10)
+
+    response = client.get('/api/tasks?limit=10')
+
+    tasks = response.json['data']
+    assert len(tasks) == 10
+    for task in tasks:
+        assert task['tags'] and task['tags'][0]['tag_name'] == 'backend'
+        assert len(task['assignments']) == 2
+        assert all(assignment['assigned_to_user']['name'].startswith('Employee') for assignment in task['assignments'])
+
+
+def test_task_list_pages_follow_cursor_with_constant_queries(client, seed_team, count_queries):
+    seed_team(employees=5, tasks=60)
+
+    seen = []
+    counts = set()
+    cursor = ''
+    while True:
+        with count_queries() as counter:
+            response = client.get(f'/api/tasks?limit=20{cursor}')
+        counts.add(counter.count)
+        seen.extend(task['id'] for task in response.json['data'])
+        if not response.json['next_cursor']:
+            break
+        cursor = f"&cursor={response.json['next_cursor']}"
+
+    assert len(seen) == len(set(seen)) == 60
+    assert len(counts) == 1
+
+
+def test_search_without_index_matches_text_and_assignee_once(app, client, seed_team):
+    manager, employees, tasks = seed_team(employees=4, tasks=12)
+    app.extensions['task_search'] = None  # запасной путь ILIKE (нет FTS5 / прав на DDL)
+
+    response = client.get('/api/tasks?limit=50&search=employee')
+    ids = [task['id'] for task in response.json['data']]
+    # У каждой задачи два подходящих исполнителя, но строка - одна
+    assert sorted(ids) == sorted(task.id for task in tasks)
+
+    response = client.get(f'/api/tasks?limit=50&search={employees[0].name}')
+    expected = {task.id for task in tasks if any(a.assigned_to == employees[0].id for a in task.assignments)}
+    assert {task['id'] for task in response.json['data']} == expected
+
+    response = client.get('/api/tasks?limit=50&search=Task 1')
+    assert {task['title'] for task in response.json['data']} == {'Task 1', 'Task 10', 'Task 11'}
@@ -0,0 +1,42 @@
+"""
+Проверка query-параметров Team DNA: некорректные значения дают 400,
+а не молча игнорируются
+"""
+import pytest
+
+
+@pytest.mark.parametrize('query', [
+    'min_strength=abc',
+    'min_strength=',
+    'top_k=1.5',
+    'top_k=0',
+    'user_id=first',
+    'radius=two',
+])
+def test_connections_reject_invalid_params(client, query):
+    response = client.get(f'/api/team-dna/connections?{query}')
+
+    assert response.status_code == 400
+    assert response.json['success'] is False
+
+
+@pytest.mark.parametrize('query', [
+    'time_budget=soon',
+    'time_budget=0',
+    'min_size=1',
+])
+def test_dream_teams_reject_invalid_params(client, query):
+    response = client.get(f'/api/team-dna/dream-teams?{query}')
+
+    assert response.status_code == 400
+    assert response.json['success'] is False
+
+
+def test_valid_params_are_accepted(client, seed_team):
+    seed_team(employees=3, tasks=0)
+
+    response = client.get('/api/team-dna/connections?min_strength=0.5&top_k=3&radius=2&user_id=2')
+    assert response.status_code == 200
+
+    response = client.get('/api/team-dna/dream-teams?time_budget=0.5&min_size=2&max_size=3')
+    assert response.status_code == 200
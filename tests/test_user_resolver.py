@@ -0,0 +1,100 @@
+"""
+Маршруты, выводящие пользователей по строкам (история, учет времени,
+комментарии, связи Team DNA), загружают всех пользователей одним
+запросом: число SQL-запросов не зависит от числа строк
+"""
+from datetime import datetime, timedelta
+import pytest
+from app.database import db
+from app.models import TaskComment, TaskHistory, TeamConnection, TimeTracking
+from app.services.user_resolver import resolve_users
+
+
+def _add_task_rows(model, task, users, count):
+    now = datetime.utcnow()
+    for i in range(count):
+        user = users[i % len(users)]
+        if model is TaskHistory:
+            db.session.add(TaskHistory(task_id=task.id, user_id=user.id, action='updated', created_at=now - timedelta(minutes=i)))
+        elif model is TimeTracking:
+            db.session.add(TimeTracking(task_id=task.id, user_id=user.id, start_time=now - timedelta(hours=i + 1),
+                                        end_time=now - timedelta(hours=i), duration_minutes=60))
+        else:
+            db.session.add(TaskComment(task_id=task.id, user_id=user.id, content=f'Comment {i}'))
+    db.session.commit()
+
+
+def _request_context(app):
+    # Тестовый клиент переиспользует контекст фикстуры вместе с g и сессией;
+    # отдельный контекст приложения воспроизводит изоляцию реального запроса
+    return app.app_context()
+
+
+@pytest.mark.parametrize('model, path', [
+    (TaskHistory, '/api/tasks/{task_id}/history'),
+    (TimeTracking, '/api/tasks/{task_id}/time-tracking'),
+    (TaskComment, '/api/tasks/{task_id}/comments'),
+])
+def test_task_rows_resolve_users_in_constant_queries(app, client, seed_team, count_queries, model, path):
+    manager, employees, tasks = seed_team(employees=8, tasks=2)
+    users = [manager] + employees
+    small, large = tasks
+
+    _add_task_rows(model, small, users[:2], 3)
+    _add_task_rows(model, large, users, 60)
+
+    counts = []
+    for task, expected_rows in ((small, 3), (large, 60)):
+        url = path.format(task_id=task.id)
+        with _request_context(app), count_queries() as counter:
+            response = client.get(url)
+        assert response.status_code == 200
+        rows = response.json['data']
+        if model is TimeTracking:
+            rows = rows['data']
+        assert len(rows) == expected_rows
+        assert all(row['user']['id'] == row['user_id'] for row in rows)
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1], counts
+
+
+def test_user_connections_resolve_users_in_constant_queries(app, client, seed_team, count_queries):
+    manager, employees, _ = seed_team(employees=12, tasks=0)
+    hub = employees[0]
+
+    def connect(others):
+        TeamConnection.query.delete()
+        for other in others:
+            db.session.add(TeamConnection(user1_id=hub.id, user2_id=other.id, connection_strength=0.8,
+                                          connection_type='strong', synergy_score=0.5))
+        db.session.commit()
+
+    counts = []
+    for others in (employees[1:3], employees[1:]):
+        connect(others)
+        url = f'/api/team-dna/connections/{hub.id}'
+        with _request_context(app), count_queries() as counter:
+            response = client.get(url)
+        connections = response.json['data']
+        assert len(connections) == len(others)
+        names = {user.id: user.name for user in employees}
+        assert all(conn['user2_name'] == names[conn['user2_id']] for conn in connections)
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1], counts
+
+
+def test_resolve_users_serves_repeats_from_request_cache(app, seed_team, count_queries):
+    manager, employees, _ = seed_team(employees=3, tasks=0)
+    ids = [employee.id for employee in employees]
+
+    with app.test_request_context():
+        with count_queries() as counter:
+            first = resolve_users(ids + [None, 999999])
+            second = resolve_users(ids[:2])
+        assert counter.count == 1
+        assert first[999999] is None
+        assert {user_id: user.name for user_id, user in second.items()} == {
+            employee.id: employee.name for employee in employees[:2]
+        }
@@ -0,0 +1,136 @@
+"""
+Параллельные назначения не превышают max_workload
+
+Потоки работают с файловой базой SQLite (у каждого свое соединение и
+своя сессия), поэтому гонка за емкость сотрудника настоящая. Переменная
+окружения STRESS_DATABASE_URL позволяет прогнать те же тесты на пустой
+базе PostgreSQL.
+"""
+import os
+import threading
+import pytest
+from app.database import db
+from app.models import User, Task, Assignment
+from app.services.task_distributor import assign_task_automatically
+from app.services.workload_analyzer import ACTIVE_ASSIGNMENT_STATUSES, reserve_workload
+from tests.conftest import TestConfig
+
+
+THREADS = 8
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    class StressConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = os.getenv('STRESS_DATABASE_URL') or f"sqlite:///{tmp_path / 'stress.db'}"
+        # Писатели SQLite ждут блокировку, а не падают с "database is locked"
+        SQLALCHEMY_ENGINE_OPTIONS = {} if os.getenv('STRESS_DATABASE_URL') else {'connect_args': {'timeout': 30}}
+
+    return StressConfig
+
+
+@pytest.fixture
+def stress_app(app):
+    yield app
+    db.session.remove()
+    if os.getenv('STRESS_DATABASE_URL'):
+        # Внешняя база переиспользуется между прогонами
+        Assignment.query.delete()
+        Task.query.delete()
+        User.query.delete()
+        db.session.commit()
+
+
+def _run_parallel(app, jobs):
+    """Выполнить jobs (список callable) в THREADS потоках, каждый в своем контексте приложения"""
+    barrier = threading.Barrier(THREADS)
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        with app.app_context():
+            barrier.wait()
+            for job in chunk:
+                try:
+                    result = job()
+                except Exception as exc:  # ошибка в потоке должна провалить тест
+                    db.session.rollback()
+                    with lock:
+                        errors.append(exc)
+                    continue
+                with lock:
+                    results.append(result)
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(jobs[i::THREADS],)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, errors
+    return results
+
+
+def _create_users(count, max_workload):
+    users = [
+        User(email=f'stress{i}@example.com', name=f'Stress {i}', password_hash='x', role='employee',
+             current_workload=0, max_workload=max_workload)
+        for i in range(count)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def _assert_workloads_consistent():
+    db.session.expire_all()
+    expected = dict(
+        db.session.query(Assignment.assigned_to, db.func.sum(Assignment.workload_points))
+        .filter(Assignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES))
+        .group_by(Assignment.assigned_to).all()
+    )
+    for user in User.query.filter(User.role == 'employee').all():
+        assert user.current_workload <= user.max_workload, (user.id, user.current_workload)
+        assert user.current_workload == int(expected.get(user.id) or 0), user.id
+
+
+def test_parallel_reserve_never_exceeds_max_workload(stress_app):
+    user_id, = _create_users(1, max_workload=50)
+
+    def reserve():
+        reserved = reserve_workload(user_id, 10)
+        db.session.commit()
+        return reserved
+
+    results = _run_parallel(stress_app, [reserve] * (THREADS * 4))
+
+    assert results.count(True) == 5
+    db.session.expire_all()
+    assert db.session.get(User, user_id).current_workload == 50
+
+
+def test_parallel_auto_assignment_respects_capacity(stress_app):
+    user_ids = _create_users(3, max_workload=30)
+    manager = User(email='stress-manager@example.com', name='Manager', password_hash='x', role='manager')
+    db.session.add(manager)
+    db.session.flush()
+    tasks = [
+        Task(title=f'Stress task {i}', priority='medium', status='pending', created_by=manager.id)
+        for i in range(THREADS * 3)
+    ]
+    db.session.add_all(tasks)
+    db.session.commit()
+    manager_id = manager.id
+
+    jobs = [lambda task_id=task.id: assign_task_automatically(task_id, manager_id) is not None for task in tasks]
+    results = _run_parallel(stress_app, jobs)
+
+    # 3 сотрудника по 30 очков, задача medium = 10 очков: емкости хватает ровно на 9 задач
+    assert results.count(True) == 9
+    _assert_workloads_consistent()
+    per_user = dict(
+        db.session.query(Assignment.assigned_to, db.func.count(Assignment.id))
+        .group_by(Assignment.assigned_to).all()
+    )
+    assert per_user == {user_id: 3 for user_id in user_ids}